@@ -1,11 +1,31 @@
 # scraper/core/__init__.py
 """
 Core module - contains essential infrastructure components
+
+db / browser load on first attribute access, so importing core (or core.config) does not
+pull in the DB client or selenium.
 """
 
+import importlib
+
 from .config import config, Config
-from .database import db, DatabaseClient
-from .browser import BrowserManager, Browser
+
+_EXPORTS = {
+    'db': '.database',
+    'DatabaseClient': '.database',
+    'BrowserManager': '.browser',
+    'Browser': '.browser',
+}
+
+
+def __getattr__(name):
+    mod = _EXPORTS.get(name)
+    if mod is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(mod, __name__), name)
+    globals()[name] = value
+    return value
+
 
 __all__ = [
     'config',
@@ -14,4 +34,4 @@ __all__ = [
     'DatabaseClient',
     'BrowserManager',
     'Browser'
-]
\ No newline at end of file
+]
@@ -27,6 +27,7 @@ class BrowserManager:
         self._start_watchdog()
 
     def _setup_browser(self):
+        config.validate_config(require=("browser",))
         logger.info("Setting up browser...")
         options = webdriver.ChromeOptions()
         options.binary_location = config.BRAVE_PATH
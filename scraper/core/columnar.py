@@ -0,0 +1,308 @@
+# scraper/core/columnar.py
+"""
+Optional columnar bundle tables for large backfill days.
+
+ColumnarTable keeps every column dictionary-encoded: a distinct-value list plus one
+int32 code per row (-1 = key absent, the same "absent vs None" rule as core.records).
+FK mapping, numeric coercion and conflict-key dedupe then work on distinct values and
+code vectors instead of per-row dicts, and rows are materialised only when the upsert
+payload is built (DatabaseClient.upsert_columnar).
+
+NumPy is used for the code vectors when installed; without it codes live in compact
+array('i') buffers and the same operations run as plain loops over codes.
+
+Enable for pipeline.run_day with BUNDLE_COLUMNAR=1.
+"""
+from __future__ import annotations
+
+from array import array
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+try:  # optional acceleration
+    import numpy as np  # type: ignore
+except Exception:  # pragma: no cover
+    np = None  # type: ignore
+
+# bundle tables that benefit (thousands of rows per day, FK mapped in store_bundle)
+COLUMNAR_TABLES = ("lineups", "events", "player_stats")
+
+Mapper = Union[Dict[Any, Any], Callable[..., Any]]
+
+
+def _codes(values: List[int]):
+    return np.asarray(values, dtype=np.int32) if np is not None else array("i", values)
+
+
+class ColumnarTable:
+    """Dictionary-encoded column store for one bundle table."""
+
+    __slots__ = ("n", "_cols")
+
+    def __init__(self, n: int, cols: Optional[Dict[str, Tuple[Any, List[Any]]]] = None):
+        self.n = n
+        self._cols: Dict[str, Tuple[Any, List[Any]]] = cols or {}  # name -> (codes, distinct values)
+
+    # ---------------- build / materialise ----------------
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Any]) -> "ColumnarTable":
+        codes: Dict[str, List[int]] = {}
+        cats: Dict[str, Dict[Any, int]] = {}
+        vals: Dict[str, List[Any]] = {}
+        n = 0
+        for r in rows:
+            for k, v in r.items():
+                col = codes.get(k)
+                if col is None:
+                    col = codes[k] = [-1] * n
+                    cats[k] = {}
+                    vals[k] = []
+                try:
+                    c = cats[k].get((v.__class__, v))
+                    if c is None:
+                        c = cats[k][(v.__class__, v)] = len(vals[k])
+                        vals[k].append(v)
+                except TypeError:  # unhashable (dict/list payloads) -> own slot
+                    c = len(vals[k])
+                    vals[k].append(v)
+                col.append(c)
+            n += 1
+            for k, col in codes.items():
+                if len(col) < n:
+                    col.append(-1)
+        return cls(n, {k: (_codes(c), vals[k]) for k, c in codes.items()})
+
+    def __len__(self) -> int:
+        return self.n
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self._cols)
+
+    def values(self, name: str) -> List[Any]:
+        """Decoded column (None where absent)."""
+        col = self._cols.get(name)
+        if col is None:
+            return [None] * self.n
+        codes, vals = col
+        return [vals[c] if c >= 0 else None for c in codes]
+
+    def iter_rows(self) -> Iterator[Dict[str, Any]]:
+        names = list(self._cols)
+        decoded = [(name, self._cols[name][0], self._cols[name][1]) for name in names]
+        for i in range(self.n):
+            row: Dict[str, Any] = {}
+            for name, codes, vals in decoded:
+                c = codes[i]
+                if c >= 0:
+                    row[name] = vals[c]
+            yield row
+
+    def to_rows(self) -> List[Dict[str, Any]]:
+        return list(self.iter_rows())
+
+    # ---------------- column ops ----------------
+
+    def drop(self, *names: str) -> "ColumnarTable":
+        return ColumnarTable(self.n, {k: v for k, v in self._cols.items() if k not in names})
+
+    def project(self, names: Iterable[str]) -> "ColumnarTable":
+        keep = set(names)
+        return ColumnarTable(self.n, {k: v for k, v in self._cols.items() if k in keep})
+
+    def apply(self, name: str, fn: Callable[[Any], Any]) -> "ColumnarTable":
+        """Transform a column once per distinct value; fn -> None makes the key absent."""
+        col = self._cols.get(name)
+        if col is None:
+            return self
+        codes, vals = col
+        new_vals: List[Any] = []
+        remap: List[int] = []
+        seen: Dict[Any, int] = {}
+        for v in vals:
+            nv = fn(v)
+            if nv is None:
+                remap.append(-1)
+                continue
+            try:
+                key = (nv.__class__, nv)
+                c = seen.get(key)
+                if c is None:
+                    c = seen[key] = len(new_vals)
+                    new_vals.append(nv)
+            except TypeError:
+                c = len(new_vals)
+                new_vals.append(nv)
+            remap.append(c)
+        cols = dict(self._cols)
+        cols[name] = (self._take(remap, codes), new_vals)
+        return ColumnarTable(self.n, cols)
+
+    @staticmethod
+    def _take(remap: List[int], codes):
+        """codes -> remap[codes], keeping -1 as -1."""
+        if np is not None:
+            lut = np.asarray(remap + [-1], dtype=np.int32)  # index -1 hits the trailing -1
+            return lut[codes]
+        return array("i", [remap[c] if c >= 0 else -1 for c in codes])
+
+    def map(self, srcs: Union[str, Sequence[str]], mapping: Mapper, dst: str, *, only_missing: bool = False) -> "ColumnarTable":
+        """dst = mapping[src value(s)] evaluated once per distinct combination.
+
+        Rows whose lookup misses keep their current dst (absent if none). With
+        only_missing=True rows that already have dst are left untouched.
+        """
+        srcs = (srcs,) if isinstance(srcs, str) else tuple(srcs)
+        if any(s not in self._cols for s in srcs):
+            return self
+        look = mapping.get if isinstance(mapping, dict) else mapping
+        src_cols = [self._cols[s] for s in srcs]
+        old_codes, old_vals = self._cols.get(dst, (_codes([-1] * self.n), []))
+        out_vals = list(old_vals)
+        out_index: Dict[Any, int] = {}
+        for i, v in enumerate(out_vals):
+            try:
+                out_index.setdefault((v.__class__, v), i)
+            except TypeError:
+                pass
+
+        def _out_code(v: Any) -> int:
+            try:
+                key = (v.__class__, v)
+                c = out_index.get(key)
+                if c is None:
+                    c = out_index[key] = len(out_vals)
+                    out_vals.append(v)
+                return c
+            except TypeError:
+                out_vals.append(v)
+                return len(out_vals) - 1
+
+        if np is not None:
+            if len(srcs) == 1:
+                uniq, inverse = np.unique(src_cols[0][0], return_inverse=True)
+                combos = [(int(u),) for u in uniq]
+            else:
+                stacked = np.stack([c[0] for c in src_cols], axis=1)
+                uniq, inverse = np.unique(stacked, axis=0, return_inverse=True)
+                combos = [tuple(int(x) for x in u) for u in uniq]
+            res = np.empty(len(combos), dtype=np.int32)
+            for j, combo in enumerate(combos):
+                if any(c < 0 for c in combo):
+                    res[j] = -1
+                    continue
+                key = src_cols[0][1][combo[0]] if len(srcs) == 1 else tuple(sc[1][c] for sc, c in zip(src_cols, combo))
+                hit = look(key)
+                res[j] = -1 if hit is None else _out_code(hit)
+            new = res[np.asarray(inverse).reshape(-1)]
+            keep = new < 0 if not only_missing else (new < 0) | (old_codes >= 0)
+            codes = np.where(keep, old_codes, new).astype(np.int32)
+        else:
+            cache: Dict[Tuple[int, ...], int] = {}
+            codes = array("i", old_codes)
+            for i in range(self.n):
+                if only_missing and codes[i] >= 0:
+                    continue
+                combo = tuple(sc[0][i] for sc in src_cols)
+                c = cache.get(combo)
+                if c is None:
+                    if any(x < 0 for x in combo):
+                        c = -1
+                    else:
+                        key = src_cols[0][1][combo[0]] if len(srcs) == 1 else tuple(sc[1][x] for sc, x in zip(src_cols, combo))
+                        hit = look(key)
+                        c = -1 if hit is None else _out_code(hit)
+                    cache[combo] = c
+                if c >= 0:
+                    codes[i] = c
+        cols = dict(self._cols)
+        cols[dst] = (codes, out_vals)
+        return ColumnarTable(self.n, cols)
+
+    # ---------------- row selection ----------------
+
+    def _select(self, idx) -> "ColumnarTable":
+        if np is not None:
+            idx = np.asarray(idx, dtype=np.int64)
+            return ColumnarTable(len(idx), {k: (c[idx], v) for k, (c, v) in self._cols.items()})
+        return ColumnarTable(len(idx), {k: (array("i", [c[i] for i in idx]), v) for k, (c, v) in self._cols.items()})
+
+    def where_present(self, *names: str) -> "ColumnarTable":
+        """Keep rows that have every named column."""
+        if any(n not in self._cols for n in names):
+            return ColumnarTable(0, {k: (_codes([]), v) for k, (_, v) in self._cols.items()})
+        if np is not None:
+            mask = np.ones(self.n, dtype=bool)
+            for n in names:
+                mask &= self._cols[n][0] >= 0
+            return self._select(np.nonzero(mask)[0])
+        cols = [self._cols[n][0] for n in names]
+        return self._select([i for i in range(self.n) if all(c[i] >= 0 for c in cols)])
+
+    def where(self, name: str, pred: Callable[[Any], bool]) -> "ColumnarTable":
+        """Keep rows whose `name` value satisfies pred (evaluated once per distinct value)."""
+        col = self._cols.get(name)
+        if col is None:
+            return self.where_present(name)
+        codes, vals = col
+        ok = [bool(pred(v)) for v in vals]
+        if np is not None:
+            lut = np.asarray(ok + [False], dtype=bool)
+            return self._select(np.nonzero(lut[codes])[0])
+        return self._select([i for i, c in enumerate(codes) if c >= 0 and ok[c]])
+
+    def _score(self, name: str) -> List[float]:
+        out = []
+        for v in self._cols[name][1]:
+            try:
+                out.append(float(v or 0))
+            except Exception:
+                out.append(0.0)
+        return out
+
+    def dedupe(self, keys: Sequence[str], prefer: Sequence[str] = (), *, prefer_sum: bool = False, keep: str = "first") -> "ColumnarTable":
+        """One row per conflict key; rows missing a key column are dropped.
+
+        prefer: columns compared (lexicographically, or summed with prefer_sum) to pick the
+        winner; ties (and no prefer) resolve to the first or last row per `keep`.
+        Surviving rows keep their original relative order.
+        """
+        t = self.where_present(*keys)
+        if t.n == 0:
+            return t
+        pcols = [p for p in prefer if p in t._cols]
+        if np is not None:
+            pos = np.arange(t.n)
+            scores = []
+            for p in pcols:
+                lut = np.asarray(t._score(p) + [0.0])
+                scores.append(lut[t._cols[p][0]])
+            if prefer_sum and scores:
+                scores = [np.sum(scores, axis=0)]
+            tie = pos if keep == "first" else -pos
+            # lexsort: last key is primary -> (key..., -score..., tie)
+            order = np.lexsort([tie] + [-s for s in reversed(scores)] + [t._cols[k][0] for k in reversed(keys)])
+            kmat = np.stack([t._cols[k][0][order] for k in keys], axis=1)
+            first = np.ones(t.n, dtype=bool)
+            first[1:] = np.any(kmat[1:] != kmat[:-1], axis=1)
+            return t._select(np.sort(order[first]))
+        score_luts = [t._score(p) for p in pcols]
+        best: Dict[Tuple[int, ...], Tuple[Tuple[float, ...], int]] = {}
+        for i in range(t.n):
+            k = tuple(t._cols[c][0][i] for c in keys)
+            sc = tuple(lut[t._cols[p][0][i]] if t._cols[p][0][i] >= 0 else 0.0 for p, lut in zip(pcols, score_luts))
+            if prefer_sum:
+                sc = (sum(sc),)
+            cur = best.get(k)
+            if cur is None or sc > cur[0] or (sc == cur[0] and keep == "last"):
+                best[k] = (sc, i)
+        return t._select(sorted(i for _, i in best.values()))
+
+
+def to_columnar(bundle: Dict[str, Any], tables: Sequence[str] = COLUMNAR_TABLES) -> Dict[str, Any]:
+    """Replace the row lists of `tables` in bundle with ColumnarTable (in place)."""
+    for name in tables:
+        rows = bundle.get(name)
+        if isinstance(rows, list) and rows:
+            bundle[name] = ColumnarTable.from_rows(rows)
+    return bundle
@@ -24,7 +24,68 @@ class Config:
     # 🔧 DATABASE SETTINGS
     SUPABASE_URL = os.getenv("SUPABASE_URL")
     SUPABASE_SERVICE_KEY = os.getenv("SUPABASE_SERVICE_KEY")
-    
+
+    # Post-write verification: off | sampled | always (sampled = every N writes per table)
+    DB_VERIFY_MODE = os.getenv("DB_VERIFY_MODE", "sampled").strip().lower()
+    DB_VERIFY_EVERY = int(os.getenv("DB_VERIFY_EVERY", "10") or 10)
+    DB_VERIFY_SAMPLE = int(os.getenv("DB_VERIFY_SAMPLE", "5") or 5)
+
+    # Write-behind change detection: skip rows identical to what this process last wrote.
+    # Unchanged rows are still re-sent after DB_CHANGE_TTL seconds (keeps updated_at fresh for live views).
+    DB_CHANGE_DETECTION = os.getenv("DB_CHANGE_DETECTION", "1").lower() in {"1", "true", "yes"}
+    DB_CHANGE_TTL = float(os.getenv("DB_CHANGE_TTL", "120") or 120)
+    DB_CHANGE_MAX_KEYS = int(os.getenv("DB_CHANGE_MAX_KEYS", "100000") or 100000)
+
+    # Adaptive write batches: size doubles while requests stay fast/small, halves when slow
+    DB_BATCH_MIN = int(os.getenv("DB_BATCH_MIN", "25") or 25)
+    DB_BATCH_MAX = int(os.getenv("DB_BATCH_MAX", "1000") or 1000)
+    DB_BATCH_TARGET_SECONDS = float(os.getenv("DB_BATCH_TARGET_SECONDS", "2.0") or 2.0)
+    DB_BATCH_MAX_BYTES = int(os.getenv("DB_BATCH_MAX_BYTES", "2000000") or 2000000)
+
+    # Rows isolated by binary-split retry are appended here (JSONL, one file per table)
+    DB_QUARANTINE_DIR = os.getenv("DB_QUARANTINE_DIR", "logs/quarantine")
+
+    # Local spool: bundles are appended here when storage fails or is slower than
+    # SPOOL_LATENCY_SECONDS; a background drainer replays them in order.
+    SPOOL_ENABLED = os.getenv("SPOOL_ENABLED", "1").lower() in {"1", "true", "yes"}
+    SPOOL_DIR = os.getenv("SPOOL_DIR", "spool")
+    SPOOL_SEGMENT_BYTES = int(os.getenv("SPOOL_SEGMENT_BYTES", str(8 * 1024 * 1024)) or 8 * 1024 * 1024)
+    SPOOL_LATENCY_SECONDS = float(os.getenv("SPOOL_LATENCY_SECONDS", "60") or 60)
+    SPOOL_COOLDOWN_SECONDS = float(os.getenv("SPOOL_COOLDOWN_SECONDS", "120") or 120)
+    SPOOL_DRAIN_INTERVAL = float(os.getenv("SPOOL_DRAIN_INTERVAL", "15") or 15)
+    # replays a bundle may be rejected before it is moved to <SPOOL_DIR>/dead/
+    SPOOL_MAX_ATTEMPTS = int(os.getenv("SPOOL_MAX_ATTEMPTS", "5") or 5)
+
+    # DB call instrumentation (latency histogram, bytes, rows per table/op), dumped per cycle
+    DB_METRICS = os.getenv("DB_METRICS", "1").lower() in {"1", "true", "yes"}
+    DB_METRICS_FILE = os.getenv("DB_METRICS_FILE", "logs/db_metrics.jsonl").strip()
+
+    # match_state_history (SAVE_MATCH_STATE_HISTORY=1): rows only on state change (status/period/score),
+    # buffered across cycles; compaction drops repeated snapshots older than N days
+    DB_HISTORY_BATCH = int(os.getenv("DB_HISTORY_BATCH", "100") or 100)
+    DB_HISTORY_FLUSH_SECONDS = float(os.getenv("DB_HISTORY_FLUSH_SECONDS", "60") or 60)
+    DB_HISTORY_TS_COLUMN = os.getenv("DB_HISTORY_TS_COLUMN", "created_at").strip()
+    DB_HISTORY_COMPACT_DAYS = int(os.getenv("DB_HISTORY_COMPACT_DAYS", "2") or 2)
+    DB_HISTORY_RETENTION_DAYS = int(os.getenv("DB_HISTORY_RETENTION_DAYS", "0") or 0)
+
+    # pipeline.run_day: keep lineups/events/player_stats as dictionary-encoded columns
+    # (core.columnar) through store_bundle; rows are built only for the upsert payload
+    BUNDLE_COLUMNAR = os.getenv("BUNDLE_COLUMNAR", "0").lower() in {"1", "true", "yes"}
+
+    # Standings computed locally from stored finished results (pipeline.standings_engine);
+    # provider standings are then only fetched every STANDINGS_RECONCILE_SECONDS per competition
+    STANDINGS_LOCAL = os.getenv("STANDINGS_LOCAL", "1").lower() in {"1", "true", "yes"}
+    STANDINGS_RECONCILE_SECONDS = float(os.getenv("STANDINGS_RECONCILE_SECONDS", str(6 * 3600)) or 6 * 3600)
+    # Persisted standings endpoint discovery (working URL variant per competition, failing
+    # variants, debounce timestamps); empty path = in-memory only
+    STANDINGS_STATE_PATH = os.getenv("STANDINGS_STATE_PATH", "cache/standings_state.json").strip()
+    STANDINGS_STATE_MAX = int(os.getenv("STANDINGS_STATE_MAX", "5000") or 5000)
+    STANDINGS_STATE_TTL = float(os.getenv("STANDINGS_STATE_TTL", str(30 * 86400)) or 30 * 86400)
+    STANDINGS_NEGATIVE_TTL = float(os.getenv("STANDINGS_NEGATIVE_TTL", "86400") or 86400)
+
+    # Direct Postgres DSN for bulk COPY loads (core.pg_bulk); unset = PostgREST only
+    PG_BULK_DSN = os.getenv("PG_BULK_DSN", "").strip()
+
     # 🔧 BROWSER SETTINGS
     BRAVE_PATH = os.getenv("BRAVE_PATH", "C:\\Program Files\\BraveSoftware\\Brave-Browser\\Application\\brave.exe")
     CHROMEDRIVER_PATH = "scraper/drivers/chromedriver.exe"
@@ -45,8 +106,12 @@ class Config:
     FUTURE_TOLERANCE_MINUTES = 15  # Minutes tolerance for future matches
     
     CACHE_DURATION = 5 * 60 * 1000  # 5 minutes in milliseconds
-    MAX_CONNECTIONS = 20
-    KEEPALIVE_CONNECTIONS = 10
+    # Supabase HTTP transport (per pooled client): connection limits, keep-alive, HTTP/2 if h2 is installed
+    MAX_CONNECTIONS = int(os.getenv("DB_MAX_CONNECTIONS", "20") or 20)
+    KEEPALIVE_CONNECTIONS = int(os.getenv("DB_KEEPALIVE_CONNECTIONS", "10") or 10)
+    KEEPALIVE_EXPIRY = float(os.getenv("DB_KEEPALIVE_EXPIRY", "30") or 30)
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "4") or 4)
+    DB_HTTP2 = os.getenv("DB_HTTP2", "1").lower() in {"1", "true", "yes"}
     
     # 🔧 LIGA PRIORITETI (synced with frontend)
     LEAGUE_PRIORITIES = {
@@ -208,64 +273,111 @@ class Config:
     LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
     LOG_FORMAT = "[%(asctime)s] %(levelname)s [%(name)s] %(message)s"
     LOG_DATE_FORMAT = "%H:%M:%S"
+    # Records go through a bounded queue to a background writer thread (formatting included);
+    # a full queue drops records instead of blocking the scrape loop
+    LOG_ASYNC = os.getenv("LOG_ASYNC", "1").lower() in {"1", "true", "yes"}
+    LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000") or 10000)
+    # One JSON object per line (ts, level, logger, msg + structured fields) instead of text
+    LOG_JSON = os.getenv("LOG_JSON", "0").lower() in {"1", "true", "yes"}
+    # Keyed hot-path messages: at most LOG_RATE_BURST per key per LOG_RATE_WINDOW seconds
+    LOG_RATE_WINDOW = float(os.getenv("LOG_RATE_WINDOW", "10") or 10)
+    LOG_RATE_BURST = int(os.getenv("LOG_RATE_BURST", "5") or 5)
     
+    _validated: set = set()
+
     @classmethod
-    def validate_config(cls):
-        """Validira osnovne konfiguracije"""
+    def validate_config(cls, require=("db", "browser")):
+        """Validira osnovne konfiguracije.
+
+        require: groups to check - "db" (Supabase credentials), "browser" (ChromeDriver /
+        Brave paths). Not run on import: DatabaseClient checks "db" before its first client,
+        BrowserManager checks "browser" before starting Chrome. Passed groups are remembered.
+        """
+        todo = [r for r in require if r not in cls._validated]
+        if not todo:
+            return True
         errors = []
         
-        if not cls.SUPABASE_URL:
-            errors.append("SUPABASE_URL not set")
-        
-        if not cls.SUPABASE_SERVICE_KEY:
-            errors.append("SUPABASE_SERVICE_KEY not set")
+        if "db" in todo:
+            if not cls.SUPABASE_URL:
+                errors.append("SUPABASE_URL not set")
             
-        if not Path(cls.CHROMEDRIVER_PATH).exists():
-            errors.append(f"ChromeDriver not found at {cls.CHROMEDRIVER_PATH}")
+            if not cls.SUPABASE_SERVICE_KEY:
+                errors.append("SUPABASE_SERVICE_KEY not set")
             
-        if not Path(cls.BRAVE_PATH).exists():
-            errors.append(f"Brave browser not found at {cls.BRAVE_PATH}")
+        if "browser" in todo:
+            if not Path(cls.CHROMEDRIVER_PATH).exists():
+                errors.append(f"ChromeDriver not found at {cls.CHROMEDRIVER_PATH}")
+                
+            if not Path(cls.BRAVE_PATH).exists():
+                errors.append(f"Brave browser not found at {cls.BRAVE_PATH}")
         
         if errors:
             raise ValueError(f"Configuration errors: {', '.join(errors)}")
         
+        cls._validated.update(todo)
         return True
     
+    # Posebni slučajevi (substring, checked after every LEAGUE_PRIORITIES name)
+    _PRIORITY_KEYWORDS = (
+        ('champions', 120),
+        ('europa', 110),
+        ('premier', 90),
+        ('bundesliga', 75),
+        ('serie a', 80),
+    )
+    _priority_matcher = None  # (source table, exact dict, ordered substring patterns)
+    _priority_memo: dict = {}
+    _PRIORITY_MEMO_MAX = 4096
+
+    @classmethod
+    def _compile_priorities(cls):
+        """Lowercased exact-match dict + ordered substring patterns (first listed league wins).
+
+        Rebuilt only if LEAGUE_PRIORITIES is replaced; the memo is cleared with it.
+        """
+        exact = {}
+        patterns = []
+        for league, priority in cls.LEAGUE_PRIORITIES.items():
+            key = league.lower()
+            if key not in exact:
+                exact[key] = priority
+                patterns.append((key, priority))
+        patterns.extend(cls._PRIORITY_KEYWORDS)
+        cls._priority_matcher = (cls.LEAGUE_PRIORITIES, exact, tuple(patterns))
+        cls._priority_memo = {}
+        return cls._priority_matcher
+
     @classmethod
     def get_league_priority(cls, competition_name):
-        """Dobiva prioritet lige s fuzzy matching"""
+        """Dobiva prioritet lige s fuzzy matching (exact name, then substring, then keywords)"""
         if not competition_name:
             return 10  # default priority
-        
+        matcher = cls._priority_matcher
+        if matcher is None or matcher[0] is not cls.LEAGUE_PRIORITIES:
+            # table swapped -> recompile first, so the memo of the old table is never read
+            matcher = cls._compile_priorities()
+        memo = cls._priority_memo
+        hit = memo.get(competition_name)
+        if hit is not None:
+            return hit
+        _, exact, patterns = matcher
+
         normalized_name = competition_name.lower().strip()
-        
-        # Exact match
-        for league, priority in cls.LEAGUE_PRIORITIES.items():
-            if normalized_name == league.lower():
-                return priority
-        
-        # Fuzzy matching
-        for league, priority in cls.LEAGUE_PRIORITIES.items():
-            if league.lower() in normalized_name:
-                return priority
-        
-        # Posebni slučajevi
-        if 'champions' in normalized_name:
-            return 120
-        if 'europa' in normalized_name:
-            return 110
-        if 'premier' in normalized_name:
-            return 90
-        if 'bundesliga' in normalized_name:
-            return 75
-        if 'serie a' in normalized_name:
-            return 80
-        
-        return 10  # default
+        priority = exact.get(normalized_name)
+        if priority is None:
+            priority = 10  # default
+            for pattern, p in patterns:
+                if pattern in normalized_name:
+                    priority = p
+                    break
 
-# Validate configuration on import
-Config.validate_config()
+        if len(memo) >= cls._PRIORITY_MEMO_MAX:
+            memo.clear()
+        memo[competition_name] = priority
+        return priority
 
+# Validation is deferred to first use (see validate_config) so tools can import without infra
 config = Config()
 
 # Manual allow-list only. Dynamic TOP N & name expansion handled in utils.leagues_filter to avoid
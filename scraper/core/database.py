@@ -1,14 +1,29 @@
 # scraper/core/database.py
 from __future__ import annotations
 
+import atexit
+import hashlib
+import json
+import math
+import queue
+import re
+import threading
 import time
-from typing import List, Dict, Any, Optional, Tuple, Iterable, Set
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, List, Dict, Any, Optional, Tuple, Iterable, Iterator, Set, Callable
+from pathlib import Path
 from datetime import datetime, timezone, timedelta
 
-from supabase import create_client, Client
 import os
 from .config import config
-from utils.logger import get_logger
+from .records import Record
+from utils.timeconv import to_date, to_epoch
+from utils.logger import get_logger, log_extra
+
+if TYPE_CHECKING:  # supabase / numpy stay off the import path (tools, dry runs)
+    from supabase import Client
+    from .columnar import ColumnarTable
 
 logger = get_logger(__name__)
 
@@ -210,7 +225,8 @@ def _to_float(v: Any) -> Optional[float]:
     except Exception:
         return None
 
-def _clean_rows(table: str, rows: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+def _clean_rows_generic(table: str, rows: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Reference (uncompiled) cleaner; kept for tools/clean_rows_bench.py equivalence checks."""
     allowed = _ALLOWED[table]
     int_fields = _INT_FIELDS.get(table, set())
     float_fields = _FLOAT_FIELDS.get(table, set())
@@ -221,7 +237,7 @@ def _clean_rows(table: str, rows: Iterable[Dict[str, Any]]) -> List[Dict[str, An
     dob_samples_dropped: list[str] = []
     dob_samples_kept: list[str] = []
     for r in rows:
-        if not isinstance(r, dict):
+        if not isinstance(r, (dict, Record)):
             continue
         cleaned: Dict[str, Any] = {}
         for k, v in r.items():
@@ -322,18 +338,710 @@ def _clean_rows(table: str, rows: Iterable[Dict[str, Any]]) -> List[Dict[str, An
             pass
     return out
 
+# ------------------------------ compiled row coercers ------------------------------
+# _ALLOWED/_INT_FIELDS/_FLOAT_FIELDS + table special cases compiled once into
+# {column: converter|None}; the per-row loop is then one dict lookup per key.
+
+_SKIP = object()
+_YEAR_RE = re.compile(r"(18|19|20)\d{2}")
+
+def _season_name(v: Any) -> Any:
+    return (v.get("name") or v.get("year")) if isinstance(v, dict) else v
+
+def _round_value(v: Any) -> Any:
+    return v.get("round") if isinstance(v, dict) else v
+
+def _iso_to_epoch(v: Any) -> Any:
+    # ISO8601 -> epoch seconds za BIGINT kolonu; cheap shape check before parsing
+    if not isinstance(v, str):
+        return v
+    if len(v) < 10 or v[4] != "-" or v[7] != "-":
+        return None
+    return to_epoch(v)
+
+def _dob_to_date(v: Any) -> Optional[str]:
+    """Player DOB (epoch s/ms, year number or string) -> 'YYYY-MM-DD' or None."""
+    this_year = datetime.now(timezone.utc).year
+    if isinstance(v, (int, float)):
+        if isinstance(v, float) and not math.isfinite(v):
+            return None  # NaN / inf (e.g. pandas-backed backfills): int() would raise
+        ts = int(v)
+        try:
+            if abs(ts) > 10**5:  # epoch s/ms
+                return to_date(ts)
+            year_candidate = int(str(ts)[:4])
+        except (ValueError, OverflowError, OSError):
+            return None
+        return f"{year_candidate}-01-01" if 1800 <= year_candidate <= this_year else None
+    if isinstance(v, str):
+        s = v.strip()
+        if len(s) >= 10 and s[4] == "-" and s[7] == "-":
+            return s[:10]
+        m = _YEAR_RE.search(s)
+        if m and 1800 <= int(m.group(0)) <= this_year:
+            return f"{m.group(0)}-01-01"
+    return None
+
+_SPECIAL: Dict[str, Dict[str, Any]] = {
+    # teams.founded: remote type mismatch (year vs timestamp) -> never sent from the cleaner
+    "teams": {"founded": _SKIP},
+    "matches": {"season": _season_name, "round": _round_value, "current_period_start": _iso_to_epoch},
+    "players": {"date_of_birth": _dob_to_date},
+}
+
+def _fast_int(v: Any) -> Optional[int]:
+    # common shapes first (int, plain ASCII digit strings); everything else -> _to_int
+    if v.__class__ is int:
+        return v
+    if v.__class__ is str:
+        s = v.strip()
+        if s.isascii() and s.isdigit():
+            return int(s)
+    return _to_int(v)
+
+def _fast_float(v: Any) -> Optional[float]:
+    if v.__class__ is float:
+        return v
+    if v.__class__ is int:
+        return float(v)
+    return _to_float(v)
+
+def _chain(first: Callable[[Any], Any], second: Callable[[Any], Any]) -> Callable[[Any], Any]:
+    def conv(v: Any) -> Any:
+        v = first(v)
+        return None if v is None else second(v)
+    return conv
+
+def _column_converters(table: str) -> Dict[str, Optional[Callable[[Any], Any]]]:
+    """{allowed column: converter or None (pass-through)}; skipped columns are absent."""
+    ints = _INT_FIELDS.get(table, set())
+    floats = _FLOAT_FIELDS.get(table, set())
+    special = _SPECIAL.get(table, {})
+    conv: Dict[str, Optional[Callable[[Any], Any]]] = {}
+    for col in _ALLOWED[table]:
+        sp = special.get(col)
+        if sp is _SKIP:
+            continue
+        num = _fast_int if col in ints else (_fast_float if col in floats else None)
+        conv[col] = _chain(sp, num) if sp and num else (sp or num)
+    return conv
+
+def _compile_coercer(table: str) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+    get = _column_converters(table).get
+
+    def coerce(r: Dict[str, Any]) -> Dict[str, Any]:
+        out: Dict[str, Any] = {}
+        for k, v in r.items():
+            f = get(k, _SKIP)
+            if f is _SKIP or v is None:
+                continue
+            if v.__class__ is str and not v.strip():
+                continue  # blank -> None -> dropped
+            if f is not None:
+                v = f(v)
+                if v is None:
+                    continue
+            out[k] = v
+        return out
+
+    coerce.__name__ = f"coerce_{table}"
+    return coerce
+
+_COERCERS: Dict[str, Callable[[Dict[str, Any]], Dict[str, Any]]] = {t: _compile_coercer(t) for t in _ALLOWED}
+
+def _value_coercer(f: Optional[Callable[[Any], Any]]) -> Callable[[Any], Any]:
+    """Single-value form of the row coercer (None / blank / failed conversion -> None)."""
+    def conv(v: Any) -> Any:
+        if v is None or (v.__class__ is str and not v.strip()):
+            return None
+        return f(v) if f is not None else v
+    return conv
+
+def _clean_rows(table: str, rows: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Whitelist + coerce rows for `table` using its precompiled coercer; empty rows dropped."""
+    coerce = _COERCERS[table]
+    out = [c for c in (coerce(r) for r in rows if isinstance(r, (dict, Record))) if c]
+    if table == "players" and isinstance(rows, list):
+        # DOB diagnostics: raw non-blank DOBs vs DOBs that survived coercion
+        raw_dobs = [r.get("date_of_birth") for r in rows if isinstance(r, (dict, Record))]
+        raw_dobs = [d for d in raw_dobs if d is not None and not (isinstance(d, str) and not d.strip())]
+        if raw_dobs:
+            kept = [c["date_of_birth"] for c in out if "date_of_birth" in c]
+            dropped = len(raw_dobs) - len(kept)
+            dropped_sample = [repr(d) for d in raw_dobs if _dob_to_date(d) is None][:3] if dropped else []
+            logger.info(
+                f"core.database | [players clean] dob_kept={len(kept)} dob_dropped={dropped} kept_sample={kept[:3]} dropped_sample={dropped_sample}"
+            )
+    return out
+
+# ------------------------------ change detection ------------------------------
+
+# Columns that change on every write and must not make a row look "changed".
+_VOLATILE_COLS = {"updated_at"}
+# Tables where a row may be sent with only its changed columns. Value = columns that are
+# always sent (conflict key + NOT NULL columns), so an upsert of the partial row stays valid.
+_DELTA_TABLES: Dict[str, Set[str]] = {
+    "match_stats": {"match_id", "team_id"},
+    "player_stats": {"match_id", "player_id", "team_id"},
+}
+
+_MAX_PARTIAL_GROUPS = 4
+
+def _payload_bytes(row: Dict[str, Any]) -> int:
+    try:
+        return len(json.dumps(row, default=str, separators=(",", ":")))
+    except Exception:
+        return 0
+
+class RowChangeCache:
+    """Per-table cache of column digests keyed by conflict key.
+
+    split() drops rows whose columns all match what this process last wrote for the same
+    key (volatile columns ignored) and, for _DELTA_TABLES, trims changed rows down to the
+    changed columns. commit() records rows only after the DB call succeeded.
+    """
+
+    def __init__(self, ttl: float, max_keys: int):
+        self.ttl = ttl
+        self.max_keys = max_keys
+        self._rows: Dict[str, Dict[Tuple, Tuple[float, Dict[str, bytes]]]] = {}
+        self.stats: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.RLock()  # pooled writers may call in parallel
+
+    @staticmethod
+    def _col_hashes(row: Dict[str, Any]) -> Dict[str, bytes]:
+        # stable digest keyed with the type: hash() collides (-1/-2) and folds 1 / 1.0 / True
+        out: Dict[str, bytes] = {}
+        for k, v in row.items():
+            if k in _VOLATILE_COLS:
+                continue
+            out[k] = hashlib.blake2b(repr((type(v).__name__, v)).encode("utf-8", "backslashreplace"), digest_size=16).digest()
+        return out
+
+    def split(
+        self, table: str, rows: List[Dict[str, Any]], key_cols: List[str]
+    ) -> Tuple[List[Dict[str, Any]], List[Tuple[Dict[str, Any], Dict[str, Any]]], int]:
+        """Return (full_rows, [(partial_row, full_row)], skipped_count)."""
+        with self._lock:
+            cache = self._rows.get(table) or {}
+            st = self.stats.setdefault(table, {"rows_in": 0, "rows_skipped": 0, "rows_partial": 0, "bytes_saved": 0})
+            st["rows_in"] += len(rows)
+            always = _DELTA_TABLES.get(table)
+            now = time.time()
+            send: List[Dict[str, Any]] = []
+            partial: List[Tuple[Dict[str, Any], Dict[str, Any]]] = []
+            skipped = 0
+            for r in rows:
+                key = tuple(r.get(c) for c in key_cols)
+                prev = cache.get(key) if None not in key else None
+                if prev is None or now - prev[0] > self.ttl:
+                    send.append(r)
+                    continue
+                hashes = self._col_hashes(r)
+                old = prev[1]
+                changed = [k for k, h in hashes.items() if old.get(k) != h]
+                if not changed:
+                    skipped += 1
+                    st["bytes_saved"] += _payload_bytes(r)
+                    continue
+                if always is not None and len(changed) < len(hashes):
+                    part = {k: v for k, v in r.items() if k in always or k in _VOLATILE_COLS or k in changed}
+                    partial.append((part, r))
+                else:
+                    send.append(r)
+            st["rows_skipped"] += skipped
+            return send, partial, skipped
+
+    def account_partial(self, table: str, pairs: List[Tuple[Dict[str, Any], Dict[str, Any]]]) -> None:
+        with self._lock:
+            st = self.stats.setdefault(table, {"rows_in": 0, "rows_skipped": 0, "rows_partial": 0, "bytes_saved": 0})
+            st["rows_partial"] += len(pairs)
+            st["bytes_saved"] += sum(max(0, _payload_bytes(full) - _payload_bytes(part)) for part, full in pairs)
+
+    def commit(self, table: str, rows: List[Dict[str, Any]], key_cols: List[str]) -> None:
+        with self._lock:
+            cache = self._rows.setdefault(table, {})
+            now = time.time()
+            for r in rows:
+                key = tuple(r.get(c) for c in key_cols)
+                if None in key:
+                    continue
+                prev = cache.pop(key, None)
+                hashes = self._col_hashes(r)
+                if prev is not None:
+                    hashes = {**prev[1], **hashes}
+                cache[key] = (now, hashes)
+            if len(cache) > self.max_keys:
+                # dicts keep insertion order and commit() re-inserts touched keys -> drop the oldest half
+                for key in list(cache.keys())[: len(cache) // 2]:
+                    cache.pop(key, None)
+
+    def forget(self, table: str, rows: List[Dict[str, Any]], key_cols: List[str]) -> None:
+        with self._lock:
+            cache = self._rows.get(table)
+            if not cache:
+                return
+            for r in rows:
+                cache.pop(tuple(r.get(c) for c in key_cols), None)
+
+    def pop_stats(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            out, self.stats = self.stats, {}
+            return out
+
+# ------------------------------ adaptive batching ------------------------------
+
+class AdaptiveBatchSizer:
+    """Batch size driven by observed request latency and payload bytes.
+
+    Doubles while a batch finishes under half the target latency and half the byte
+    budget, halves when a batch exceeds the target (or fails). State lives for the
+    whole process, so long backfills settle on large batches after a few requests.
+    """
+
+    def __init__(self, initial: int, min_size: int, max_size: int, target_s: float, max_bytes: int):
+        self.min_size = max(1, min_size)
+        self.max_size = max(self.min_size, max_size)
+        self.size = min(self.max_size, max(self.min_size, initial))
+        self.target_s = target_s
+        self.max_bytes = max_bytes
+        self.row_bytes = 0.0  # moving average of bytes per row
+
+    def next_size(self, rows: List[Dict[str, Any]], start: int) -> int:
+        if not self.row_bytes:
+            probe = rows[start:start + 20]
+            if probe:
+                self.row_bytes = sum(_payload_bytes(r) for r in probe) / len(probe)
+        if self.row_bytes:
+            return max(self.min_size, min(self.size, int(self.max_bytes / self.row_bytes)))
+        return self.size
+
+    def observe(self, batch: List[Dict[str, Any]], elapsed: float, ok: bool = True) -> None:
+        probe = batch[:20]
+        if probe:
+            rb = sum(_payload_bytes(r) for r in probe) / len(probe)
+            self.row_bytes = rb if not self.row_bytes else 0.8 * self.row_bytes + 0.2 * rb
+        batch_bytes = self.row_bytes * len(batch)
+        if not ok or elapsed > self.target_s or batch_bytes > self.max_bytes:
+            self.size = max(self.min_size, self.size // 2)
+        elif len(batch) >= self.size and elapsed < self.target_s / 2 and batch_bytes < self.max_bytes / 2:
+            self.size = min(self.max_size, self.size * 2)
+
+# ------------------------------ binary-split retry ------------------------------
+
+# Transport / server-side failures: retry later (backoff, spool), never split or quarantine.
+# (word-bounded: "502" must not match SQLSTATE 23502)
+_TRANSIENT_RE = re.compile(
+    r"timed out|timeout|connection|temporarily unavailable|server closed|reset by peer|\b50[234]\b"
+)
+# Errors caused by row content (SQLSTATE 22xxx data exception / 23xxx constraint violation)
+# when no code is available, e.g. wrapped or re-raised messages.
+_ROW_ERROR_MARKERS = (
+    "violates", "invalid input syntax", "out of range", "duplicate key",
+    "null value in column", "value too long", "malformed",
+)
+_ROW_ERROR_STATUSES = {400, 409, 422}
+
+def _error_status(err: Exception) -> Tuple[Optional[str], Optional[int]]:
+    """(SQLSTATE / PostgREST code, HTTP status) of a DB error, whichever is known."""
+    code = getattr(err, "code", None) or getattr(err, "sqlstate", None) or getattr(err, "pgcode", None)
+    status = getattr(getattr(err, "response", None), "status_code", None)
+    if isinstance(code, int):  # postgrest: non-JSON error body -> code is the HTTP status
+        code, status = None, code
+    return (str(code) if code else None), status
+
+def is_transient_error(err: Exception) -> bool:
+    """Connection / timeout / 5xx / 429: the DB (or the way to it) failed, not the rows."""
+    try:
+        import httpx  # type: ignore
+        if isinstance(err, httpx.TransportError):
+            return True
+    except ImportError:
+        pass
+    if isinstance(err, (ConnectionError, TimeoutError)):
+        return True
+    code, status = _error_status(err)
+    if status is not None and (status >= 500 or status in (408, 429)):
+        return True
+    if code and code[:2] in ("08", "53", "57"):  # connection exception / resources / operator intervention
+        return True
+    return _TRANSIENT_RE.search(str(err).lower()) is not None
+
+def _is_row_error(err: Exception) -> bool:
+    """4xx / constraint / type errors: some row of the batch is bad -> worth bisecting."""
+    if is_transient_error(err):
+        return False
+    code, status = _error_status(err)
+    if code:
+        # a known code decides alone: e.g. 42703 (undefined column) also comes back as a 400
+        return code[:2] in ("22", "23")
+    if status is not None:
+        return status in _ROW_ERROR_STATUSES
+    msg = str(err).lower()
+    return any(m in msg for m in _ROW_ERROR_MARKERS)
+
+def bisect_write(
+    send: Callable[[List[Dict[str, Any]]], Any],
+    rows: List[Dict[str, Any]],
+    first_error: Optional[Exception] = None,
+) -> Tuple[int, List[Tuple[Dict[str, Any], str]], int]:
+    """Isolate bad rows of a failing batch by halving it.
+
+    `send(part)` must raise on failure. If `first_error` is given the full batch is
+    known to have failed and is split straight away. Returns (ok_rows, bad, requests)
+    where bad = [(row, error_text)]. k bad rows cost ~2k*log2(n) requests instead of n.
+    Only row-level errors (see _is_row_error) are split; any other error - transient or
+    systemic, on the full batch or a part of it - is re-raised, since splitting would only
+    multiply requests against a failing DB and quarantine good rows.
+    """
+    if first_error is not None and not _is_row_error(first_error):
+        raise first_error
+    ok = requests = 0
+    bad: List[Tuple[Dict[str, Any], str]] = []
+    stack: List[Tuple[List[Dict[str, Any]], Optional[Exception]]] = [(rows, first_error)]
+    while stack:
+        part, err = stack.pop()
+        if not part:
+            continue
+        if err is None:
+            requests += 1
+            try:
+                send(part)
+                ok += len(part)
+                continue
+            except Exception as e:
+                if not _is_row_error(e):
+                    raise
+                err = e
+        if len(part) == 1:
+            bad.append((part[0], str(err)))
+            continue
+        mid = len(part) // 2
+        # push right first so the left half is tried first (keeps write order)
+        stack.append((part[mid:], None))
+        stack.append((part[:mid], None))
+    return ok, bad, requests
+
+# ------------------------------ HTTP transport / client pool ------------------------------
+
+def _tune_http(client: Any) -> str:
+    """Swap the PostgREST httpx session for one with pooled keep-alive / HTTP/2 limits.
+    Returns a short description; leaves the client untouched if internals don't match."""
+    try:
+        import httpx  # type: ignore
+    except ImportError:
+        return "default"
+    pg = getattr(client, "postgrest", None)
+    old = getattr(pg, "session", None)
+    if not isinstance(old, httpx.Client):
+        return "default"
+    http2 = False
+    if config.DB_HTTP2:
+        try:
+            import h2  # type: ignore  # noqa: F401
+            http2 = True
+        except ImportError:
+            pass
+    limits = httpx.Limits(
+        max_connections=config.MAX_CONNECTIONS,
+        max_keepalive_connections=config.KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=config.KEEPALIVE_EXPIRY,
+    )
+    try:
+        new = httpx.Client(
+            base_url=old.base_url,
+            headers=old.headers,
+            timeout=old.timeout,
+            follow_redirects=old.follow_redirects,
+            limits=limits,
+            http2=http2,
+        )
+    except Exception as e:
+        logger.debug(f"core.database | http tuning skipped: {e}")
+        return "default"
+    pg.session = new
+    try:
+        old.close()
+    except Exception:
+        pass
+    return f"{'h2' if http2 else 'h1.1'} keepalive={config.KEEPALIVE_CONNECTIONS}/{config.MAX_CONNECTIONS}"
+
+class ClientPool:
+    """Up to `size` Supabase clients, created lazily, handed out via checkout().
+
+    Each client has its own tuned httpx session. LIFO reuse keeps warm connections busy.
+    """
+
+    def __init__(self, size: int, factory: Callable[[], Any]):
+        self.size = max(1, size)
+        self._factory = factory
+        self._lock = threading.Lock()
+        self._free: "queue.LifoQueue[Any]" = queue.LifoQueue()
+        self._primary: Any = None
+        self._created = 0
+
+    @property
+    def primary(self) -> Any:
+        """First client, created on first use (no connection setup at import)."""
+        if self._primary is None:
+            with self._lock:
+                if self._primary is None:
+                    self._primary = self._factory()
+                    self._created += 1
+                    self._free.put(self._primary)
+        return self._primary
+
+    @contextmanager
+    def checkout(self, timeout: Optional[float] = None):
+        self.primary  # noqa: B018 - pool always starts from the primary client
+        try:
+            client = self._free.get_nowait()
+        except queue.Empty:
+            client = None
+            with self._lock:
+                if self._created < self.size:
+                    self._created += 1
+                    grow = True
+                else:
+                    grow = False
+            if grow:
+                try:
+                    client = self._factory()
+                except Exception:
+                    with self._lock:
+                        self._created -= 1
+                    raise
+            else:
+                client = self._free.get(timeout=timeout)
+        try:
+            yield client
+        finally:
+            self._free.put(client)
+
+# ------------------------------ DB call instrumentation ------------------------------
+
+_LAT_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+_WRITE_OPS = {"upsert", "insert", "update"}
+_QUERY_OPS = _WRITE_OPS | {"select", "delete"}
+
+def _json_bytes(v: Any) -> int:
+    try:
+        return len(json.dumps(v, separators=(",", ":"), default=str))
+    except Exception:
+        return 0
+
+class DbMetrics:
+    """Per (table, op) counters: calls, errors, latency histogram, request/response bytes, rows."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._data: Dict[Tuple[str, str], Dict[str, Any]] = {}
+
+    def record(self, table: str, op: str, seconds: float, req_bytes: int = 0,
+               resp_bytes: int = 0, rows: int = 0, error: bool = False) -> None:
+        ms = seconds * 1000.0
+        with self._lock:
+            st = self._data.get((table, op))
+            if st is None:
+                st = self._data[(table, op)] = {
+                    "calls": 0, "errors": 0, "total_ms": 0.0, "max_ms": 0.0,
+                    "req_bytes": 0, "resp_bytes": 0, "rows": 0,
+                    "hist": [0] * (len(_LAT_BUCKETS_MS) + 1),
+                }
+            st["calls"] += 1
+            st["errors"] += 1 if error else 0
+            st["total_ms"] += ms
+            st["max_ms"] = max(st["max_ms"], ms)
+            st["req_bytes"] += req_bytes
+            st["resp_bytes"] += resp_bytes
+            st["rows"] += rows
+            i = 0
+            while i < len(_LAT_BUCKETS_MS) and ms > _LAT_BUCKETS_MS[i]:
+                i += 1
+            st["hist"][i] += 1
+
+    @staticmethod
+    def _quantile(hist: List[int], q: float) -> float:
+        total = sum(hist)
+        if not total:
+            return 0.0
+        need, acc = q * total, 0
+        for i, c in enumerate(hist):
+            acc += c
+            if acc >= need:
+                return float(_LAT_BUCKETS_MS[i]) if i < len(_LAT_BUCKETS_MS) else float("inf")
+        return float("inf")
+
+    def pop(self) -> Dict[str, Dict[str, Any]]:
+        """Snapshot + reset; keys are 'table.op', p50/p95 are histogram bucket upper bounds (ms)."""
+        with self._lock:
+            data, self._data = self._data, {}
+        out: Dict[str, Dict[str, Any]] = {}
+        for (table, op), st in data.items():
+            out[f"{table}.{op}"] = {
+                "table": table, "op": op, "calls": st["calls"], "errors": st["errors"],
+                "total_ms": round(st["total_ms"], 1), "max_ms": round(st["max_ms"], 1),
+                "p50_ms": self._quantile(st["hist"], 0.5), "p95_ms": self._quantile(st["hist"], 0.95),
+                "req_bytes": st["req_bytes"], "resp_bytes": st["resp_bytes"], "rows": st["rows"],
+                "hist": dict(zip([*map(str, _LAT_BUCKETS_MS), "inf"], st["hist"])),
+            }
+        return out
+
+class _MeteredQuery:
+    """Wraps a PostgREST request builder; execute() is timed and sized into DbMetrics."""
+
+    __slots__ = ("_q", "_table", "_metrics", "_op", "_req_bytes")
+
+    def __init__(self, q: Any, table: str, metrics: DbMetrics):
+        self._q = q
+        self._table = table
+        self._metrics = metrics
+        self._op = "select"
+        self._req_bytes = 0
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._q, name)
+        if not callable(attr):
+            # e.g. `.not_` property returns a builder -> keep wrapping
+            if hasattr(attr, "execute"):
+                self._q = attr
+                return self
+            return attr
+
+        def call(*args, **kwargs):
+            if name in _QUERY_OPS:
+                self._op = name
+                if name in _WRITE_OPS:
+                    self._req_bytes = _json_bytes(args[0] if args else kwargs.get("json"))
+            res = attr(*args, **kwargs)
+            if hasattr(res, "execute"):
+                self._q = res
+                return self
+            return res
+        return call
+
+    def execute(self) -> Any:
+        t0 = time.perf_counter()
+        try:
+            resp = self._q.execute()
+        except Exception:
+            self._metrics.record(self._table, self._op, time.perf_counter() - t0, self._req_bytes, error=True)
+            raise
+        data = getattr(resp, "data", None)
+        self._metrics.record(
+            self._table, self._op, time.perf_counter() - t0, self._req_bytes,
+            _json_bytes(data) if data else 0, len(data) if isinstance(data, list) else (1 if data else 0),
+        )
+        return resp
+
+class _MeteredClient:
+    """Supabase client proxy: table() builders are metered, everything else passes through."""
+
+    __slots__ = ("_client", "_metrics")
+
+    def __init__(self, client: Any, metrics: DbMetrics):
+        object.__setattr__(self, "_client", client)
+        object.__setattr__(self, "_metrics", metrics)
+
+    def table(self, name: str) -> _MeteredQuery:
+        return _MeteredQuery(self._client.table(name), name, self._metrics)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._client, name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        setattr(self._client, name, value)
+
 # ------------------------------ DB client ------------------------------
 
 class DatabaseClient:
     def __init__(self):
-        logger.info("core.database | Initializing Supabase client…")
-        self.client: Client = create_client(config.SUPABASE_URL, config.SUPABASE_SERVICE_KEY)
-        logger.info("core.database | ✅ Supabase ready")
+        # clients are created lazily by the pool (first .client / checkout)
+        self._local = threading.local()
+        self._transport = "default"
+        self.metrics = DbMetrics()
+        self._metered: Dict[int, _MeteredClient] = {}
+        self.pool = ClientPool(config.DB_POOL_SIZE, self._new_client)
+        self._verify_calls: Dict[str, int] = {}
+        self._changes: Optional[RowChangeCache] = (
+            RowChangeCache(config.DB_CHANGE_TTL, config.DB_CHANGE_MAX_KEYS) if config.DB_CHANGE_DETECTION else None
+        )
+        self._match_batcher: Optional[AdaptiveBatchSizer] = None
+        # match_state_history: last written state per match + cross-cycle buffer
+        self._history_lock = threading.Lock()
+        self._history_last: Dict[str, Tuple[Any, ...]] = {}
+        self._history_buf: List[Dict[str, Any]] = []
+        self._history_first = 0.0
+        self._history_ts_col: Optional[str] = config.DB_HISTORY_TS_COLUMN or None
+        atexit.register(self.flush_state_history)  # buffered history must survive shutdown / --once
+
+    def _new_client(self) -> Client:
+        first = self.pool._created == 0
+        if first:
+            config.validate_config(require=("db",))
+            logger.info("core.database | Initializing Supabase client…")
+        from supabase import create_client
+        client = create_client(config.SUPABASE_URL, config.SUPABASE_SERVICE_KEY)
+        self._transport = _tune_http(client)
+        if first:
+            logger.info(f"core.database | ✅ Supabase ready (pool={self.pool.size} transport={self._transport})")
+        return client
+
+    @property
+    def client(self) -> Client:
+        """Client checked out by the current worker thread (run_parallel), else the primary.
+        Wrapped so every table(...).execute() lands in self.metrics (DB_METRICS=0 disables)."""
+        raw = getattr(self._local, "client", None) or self.pool.primary
+        if not config.DB_METRICS:
+            return raw
+        m = self._metered.get(id(raw))
+        if m is None:
+            m = self._metered[id(raw)] = _MeteredClient(raw, self.metrics)
+        return m  # type: ignore[return-value]
+
+    @contextmanager
+    def checkout(self, timeout: Optional[float] = None):
+        """Bind a pooled client to this thread; nested DatabaseClient calls use it."""
+        prev = getattr(self._local, "client", None)
+        with self.pool.checkout(timeout) as c:
+            self._local.client = c
+            try:
+                yield c
+            finally:
+                self._local.client = prev
+
+    def run_parallel(self, tasks: Dict[str, Callable[[], Any]]) -> Dict[str, Any]:
+        """Run independent DB calls concurrently, one pooled client per worker.
+        A failing task yields its exception object as result (callers decide)."""
+        if len(tasks) <= 1 or self.pool.size <= 1:
+            out: Dict[str, Any] = {}
+            for name, fn in tasks.items():
+                try:
+                    out[name] = fn()
+                except Exception as e:
+                    out[name] = e
+            return out
+
+        def _run(fn: Callable[[], Any]) -> Any:
+            with self.checkout():
+                return fn()
+
+        with ThreadPoolExecutor(max_workers=min(len(tasks), self.pool.size)) as ex:
+            futs = {name: ex.submit(_run, fn) for name, fn in tasks.items()}
+            out = {}
+            for name, f in futs.items():
+                try:
+                    out[name] = f.result()
+                except Exception as e:
+                    out[name] = e
+            return out
 
     # --- simple diagnostics ---
     def table_count(self, table: str) -> int:
         """Return approximate row count (exact count via count='exact').
-        Falls back to 0 on error so we can log without breaking flow."""
+        Falls back to 0 on error so we can log without breaking flow.
+
+        Full-table scan on large tables – keep out of the write path (use verify_written)."""
         try:
             res = self.client.table(table).select('id', count='exact').limit(1).execute()
             # supabase-py returns count attribute on response
@@ -344,6 +1052,53 @@ class DatabaseClient:
             logger.debug(f"core.database | table_count fail table={table} err={ex}")
         return 0
 
+    # --- post-write verification (policy: DB_VERIFY_MODE off|sampled|always) ---
+    def _should_verify(self, table: str) -> bool:
+        mode = config.DB_VERIFY_MODE
+        if mode in ("off", "0", "false", "no"):
+            return False
+        if mode == "always":
+            return True
+        n = self._verify_calls.get(table, 0)
+        self._verify_calls[table] = n + 1
+        return n % max(1, config.DB_VERIFY_EVERY) == 0
+
+    def verify_written(
+        self,
+        table: str,
+        key_col: str,
+        keys: Iterable[Any],
+        *,
+        select: Optional[str] = None,
+        eq: Optional[Dict[str, Any]] = None,
+    ) -> Optional[int]:
+        """Targeted read-back of a few keys that were just written.
+
+        Replaces per-call count(*) checks: only a small sample of the written keys is
+        selected by `key_col` (indexed conflict keys), so cost is independent of table size.
+        Returns number of rows found, or None when skipped by policy / on error.
+        """
+        sample = [k for k in dict.fromkeys(keys) if k is not None][:max(1, config.DB_VERIFY_SAMPLE)]
+        if not sample or not self._should_verify(table):
+            return None
+        try:
+            q = self.client.table(table).select(select or key_col).in_(key_col, sample)
+            for col, val in (eq or {}).items():
+                q = q.eq(col, val)
+            res = q.execute()
+            found = len(res.data or [])
+            if found < len(sample):
+                logger.warning(
+                    f"core.database | [{table} verify] asked={len(sample)} found={found} (check SUPABASE_URL / RLS / replica lag)"
+                )
+            else:
+                logger.info("core.database | [%s verify] asked=%s found=%s sample=%s", table, len(sample), found, (res.data or [])[:2],
+                            extra=log_extra(f"database.verify.{table}", table=table, asked=len(sample), found=found))
+            return found
+        except Exception as ex:
+            logger.warning(f"core.database | [{table} verify] failed: {ex}")
+            return None
+
     # --- health/perf ---
     def health_check(self) -> bool:
         try:
@@ -368,35 +1123,122 @@ class DatabaseClient:
             logger.error(f"core.database | DB perf failed: {e}")
             return False
 
+    # --- change detection helpers (for tables written without _upsert) ---
+    def _drop_unchanged(
+        self, table: str, rows: List[Dict[str, Any]], key_cols: List[str]
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        if self._changes is None:
+            return rows, 0
+        full, partial, skipped = self._changes.split(table, rows, key_cols)
+        return full + [orig for _, orig in partial], skipped
+
+    def _commit_written(self, table: str, rows: List[Dict[str, Any]], key_cols: List[str]) -> None:
+        if self._changes is not None:
+            self._changes.commit(table, rows, key_cols)
+
+    def log_change_stats(self) -> Dict[str, Dict[str, int]]:
+        """Log + reset per-table change detection counters (rows skipped, bytes saved)."""
+        if self._changes is None:
+            return {}
+        stats = self._changes.pop_stats()
+        for table, st in sorted(stats.items()):
+            if st.get("rows_skipped") or st.get("rows_partial"):
+                logger.info(
+                    f"core.database | [change_detect] table={table} rows_in={st['rows_in']} skipped={st['rows_skipped']} "
+                    f"partial={st['rows_partial']} bytes_saved={st['bytes_saved']}"
+                )
+        return stats
+
+    def log_metrics(self) -> Dict[str, Dict[str, Any]]:
+        """Log + reset per (table, op) DB call metrics; append a JSON line to DB_METRICS_FILE."""
+        snap = self.metrics.pop()
+        if not snap:
+            return {}
+        total_ms = sum(v["total_ms"] for v in snap.values()) or 1.0
+        for key, v in sorted(snap.items(), key=lambda kv: kv[1]["total_ms"], reverse=True)[:8]:
+            logger.info(
+                f"core.database | [db_metrics] {key} calls={v['calls']} err={v['errors']} "
+                f"time={v['total_ms']:.0f}ms ({v['total_ms'] / total_ms * 100:.0f}%) p50={v['p50_ms']:.0f} "
+                f"p95={v['p95_ms']:.0f} max={v['max_ms']:.0f}ms rows={v['rows']} "
+                f"req={v['req_bytes']}B resp={v['resp_bytes']}B"
+            )
+        if config.DB_METRICS_FILE:
+            try:
+                path = Path(config.DB_METRICS_FILE)
+                path.parent.mkdir(parents=True, exist_ok=True)
+                with open(path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps({"ts": datetime.now(timezone.utc).isoformat(), "metrics": snap},
+                                       separators=(",", ":")) + "\n")
+            except Exception as e:
+                logger.debug(f"core.database | metrics file write failed: {e}")
+        return snap
+
     # --- generic upsert with logging ---
+    def _send_upsert(
+        self,
+        table: str,
+        rows: List[Dict[str, Any]],
+        on_conflict: str,
+        ignore_duplicates: Optional[bool] = None,
+    ) -> int:
+        """One upsert request; returns rows reported back. Raises on error.
+        Transport hook: the bulk Postgres client (core.pg_bulk) overrides this."""
+        if ignore_duplicates is None:
+            resp = self.client.table(table).upsert(rows, on_conflict=on_conflict).execute()
+        else:
+            resp = self.client.table(table).upsert(
+                rows,
+                on_conflict=on_conflict,
+                ignore_duplicates=ignore_duplicates
+            ).execute()
+        return len(resp.data or [])
+
     def _upsert(
         self,
         table: str,
         payload: Any,
         on_conflict: str,
-        ignore_duplicates: Optional[bool] = None
+        ignore_duplicates: Optional[bool] = None,
+        raise_errors: bool = False,
     ) -> tuple[int, int]:
         if not payload:
             return (0, 0)
+        if isinstance(payload, dict):
+            payload = [payload]
+        # change detection: drop rows identical to the last successful write of the same key
+        key_cols = [c.strip() for c in on_conflict.split(",") if c.strip()]
+        skipped = 0
+        batches: List[List[Dict[str, Any]]] = [payload]
+        if self._changes is not None and key_cols and not ignore_duplicates:
+            full, partial, skipped = self._changes.split(table, payload, key_cols)
+            groups: Dict[Tuple[str, ...], List[Dict[str, Any]]] = {}
+            for part, _ in partial:
+                groups.setdefault(tuple(sorted(part.keys())), []).append(part)
+            if len(groups) > _MAX_PARTIAL_GROUPS:
+                # too many distinct column sets -> one request with full rows is cheaper
+                full = full + [orig for _, orig in partial]
+                groups = {}
+            elif partial:
+                self._changes.account_partial(table, partial)
+            batches = [b for b in [full, *groups.values()] if b]
+            payload = [r for b in batches for r in b]
+            if not payload:
+                return (skipped, 0)
         try:
-            if isinstance(payload, dict):
-                payload = [payload]
             # debug: log a small sample of payload to help diagnose type/format issues
             try:
-                logger.debug(f"core.database | _upsert sample table={table} payload_sample={payload[:3]}")
+                logger.debug("core.database | _upsert sample table=%s payload_sample=%s", table, payload[:3])
             except Exception:
                 logger.debug(f"core.database | _upsert sample table={table} payload_sample (unable to render)")
-            if ignore_duplicates is None:
-                resp = self.client.table(table).upsert(payload, on_conflict=on_conflict).execute()
-            else:
-                resp = self.client.table(table).upsert(
-                    payload,
-                    on_conflict=on_conflict,
-                    ignore_duplicates=ignore_duplicates
-                ).execute()
-            n = len(resp.data or [])
-            return (n, max(0, len(payload) - n))
+            n = 0
+            for batch in batches:
+                n += self._send_upsert(table, batch, on_conflict, ignore_duplicates)
+            if self._changes is not None and key_cols:
+                self._changes.commit(table, payload, key_cols)
+            return (n + skipped, max(0, len(payload) - n))
         except Exception as e:
+            if raise_errors or is_transient_error(e):
+                raise  # transient: caller's retry / spool path (fetch loop), not a row failure
             logger.exception(f"core.database | Upsert into {table} failed: {e}")
             try:
                 logger.error(f"core.database | Upsert payload sample for {table}: {payload[:3]}")
@@ -404,6 +1246,108 @@ class DatabaseClient:
                 logger.error(f"core.database | Upsert payload sample for {table}: (unprintable)")
             return (0, len(payload))
 
+    def _quarantine(self, table: str, bad: List[Tuple[Dict[str, Any], str]]) -> None:
+        """Append rows that failed on their own to <DB_QUARANTINE_DIR>/<table>.jsonl."""
+        if not bad:
+            return
+        try:
+            qdir = Path(config.DB_QUARANTINE_DIR)
+            qdir.mkdir(parents=True, exist_ok=True)
+            ts = datetime.now(timezone.utc).isoformat()
+            with open(qdir / f"{table}.jsonl", "a", encoding="utf-8") as f:
+                for row, err in bad:
+                    f.write(json.dumps({"ts": ts, "table": table, "error": err, "row": row},
+                                       ensure_ascii=False, default=str) + "\n")
+            logger.warning(f"core.database | 🧪 quarantined {len(bad)} {table} rows -> {qdir / (table + '.jsonl')}")
+        except Exception as e:
+            logger.error(f"core.database | quarantine write failed for {table}: {e}")
+
+    def _retry_split(
+        self,
+        table: str,
+        send: Callable[[List[Dict[str, Any]]], Any],
+        rows: List[Dict[str, Any]],
+        error: Exception,
+    ) -> Tuple[int, int]:
+        """Binary-split a batch that failed with `error`; quarantine the rows that fail alone.
+
+        Transient errors (timeouts, 5xx, connection resets) are re-raised for the caller's
+        retry / spool path. Other errors that do not point at rows (schema, permissions)
+        fail the batch without quarantining anything.
+        """
+        try:
+            ok, bad, requests = bisect_write(send, rows, first_error=error)
+        except Exception as e:
+            if is_transient_error(e):
+                raise
+            logger.error(f"core.database | {table} batch failed, not a row-level error (no split): {e}")
+            return 0, len(rows)
+        logger.warning(
+            f"core.database | {table} split retry rows={len(rows)} ok={ok} bad={len(bad)} requests={requests}"
+        )
+        self._quarantine(table, bad)
+        return ok, len(bad)
+
+    # -------------------- streaming scans --------------------
+
+    @staticmethod
+    def _pgrst_value(v: Any) -> str:
+        """Quote a value for a PostgREST or=(…) expression (timestamps contain ':' '+' '.')."""
+        sv = str(v).replace("\\", "\\\\").replace('"', '\\"')
+        return f'"{sv}"'
+
+    def scan(
+        self,
+        table: str,
+        select: str = "*",
+        *,
+        order_by: Tuple[str, ...] = ("id",),
+        page_size: int = 1000,
+        where: Optional[Callable[[Any], Any]] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """Stream a table with keyset pagination, yielding rows lazily.
+
+        order_by is ("id",) or a 2-column key such as ("start_time", "id"); the last column
+        must be unique and the first NOT NULL. Each page is
+        `WHERE key > last_key ORDER BY key LIMIT page_size`, so memory and per-page latency
+        stay flat regardless of table size (unlike growing OFFSETs). `where(q)` adds filters;
+        for a nullable first column filter `q.not_.is_(col, "null")` and scan the NULL rows
+        separately – a NULL page key raises ValueError instead of being sent as "None".
+        """
+        if len(order_by) not in (1, 2):
+            raise ValueError("scan order_by supports 1 or 2 columns")
+        sel = select
+        if select != "*":
+            cols = [c.strip() for c in select.split(",") if c.strip()]
+            sel = ",".join(cols + [c for c in order_by if c not in cols])
+        last: Optional[Tuple[Any, ...]] = None
+        pages = 0
+        while True:
+            q = self.client.table(table).select(sel)
+            if where is not None:
+                q = where(q)
+            if last is not None:
+                if len(order_by) == 1:
+                    q = q.gt(order_by[0], last[0])
+                else:
+                    a, b = order_by
+                    va, vb = self._pgrst_value(last[0]), self._pgrst_value(last[1])
+                    q = q.or_(f"{a}.gt.{va},and({a}.eq.{va},{b}.gt.{vb})")
+            for c in order_by:
+                q = q.order(c)
+            rows = q.limit(page_size).execute().data or []
+            pages += 1
+            yield from rows
+            if len(rows) < page_size:
+                logger.debug(f"core.database | scan {table} done pages={pages}")
+                return
+            last = tuple(rows[-1][c] for c in order_by)
+            if any(v is None for v in last):
+                raise ValueError(
+                    f"scan {table}: NULL keyset value in {order_by} at page {pages}; "
+                    f"filter NULLs out of the key columns"
+                )
+
     # -------------------- lookup mapping helpers --------------------
 
     def _map_generic(self, table: str, key_col: str, ids: Iterable[int]) -> Dict[int, str]:
@@ -412,8 +1356,9 @@ class DatabaseClient:
         if not vals:
             return out
         CHUNK = 300
-        for i in range(0, len(vals), CHUNK):
-            chunk = vals[i:i+CHUNK]
+
+        def _chunk(chunk: List[int]) -> Dict[int, str]:
+            part: Dict[int, str] = {}
             res = (
                 self.client.table(table)
                 .select(f"id,{key_col}")
@@ -421,8 +1366,8 @@ class DatabaseClient:
                 .execute()
             )
             for r in res.data or []:
-                out[int(r[key_col])] = r["id"]
-            missing = [x for x in chunk if x not in out]
+                part[int(r[key_col])] = r["id"]
+            missing = [x for x in chunk if x not in part]
             if missing:
                 res2 = (
                     self.client.table(table)
@@ -435,7 +1380,18 @@ class DatabaseClient:
                         key = int(r[key_col])
                     except Exception:
                         key = r[key_col]
-                    out[key] = r["id"]
+                    part[key] = r["id"]
+            return part
+
+        chunks = [vals[i:i+CHUNK] for i in range(0, len(vals), CHUNK)]
+        if len(chunks) == 1:
+            return _chunk(chunks[0])
+        # više chunkova -> paralelno preko poola
+        results = self.run_parallel({str(i): (lambda c=c: _chunk(c)) for i, c in enumerate(chunks)})
+        for part in results.values():
+            if isinstance(part, Exception):
+                raise part
+            out.update(part)
         return out
 
     def get_team_ids_by_sofa(self, sofa_ids: Iterable[int]) -> Dict[int, str]:
@@ -608,19 +1564,12 @@ class DatabaseClient:
         ok_rich = fail_rich = 0
         if rich:
             ok_rich, fail_rich = self._upsert("players", rich, on_conflict="sofascore_id")
-            # Post-upsert verification: read back a few rows that had date_of_birth to confirm persistence
-            try:
-                verify_ids = [p.get("sofascore_id") for p in rich if p.get("date_of_birth")][:5]
-                if verify_ids:
-                    res = (
-                        self.client.table("players")
-                        .select("sofascore_id,date_of_birth,full_name")
-                        .in_("sofascore_id", verify_ids)
-                        .execute()
-                    )
-                    logger.info(f"core.database | [players verify] fetched={len(res.data or [])} sample={res.data}")
-            except Exception as _vex:
-                logger.warning(f"core.database | [players verify] failed: {_vex}")
+            # Post-upsert verification (policy-gated): read back a few rows that had date_of_birth
+            self.verify_written(
+                "players", "sofascore_id",
+                (p.get("sofascore_id") for p in rich if p.get("date_of_birth")),
+                select="sofascore_id,date_of_birth,full_name",
+            )
 
         # lean -> update only (per row)
         updated = skipped = failed = 0
@@ -1015,6 +1964,34 @@ class DatabaseClient:
         payload = list(tmp.values())
         return self._upsert("player_stats", payload, on_conflict="match_id,player_id")
 
+    # conflict key, preference columns, summed preference, tie -> first/last (same rules as the row upserts)
+    _COLUMNAR_SPECS: Dict[str, Tuple[Tuple[str, ...], Tuple[str, ...], bool, str]] = {
+        "lineups": (("match_id", "player_id"), ("is_starting", "is_captain"), True, "first"),
+        "player_stats": (("match_id", "player_id"), ("minutes_played", "rating", "touches"), False, "first"),
+        "match_events": (("match_id", "minute", "event_type", "team", "player_name"), (), False, "last"),
+    }
+
+    def upsert_columnar(self, table: str, ct: ColumnarTable) -> tuple[int, int]:
+        """Columnar counterpart of upsert_lineups/upsert_player_stats/upsert_match_events.
+
+        Whitelist, coercion and dedupe run per distinct value / on code vectors; rows are
+        materialised only for the upsert payload.
+        """
+        keys, prefer, prefer_sum, keep = self._COLUMNAR_SPECS[table]
+        conv = _column_converters(table)
+        ct = ct.project(conv)
+        for col, f in conv.items():
+            ct = ct.apply(col, _value_coercer(f))
+        if table != "match_events":
+            # kao all(k) u row putu: falsy kljuc (0) se ne salje
+            for k in keys:
+                ct = ct.apply(k, lambda v: v or None)
+        ct = ct.dedupe(keys, prefer, prefer_sum=prefer_sum, keep=keep)
+        payload = [r for r in ct.iter_rows() if r]
+        if not payload:
+            return (0, 0)
+        return self._upsert(table, payload, on_conflict=",".join(keys))
+
     def upsert_match_stats(self, rows: List[Dict[str, Any]]) -> tuple[int, int]:
         clean = _clean_rows("match_stats", rows)
         if not clean:
@@ -1107,20 +2084,21 @@ class DatabaseClient:
         )
         if not payload:
             return (0, pre)
+        shot_key = ["match_id", "player_id", "minute", "x", "y", "outcome"]
+        payload, skipped = self._drop_unchanged("shots", payload, shot_key)
+        if not payload:
+            return (skipped, 0)
         try:
-            resp = self.client.table("shots").upsert(
-                payload,
-                # Napomena: potreban je UNIQUE indeks nad ovim kolonama za optimalan UPSERT.
-                on_conflict="match_id,player_id,minute,x,y,outcome"
-            ).execute()
-            returned = len(resp.data or [])
+            # Napomena: potreban je UNIQUE indeks nad ovim kolonama za optimalan UPSERT.
+            returned = self._send_upsert("shots", payload, "match_id,player_id,minute,x,y,outcome")
             inserted = returned if returned > 0 else len(payload)
             logger.info(
                 f"core.database | shots upsert done returned={returned} assumed_inserted={inserted} first_row={payload[0] if payload else None}"
             )
             if returned == 0:
                 logger.warning("core.database | shots upsert returned 0 rows (possibly no select privilege on table)")
-            return (inserted, 0 if inserted == len(payload) else max(0, len(payload) - inserted))
+            self._commit_written("shots", payload, shot_key)
+            return (inserted + skipped, 0 if inserted == len(payload) else max(0, len(payload) - inserted))
         except Exception as e:
             msg_full = str(e)
             msg_low = msg_full.lower()
@@ -1129,24 +2107,15 @@ class DatabaseClient:
             if ('relation' in msg_low and 'shots' in msg_low and 'does not exist' in msg_low) or ('table' in msg_low and 'shots' in msg_low and 'not exist' in msg_low):
                 logger.error("core.database | detected shots table missing based on error pattern; verify schema/search_path")
                 return (0, len(payload))
-            logger.warning("core.database | shots batch upsert failed, attempting per-row fallback")
-            ok = fail = 0
-            for idx, item in enumerate(payload):
-                try:
-                    self.client.table("shots").insert([item]).execute()
-                    ok += 1
-                except Exception as ex:
-                    em = str(ex).lower()
-                    if any(w in em for w in ("duplicate","unique","already exists")):
-                        ok += 1
-                    else:
-                        fail += 1
-                        if fail == 1:
-                            logger.warning(f"core.database | shots insert problem: {ex} item={item}")
-                        if "cross-database references" in em:
-                            fail += len(payload) - idx - 1
-                            break
-            return (ok, fail)
+            logger.warning("core.database | shots batch upsert failed, isolating bad rows by binary split")
+
+            def _send(part: List[Dict[str, Any]]) -> None:
+                self._send_upsert("shots", part, "match_id,player_id,minute,x,y,outcome")
+
+            ok, fail = self._retry_split("shots", _send, payload, e)
+            if not fail:
+                self._commit_written("shots", payload, shot_key)
+            return (ok + skipped, fail)
 
     def upsert_average_positions(self, rows: List[Dict[str, Any]]) -> tuple[int, int]:
         """Store average positions (match_id, player_id, team_id, x|avg_x, y|avg_y).
@@ -1186,12 +2155,14 @@ class DatabaseClient:
                 continue
             tmp[k] = r
         payload = list(tmp.values())
+        payload, skipped = self._drop_unchanged("average_positions", payload, ["match_id", "player_id"])
+        if not payload:
+            return (skipped, 0)
 
         try:
-            self.client.table("average_positions").upsert(
-                payload, on_conflict="match_id,player_id"
-            ).execute()
-            return (len(payload), 0)
+            self._send_upsert("average_positions", payload, "match_id,player_id")
+            self._commit_written("average_positions", payload, ["match_id", "player_id"])
+            return (len(payload) + skipped, 0)
         except Exception as e:
             logger.error(f"core.database | average_positions upsert failed: {e}")
             return (0, len(payload))
@@ -1214,6 +2185,26 @@ class DatabaseClient:
         payload = list(tmp.values())
         return self._upsert("standings", payload, on_conflict="competition_id,season,team_id")
 
+    def get_standings(self, competition_id: str, season: str) -> List[Dict[str, Any]]:
+        """Stored standings rows of one competition season (pipeline.standings_engine seed)."""
+        res = (
+            self.client.table("standings")
+            .select("team_id,rank,played,wins,draws,losses,goals_for,goals_against,points")
+            .eq("competition_id", competition_id)
+            .eq("season", season)
+            .execute()
+        )
+        return res.data or []
+
+    def get_finished_results(self, competition_id: str, season: str, statuses: Iterable[str] = ("finished", "ft")) -> List[Dict[str, Any]]:
+        """Finished results of one competition season, keyset-scanned (standings engine seed)."""
+        sts = list(statuses)
+        return list(self.scan(
+            "matches",
+            "id,source_event_id,home_team_id,away_team_id,home_score,away_score,start_time",
+            where=lambda q: q.eq("competition_id", competition_id).eq("season", season).in_("status", sts),
+        ))
+
     # -------------------- match_state (live snapshot) --------------------
     def upsert_match_state(self, rows: List[Dict[str, Any]], save_history: bool | None = None) -> tuple[int, int]:
         """Upsert volatile per-match live state (status/minute/score) into match_state.
@@ -1239,29 +2230,136 @@ class DatabaseClient:
         logger.debug(f"core.database | match_state prepared size_in={len(rows)} clean={len(clean)} dedup={len(payload)} sample={payload[:1]}")
         ok, fail = self._upsert("match_state", payload, on_conflict="match_id")
         logger.info(f"core.database | match_state upsert ok={ok} fail={fail}")
-        # optional history
+        # optional history (samo promjene stanja, batch preko ciklusa)
         if (save_history if save_history is not None else (os.getenv("SAVE_MATCH_STATE_HISTORY", "0").lower() in {"1","true","yes"})) and ok:
             try:
-                history_rows = [
-                    {
-                        "match_id": r.get("match_id"),
-                        "status": r.get("status"),
-                        "status_type": r.get("status_type"),
-                        "minute": r.get("minute"),
-                        "home_score": r.get("home_score"),
-                        "away_score": r.get("away_score"),
-                    } for r in payload if r.get("match_id")
-                ]
-                if history_rows:
-                    try:
-                        self.client.table("match_state_history").insert(history_rows).execute()
-                    except Exception as hx:
-                        # don't fail the main upsert if history insert fails
-                        logger.debug(f"core.database | match_state history insert skipped: {hx}")
-            except Exception:
-                pass
+                self._buffer_state_history(payload)
+            except Exception as hx:
+                logger.debug(f"core.database | match_state history buffer skipped: {hx}")
         return (ok, fail)
 
+    @staticmethod
+    def _state_sig(r: Dict[str, Any]) -> Tuple[Any, ...]:
+        # minute deliberately excluded: it ticks every cycle without a state change
+        return (r.get("status"), r.get("status_type"), r.get("home_score"), r.get("away_score"))
+
+    def _buffer_state_history(self, payload: List[Dict[str, Any]]) -> None:
+        """Queue a history row for each match whose (status, period, score) changed."""
+        now = datetime.now(timezone.utc)
+        with self._history_lock:
+            for r in payload:
+                mid = r.get("match_id")
+                if not mid:
+                    continue
+                sig = self._state_sig(r)
+                if self._history_last.get(mid) == sig:
+                    continue
+                self._history_last[mid] = sig
+                row = {
+                    "match_id": mid,
+                    "status": r.get("status"),
+                    "status_type": r.get("status_type"),
+                    "minute": r.get("minute"),
+                    "home_score": r.get("home_score"),
+                    "away_score": r.get("away_score"),
+                }
+                if self._history_ts_col:
+                    # buffered rows are flushed later -> carry the observation time explicitly
+                    row[self._history_ts_col] = now.isoformat()
+                if not self._history_buf:
+                    self._history_first = time.time()
+                self._history_buf.append(row)
+                if r.get("status") in ("finished", "canceled", "abandoned", "postponed"):
+                    self._history_last.pop(mid, None)  # terminal: nothing more to dedupe against
+            due = len(self._history_buf) >= config.DB_HISTORY_BATCH or (
+                self._history_buf and time.time() - self._history_first >= config.DB_HISTORY_FLUSH_SECONDS
+            )
+        if due:
+            self.flush_state_history()
+
+    def flush_state_history(self) -> int:
+        """Insert buffered match_state_history rows in one request; returns rows written."""
+        with self._history_lock:
+            rows, self._history_buf = self._history_buf, []
+        if not rows:
+            return 0
+        try:
+            self.client.table("match_state_history").insert(rows).execute()
+        except Exception as hx:
+            col = self._history_ts_col
+            if col and col in str(hx):
+                # schema has no such timestamp column -> fall back to DB default timestamps
+                logger.warning(f"core.database | match_state_history has no '{col}' column; sending rows without it")
+                self._history_ts_col = None
+                for r in rows:
+                    r.pop(col, None)
+                try:
+                    self.client.table("match_state_history").insert(rows).execute()
+                    return len(rows)
+                except Exception as hx2:
+                    hx = hx2
+            # don't fail the main flow if history insert fails
+            logger.debug(f"core.database | match_state history insert skipped: {hx}")
+            return 0
+        logger.info(f"core.database | match_state_history +{len(rows)} (state changes only)")
+        return len(rows)
+
+    def compact_state_history(
+        self,
+        compact_days: Optional[int] = None,
+        retention_days: Optional[int] = None,
+        dry_run: bool = True,
+        batch: int = 200,
+    ) -> Dict[str, int]:
+        """Downsample old match_state_history: keep only rows where (status, period, score)
+        changed vs the previous row of the same match; optionally delete beyond retention.
+
+        Streams rows ordered by (ts, id) with keyset pagination and deletes in id batches.
+        """
+        ts_col = self._history_ts_col or "created_at"
+        compact_days = config.DB_HISTORY_COMPACT_DAYS if compact_days is None else compact_days
+        retention_days = config.DB_HISTORY_RETENTION_DAYS if retention_days is None else retention_days
+        now = datetime.now(timezone.utc)
+        compact_before = (now - timedelta(days=compact_days)).isoformat()
+        retain_after = (now - timedelta(days=retention_days)).isoformat() if retention_days > 0 else None
+        st = {"scanned": 0, "redundant": 0, "expired": 0, "deleted": 0}
+        last: Dict[str, Tuple[Any, ...]] = {}
+        pending: List[Any] = []
+
+        def _flush() -> None:
+            if not pending:
+                return
+            if not dry_run:
+                ids = list(pending)
+                self.client.table("match_state_history").delete().in_("id", ids).execute()
+            st["deleted"] += len(pending)
+            pending.clear()
+
+        for r in self.scan(
+            "match_state_history",
+            f"id,match_id,status,status_type,home_score,away_score,{ts_col}",
+            order_by=(ts_col, "id"),
+            where=lambda q: q.lt(ts_col, compact_before),
+        ):
+            st["scanned"] += 1
+            if retain_after and str(r.get(ts_col) or "") < retain_after:
+                st["expired"] += 1
+                pending.append(r["id"])
+            else:
+                sig = self._state_sig(r)
+                if last.get(r.get("match_id")) == sig:
+                    st["redundant"] += 1
+                    pending.append(r["id"])
+                else:
+                    last[r.get("match_id")] = sig
+            if len(pending) >= batch:
+                _flush()
+            if st["scanned"] % 10000 == 0:
+                logger.info(f"core.database | [history compact] {st}")
+        _flush()
+        logger.info(f"core.database | [history compact] done dry_run={dry_run} {st}")
+        return st
+
     # -------------------- matches (batch) --------------------
 
     def _patch_match(self, row: Dict[str, Any]) -> None:
@@ -1280,6 +2378,7 @@ class DatabaseClient:
         raise ValueError("Cannot PATCH match without (source,source_event_id) or id")
 
     def batch_upsert_matches(self, matches: List[Dict[str, Any]], batch_size: int = 50) -> Tuple[int, int]:
+        """Upsert match rows in adaptively sized batches (batch_size = initial size on first call)."""
         if not matches:
             return (0, 0)
 
@@ -1310,19 +2409,49 @@ class DatabaseClient:
                 pass
         rows = filtered
 
-        group_src = [m for m in rows if m.get("source") and m.get("source_event_id") is not None]
-        group_id  = [m for m in rows if m not in group_src and m.get("id")]
-        group_plain = [m for m in rows if m not in group_src and m not in group_id]
+        # single pass partition (list membership on dicts was O(n^2))
+        group_src: List[Dict[str, Any]] = []
+        group_id: List[Dict[str, Any]] = []
+        group_plain: List[Dict[str, Any]] = []
+        for m in rows:
+            if m.get("source") and m.get("source_event_id") is not None:
+                group_src.append(m)
+            elif m.get("id"):
+                group_id.append(m)
+            else:
+                group_plain.append(m)
 
         total_ok, total_fail = 0, 0
+        if self._match_batcher is None:
+            self._match_batcher = AdaptiveBatchSizer(
+                batch_size, config.DB_BATCH_MIN, config.DB_BATCH_MAX,
+                config.DB_BATCH_TARGET_SECONDS, config.DB_BATCH_MAX_BYTES,
+            )
+        sizer = self._match_batcher
 
         def _run_group(chunk_rows: List[Dict[str, Any]], on_conflict: Optional[str]) -> Tuple[int, int]:
             ok = fail = 0
             if not chunk_rows:
                 return (0, 0)
-            total_batches = (len(chunk_rows) + batch_size - 1) // batch_size
-            for i in range(0, len(chunk_rows), batch_size):
-                batch = chunk_rows[i:i+batch_size]
+
+            def _send(part: List[Dict[str, Any]]) -> None:
+                if on_conflict:
+                    self._upsert("matches", part, on_conflict=on_conflict, raise_errors=True)
+                    return
+                try:
+                    self.client.table("matches").insert(part).execute()
+                except Exception:
+                    if len(part) != 1:
+                        raise
+                    self._patch_match(part[0])
+
+            i = 0
+            batch_no = 0
+            while i < len(chunk_rows):
+                size = sizer.next_size(chunk_rows, i)
+                batch = chunk_rows[i:i+size]
+                i += len(batch)
+                batch_no += 1
 
                 # intra-batch dedupe na ključu upserta
                 if on_conflict == "source,source_event_id":
@@ -1341,36 +2470,30 @@ class DatabaseClient:
                     batch = list(tmp2.values())
 
                 for attempt in range(3):
+                    t0 = time.time()
                     try:
-                        if on_conflict:
-                            self._upsert("matches", batch, on_conflict=on_conflict)
-                        else:
-                            self.client.table("matches").insert(batch).execute()
+                        _send(batch)
+                        elapsed = time.time() - t0
+                        sizer.observe(batch, elapsed)
                         ok += len(batch)
-                        logger.info(f"core.database | ✅ matches batch {i//batch_size+1}/{total_batches}: {len(batch)}")
+                        logger.info(
+                            "core.database | ✅ matches batch %s: %s in %.2fs remaining=%s next_size=%s",
+                            batch_no, len(batch), elapsed, len(chunk_rows) - i, sizer.size,
+                            extra=log_extra("database.matches_batch", rows=len(batch), seconds=round(elapsed, 3)),
+                        )
                         break
                     except Exception as e:
                         msg = str(e)
-                        logger.error(f"core.database | ❌ matches batch {i//batch_size+1} attempt {attempt+1}: {msg}")
-                        if attempt < 2:
+                        sizer.observe(batch, time.time() - t0, ok=False)
+                        logger.error(f"core.database | ❌ matches batch {batch_no} attempt {attempt+1}: {msg}")
+                        if attempt < 2 and is_transient_error(e):
                             time.sleep((attempt+1) * 2)
-                        else:
-                            # fallback: pojedinačno
-                            for m in batch:
-                                try:
-                                    if on_conflict:
-                                        self._upsert("matches", m, on_conflict=on_conflict)
-                                    else:
-                                        try:
-                                            self.client.table("matches").insert(m).execute()
-                                        except Exception:
-                                            self._patch_match(m)
-                                    ok += 1
-                                except Exception as ee:
-                                    fail += 1
-                                    logger.error(f"core.database | match fail: {m.get('home_team')} vs {m.get('away_team')}: {ee}")
-                if i + batch_size < len(chunk_rows):
-                    time.sleep(0.2)
+                            continue
+                        # row-level error (ili zadnji pokušaj): binary split izolira loše redove
+                        s_ok, s_fail = self._retry_split("matches", _send, batch, e)
+                        ok += s_ok
+                        fail += s_fail
+                        break
             return (ok, fail)
 
         ok, fail = _run_group(group_src, "source,source_event_id")
@@ -1382,28 +2505,50 @@ class DatabaseClient:
 
         rate = (total_ok / len(rows) * 100.0) if rows else 0.0
         logger.info(f"core.database | matches upsert done: total={len(rows)} ok={total_ok} fail={total_fail} rate={rate:.1f}%")
-        # Post-upsert verification: count + sample
-        try:
-            cnt = self.table_count("matches")
-            if cnt == 0 and total_ok > 0:
-                logger.warning("core.database | matches verify count=0 BUT ok>0 (check SUPABASE_URL / RLS / replica lag)")
-            else:
-                logger.info(f"core.database | matches verify count={cnt}")
-            # Fetch tiny sample
-            try:
-                res = (self.client.table("matches")
-                       .select("id,home_team,away_team,status,start_time")
-                       .limit(2)
-                       .execute())
-                logger.info(f"core.database | matches sample={res.data}")
-            except Exception as exs:
-                logger.debug(f"core.database | matches sample fetch fail: {exs}")
-        except Exception:
-            pass
+        # Post-upsert verification (policy-gated): targeted read-back of keys just written
+        if total_ok and group_src:
+            src0 = group_src[0]["source"]
+            self.verify_written(
+                "matches", "source_event_id",
+                (int(m["source_event_id"]) for m in group_src if m["source"] == src0),
+                select="id,source_event_id,home_team,away_team,status,start_time",
+                eq={"source": src0},
+            )
+        elif total_ok and group_id:
+            self.verify_written(
+                "matches", "id", (m["id"] for m in group_id),
+                select="id,home_team,away_team,status,start_time",
+            )
         return (total_ok, total_fail)
 
     # -------------------- maintenance --------------------
 
+    def delete_ids(self, table: str, ids: Iterable[Any], *, id_col: str = "id", batch_size: int = 200) -> int:
+        """Batched `DELETE … WHERE id_col IN (…)`; returns rows deleted.
+
+        A failing batch is binary-split (_retry_split) so one undeletable id (e.g. FK
+        reference) doesn't keep the rest; those ids are quarantined under `<table>_delete`.
+        Transient errors are re-raised like on the write path.
+        """
+        rows = [{id_col: i} for i in ids if i is not None]
+
+        def _send(part: List[Dict[str, Any]]) -> None:
+            self.client.table(table).delete().in_(id_col, [r[id_col] for r in part]).execute()
+
+        deleted = 0
+        for i in range(0, len(rows), max(1, batch_size)):
+            chunk = rows[i:i + batch_size]
+            try:
+                _send(chunk)
+                deleted += len(chunk)
+            except Exception as e:
+                if is_transient_error(e):
+                    raise
+                logger.warning(f"core.database | {table} delete of {len(chunk)} ids failed ({e}); splitting")
+                ok, _bad = self._retry_split(f"{table}_delete", _send, chunk, e)
+                deleted += ok
+        return deleted
+
     def cleanup_zombie_matches(self, hours_old: int = 3) -> int:
         try:
             now = datetime.now(timezone.utc)
@@ -0,0 +1,250 @@
+# scraper/core/pg_bulk.py
+"""
+Direct Postgres bulk-load client for historical backfills.
+
+PgBulkClient is a DatabaseClient whose write transport is COPY instead of PostgREST JSON:
+every upsert batch is COPY'd into a per-table TEMP staging table and merged into the real
+table with one set-based `INSERT … SELECT DISTINCT ON (key) … ON CONFLICT (key) DO UPDATE`,
+using the same conflict keys as the REST path. Row cleaning/dedupe/mapping logic of
+DatabaseClient is reused unchanged; id lookups go over the same connection.
+
+Usage (DSN = Supabase "direct connection" string or a local Postgres):
+    from core.pg_bulk import PgBulkClient
+    sink = PgBulkClient("postgresql://postgres:pw@localhost:5432/postgres")
+    store_bundle(bundle, sink=sink)
+    sink.log_throughput()
+
+Needs psycopg (3) or psycopg2; neither is imported unless this client is constructed.
+"""
+from __future__ import annotations
+
+import json
+import threading
+import time
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from .config import config
+from .database import DatabaseClient
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def _connect(dsn: str):
+    try:
+        import psycopg  # type: ignore
+        conn = psycopg.connect(dsn, autocommit=False)
+        return conn, 3
+    except ImportError:
+        pass
+    try:
+        import psycopg2  # type: ignore
+        conn = psycopg2.connect(dsn)
+        return conn, 2
+    except ImportError:
+        raise RuntimeError("PgBulkClient needs 'psycopg' or 'psycopg2' (pip install psycopg[binary])")
+
+
+def _ident(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _copy_value(v: Any) -> str:
+    """Encode one value for COPY … (FORMAT text)."""
+    if v is None:
+        return "\\N"
+    if isinstance(v, bool):
+        return "t" if v else "f"
+    if isinstance(v, (dict, list)):
+        v = json.dumps(v, ensure_ascii=False, separators=(",", ":"))
+    elif isinstance(v, (datetime, date)):
+        v = v.isoformat()
+    else:
+        v = str(v)
+    return (
+        v.replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+    )
+
+
+def encode_copy_rows(rows: List[Dict[str, Any]], cols: List[str]) -> str:
+    """Rows -> COPY text payload; the last column is the staging ordinal (for last-wins dedupe)."""
+    out = []
+    for i, r in enumerate(rows):
+        out.append("\t".join([_copy_value(r.get(c)) for c in cols] + [str(i)]))
+    return "\n".join(out) + "\n" if out else ""
+
+
+def merge_sql(table: str, stage: str, cols: List[str], key_cols: List[str], ignore_duplicates: bool) -> str:
+    """Set-based merge staging -> table keeping the last staged row per conflict key."""
+    col_list = ", ".join(_ident(c) for c in cols)
+    key_list = ", ".join(_ident(c) for c in key_cols)
+    upd = [c for c in cols if c not in key_cols]
+    if ignore_duplicates or not upd:
+        action = "DO NOTHING"
+    else:
+        action = "DO UPDATE SET " + ", ".join(f"{_ident(c)} = EXCLUDED.{_ident(c)}" for c in upd)
+    return (
+        f"INSERT INTO {_ident(table)} ({col_list}) "
+        f"SELECT DISTINCT ON ({key_list}) {col_list} FROM {_ident(stage)} "
+        f"ORDER BY {key_list}, _stg_ord DESC "
+        f"ON CONFLICT ({key_list}) {action}"
+    )
+
+
+class PgBulkClient(DatabaseClient):
+    """DatabaseClient that writes via COPY + set-based merge on a direct Postgres connection."""
+
+    def __init__(self, dsn: str):
+        super().__init__()
+        self.dsn = dsn
+        self._conn, self._driver = _connect(dsn)
+        self._lock = threading.Lock()
+        self._staged: set[str] = set()
+        # backfill rows are mostly new; per-key change hashes would only cost memory
+        self._changes = None
+        self._throughput: Dict[str, List[float]] = {}  # table -> [rows, seconds]
+        logger.info(f"core.pg_bulk | ✅ direct Postgres ready (psycopg{self._driver})")
+
+    def close(self) -> None:
+        try:
+            self._conn.close()
+        except Exception:
+            pass
+
+    # ---------------- write transport ----------------
+
+    def _ensure_stage(self, cur, table: str) -> str:
+        stage = f"_stg_{table}"
+        if stage not in self._staged:
+            cur.execute(
+                f"CREATE TEMP TABLE IF NOT EXISTS {_ident(stage)} "
+                f"(LIKE {_ident(table)} INCLUDING DEFAULTS) ON COMMIT DELETE ROWS"
+            )
+            cur.execute(f"ALTER TABLE {_ident(stage)} ADD COLUMN IF NOT EXISTS _stg_ord bigint")
+            self._staged.add(stage)
+        return stage
+
+    def _copy(self, cur, stage: str, cols: List[str], data: str) -> None:
+        sql = f"COPY {_ident(stage)} ({', '.join(_ident(c) for c in cols)}, _stg_ord) FROM STDIN"
+        if self._driver == 3:
+            with cur.copy(sql) as cp:
+                cp.write(data)
+        else:
+            import io
+            cur.copy_expert(sql, io.StringIO(data))
+
+    def _send_upsert(
+        self,
+        table: str,
+        rows: List[Dict[str, Any]],
+        on_conflict: str,
+        ignore_duplicates: Optional[bool] = None,
+    ) -> int:
+        if not rows:
+            return 0
+        key_cols = [c.strip() for c in on_conflict.split(",") if c.strip()]
+        # one COPY+merge per distinct column set: a missing key must not become NULL in the table
+        groups: Dict[Tuple[str, ...], List[Dict[str, Any]]] = {}
+        for r in rows:
+            groups.setdefault(tuple(r.keys()), []).append(r)
+        t0 = time.time()
+        n = 0
+        with self._lock:
+            try:
+                with self._conn.cursor() as cur:
+                    stage = self._ensure_stage(cur, table)
+                    for cols_t, part in groups.items():
+                        cols = list(cols_t)
+                        self._copy(cur, stage, cols, encode_copy_rows(part, cols))
+                        cur.execute(merge_sql(table, stage, cols, key_cols, bool(ignore_duplicates)))
+                        n += cur.rowcount if cur.rowcount is not None and cur.rowcount >= 0 else len(part)
+                        cur.execute(f"TRUNCATE {_ident(stage)}")
+                self._conn.commit()
+            except Exception:
+                self._conn.rollback()
+                self._staged.discard(f"_stg_{table}")  # CREATE TEMP may have been rolled back too
+                raise
+        tp = self._throughput.setdefault(table, [0.0, 0.0])
+        tp[0] += len(rows)
+        tp[1] += time.time() - t0
+        self.metrics.record(table, "copy_merge", time.time() - t0, rows=n)
+        return n
+
+    def log_throughput(self) -> Dict[str, Dict[str, float]]:
+        """Log + reset rows/s per table for this client."""
+        out: Dict[str, Dict[str, float]] = {}
+        for table, (rows, secs) in sorted(self._throughput.items()):
+            rps = rows / secs if secs > 0 else 0.0
+            out[table] = {"rows": int(rows), "seconds": round(secs, 3), "rows_per_s": round(rps, 1)}
+            logger.info(f"core.pg_bulk | [bulk] table={table} rows={int(rows)} secs={secs:.2f} rows/s={rps:.0f}")
+        self._throughput.clear()
+        return out
+
+    # ---------------- lookups over the same connection ----------------
+
+    def _query(self, sql: str, params: Tuple[Any, ...]) -> List[Tuple[Any, ...]]:
+        t0 = time.time()
+        with self._lock:
+            try:
+                with self._conn.cursor() as cur:
+                    cur.execute(sql, params)
+                    res = cur.fetchall()
+                self._conn.commit()
+                self.metrics.record("sql", "select", time.time() - t0, rows=len(res))
+                return res
+            except Exception:
+                self._conn.rollback()
+                raise
+
+    def _map_generic(self, table: str, key_col: str, ids: Iterable[int]) -> Dict[int, str]:
+        vals = sorted({int(x) for x in ids if x is not None})
+        if not vals:
+            return {}
+        rows = self._query(
+            f"SELECT id, {_ident(key_col)} FROM {_ident(table)} WHERE {_ident(key_col)} = ANY(%s)",
+            (vals,),
+        )
+        return {int(k): str(i) for i, k in rows}
+
+    def get_match_ids_by_source_ids(self, pairs: Iterable[Tuple[str, Any]]) -> Dict[Tuple[str, int], str]:
+        by_source: Dict[str, set] = {}
+        for src, sid in pairs or []:
+            try:
+                if src and sid is not None:
+                    by_source.setdefault(src, set()).add(int(sid))
+            except Exception:
+                continue
+        out: Dict[Tuple[str, int], str] = {}
+        for src, ids in by_source.items():
+            rows = self._query(
+                "SELECT id, source_event_id FROM matches WHERE source = %s AND source_event_id = ANY(%s)",
+                (src, sorted(ids)),
+            )
+            for i, sid in rows:
+                out[(src, int(sid))] = str(i)
+        logger.info(
+            f"core.pg_bulk | [matches map] asked={sum(len(v) for v in by_source.values())} -> mapped={len(out)}"
+        )
+        return out
+
+    def verify_written(self, table: str, key_col: str, keys: Iterable[Any], **kwargs) -> Optional[int]:
+        # COPY+merge is transactional; the REST read-back would only add latency here
+        return None
+
+    def run_parallel(self, tasks: Dict[str, Callable[[], Any]]) -> Dict[str, Any]:
+        # one connection, every statement under self._lock -> pooled REST clients would
+        # only add setup; run inline, same result contract as DatabaseClient.run_parallel
+        out: Dict[str, Any] = {}
+        for name, fn in tasks.items():
+            try:
+                out[name] = fn()
+            except Exception as e:
+                out[name] = e
+        return out
+
+
+def bulk_client_from_env() -> Optional[PgBulkClient]:
+    """PgBulkClient for PG_BULK_DSN, or None when unset."""
+    dsn = config.PG_BULK_DSN
+    return PgBulkClient(dsn) if dsn else None
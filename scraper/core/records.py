@@ -0,0 +1,226 @@
+# scraper/core/records.py
+"""
+Compact row types for the hot bundle entities (lineups, events, player_stats, shots,
+average_positions).
+
+A bundle holds thousands of these rows; as plain dicts every row carries its own hash
+table and key pointers. Record subclasses keep known columns in __slots__ and behave as
+a mutable mapping, so processors, store_bundle and the fetch loop keep using r.get(...),
+r[k] = v, dict(r) and r.items() unchanged. An unset slot is an *absent* key (not None):
+player_stats relies on that to avoid overwriting stored values with NULLs. Keys outside
+the slot set (debug markers etc.) go to a small per-row overflow dict.
+
+At the DB boundary _clean_rows consumes records directly (items() -> plain dict payload).
+"""
+from __future__ import annotations
+
+from collections.abc import MutableMapping
+from operator import attrgetter
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+
+class _Unset:
+    __slots__ = ()
+
+    def __repr__(self) -> str:
+        return "<unset>"
+
+
+_UNSET: Any = _Unset()
+
+
+class Record:
+    """Slotted, dict-compatible row. Subclasses declare their columns in __slots__."""
+
+    __slots__ = ("_extra",)
+    _fields: Tuple[str, ...] = ()
+    _field_set: frozenset = frozenset()
+    _values = staticmethod(lambda r: ())
+
+    def __init_subclass__(cls, **kw):
+        super().__init_subclass__(**kw)
+        fields: Tuple[str, ...] = ()
+        for klass in reversed(cls.__mro__):
+            fields += tuple(s for s in klass.__dict__.get("__slots__", ()) if s != "_extra")
+        cls._fields = fields
+        cls._field_set = frozenset(fields)
+        getter = attrgetter(*fields) if fields else (lambda r: ())
+        # attrgetter returns a bare value (not a tuple) for a single field
+        cls._values = staticmethod(getter if len(fields) > 1 else (lambda r: (getter(r),)))
+
+    def __init__(self, **values: Any):
+        setter = object.__setattr__
+        for f in self._fields:
+            setter(self, f, _UNSET)
+        self._extra: Optional[Dict[str, Any]] = None
+        for k, v in values.items():
+            self[k] = v
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "Record":
+        return cls(**d)
+
+    # ---------------- mapping protocol ----------------
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self._field_set:
+            v = getattr(self, key)
+            if v is not _UNSET:
+                return v
+        elif self._extra and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        if key in self._field_set:
+            object.__setattr__(self, key, value)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def __delitem__(self, key: str) -> None:
+        if key in self._field_set:
+            if getattr(self, key) is _UNSET:
+                raise KeyError(key)
+            object.__setattr__(self, key, _UNSET)
+        elif self._extra and key in self._extra:
+            del self._extra[key]
+            if not self._extra:
+                self._extra = None
+        else:
+            raise KeyError(key)
+
+    def __contains__(self, key: object) -> bool:
+        if key in self._field_set:
+            return getattr(self, key) is not _UNSET  # type: ignore[arg-type]
+        return bool(self._extra) and key in self._extra  # type: ignore[operator]
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key in self._field_set:
+            v = getattr(self, key)
+            return default if v is _UNSET else v
+        if self._extra:
+            return self._extra.get(key, default)
+        return default
+
+    def items(self) -> List[Tuple[str, Any]]:
+        out = [(k, v) for k, v in zip(self._fields, self._values(self)) if v is not _UNSET]
+        if self._extra:
+            out.extend(self._extra.items())
+        return out
+
+    def keys(self) -> List[str]:
+        return [k for k, _ in self.items()]
+
+    def values(self) -> List[Any]:
+        return [v for _, v in self.items()]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.keys())
+
+    def __len__(self) -> int:
+        n = sum(1 for v in self._values(self) if v is not _UNSET)
+        return n + (len(self._extra) if self._extra else 0)
+
+    def setdefault(self, key: str, default: Any = None) -> Any:
+        if key in self:
+            return self[key]
+        self[key] = default
+        return default
+
+    def pop(self, key: str, *default: Any) -> Any:
+        if key in self:
+            v = self[key]
+            del self[key]
+            return v
+        if default:
+            return default[0]
+        raise KeyError(key)
+
+    def update(self, other: Any = (), **kw: Any) -> None:
+        items = other.items() if hasattr(other, "items") else other
+        for k, v in items:
+            self[k] = v
+        for k, v in kw.items():
+            self[k] = v
+
+    def copy(self) -> "Record":
+        return type(self)(**dict(self.items()))
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Plain dict (upsert payload / JSON)."""
+        return dict(self.items())
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, (Record, dict)):
+            return self.to_dict() == dict(other.items())
+        return NotImplemented
+
+    __hash__ = None  # type: ignore[assignment]  # mutable, like dict
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+    def __getstate__(self):
+        return self.to_dict()
+
+    def __setstate__(self, state):
+        type(self).__init__(self, **state)
+
+
+MutableMapping.register(Record)
+
+
+class LineupRow(Record):
+    __slots__ = (
+        "source", "source_event_id", "team_sofascore_id", "player_sofascore_id",
+        "jersey_number", "position", "is_starting", "is_captain",
+        "_subbed_in_time", "_subbed_out_time",
+        "match_id", "team_id", "player_id",
+    )
+
+
+class EventRow(Record):
+    __slots__ = (
+        "source", "source_event_id", "minute", "event_type", "team", "player_name",
+        "player_sofascore_id", "assist_player_sofascore_id",
+        "player_in_sofascore_id", "player_out_sofascore_id", "description",
+        "match_id",
+    )
+
+
+class PlayerStatRow(Record):
+    __slots__ = (
+        "source", "source_event_id", "team", "player_sofascore_id", "team_sofascore_id",
+        "goals", "assists", "passes", "tackles", "shots_total", "shots_on_target",
+        "minutes_played", "touches", "rating",
+        "was_subbed_in", "was_subbed_out", "is_substitute",
+        "match_id", "player_id", "team_id",
+    )
+
+
+class ShotRow(Record):
+    __slots__ = (
+        "source", "source_event_id", "player_sofascore_id", "assist_player_sofascore_id",
+        "minute", "x", "y", "xg", "body_part", "situation", "is_penalty", "is_own_goal",
+        "outcome", "team", "isHome", "source_item_id",
+        "match_id", "player_id", "team_id",
+    )
+
+
+class AvgPositionRow(Record):
+    __slots__ = (
+        "source", "source_event_id", "player_sofascore_id", "avg_x", "avg_y", "side",
+        "match_id", "player_id", "team_id",
+    )
+
+
+def json_default(o: Any) -> Any:
+    """json.dumps default= hook: records as plain dicts, columnar tables as row lists,
+    everything else via str()."""
+    if isinstance(o, Record):
+        return o.to_dict()
+    if hasattr(o, "to_rows"):  # core.columnar.ColumnarTable
+        return o.to_rows()
+    return str(o)
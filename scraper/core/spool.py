@@ -0,0 +1,274 @@
+# scraper/core/spool.py
+"""
+Durable local spool for processed bundles.
+
+When the database is down or slow the fetch loop appends the bundle here instead of
+dropping the cycle; a background drainer replays records in order once writes succeed.
+
+On-disk format: append-only segment files `<seq:08d>.seg`, one record per line:
+    <crc32 hex8> <json>\n
+The checksum covers the JSON bytes; a corrupt line is skipped and logged. A torn tail
+(crash mid-write) is truncated when the spool is opened and before every append, so new
+records never get glued onto a partial line. `cursor.json` stores (segment, byte offset)
+of the next record to replay plus how often that record was rejected, so a restart resumes
+where the drainer stopped. A record rejected `max_attempts` times is moved to
+`dead/<segment>.seg` (same format) and the cursor advances past it, so one bad bundle
+cannot hold back the ones behind it. Fully drained segments are deleted.
+"""
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from .config import config
+from .records import json_default
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class BundleSpool:
+    """Append-only segmented spool with per-record CRC32 and a persisted replay cursor."""
+
+    def __init__(self, directory: str, segment_bytes: int = 8 * 1024 * 1024, max_attempts: int = 5):
+        self.dir = Path(directory)
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self.segment_bytes = max(1024, segment_bytes)
+        self.max_attempts = max(1, max_attempts)
+        self._lock = threading.Lock()
+        self._cursor_path = self.dir / "cursor.json"
+        self._dead_dir = self.dir / "dead"
+        with self._lock:
+            self._repair_tail()
+
+    # ---------------- segments / cursor ----------------
+
+    def _segments(self) -> List[Path]:
+        return sorted(self.dir.glob("*.seg"))
+
+    def _load_cursor(self) -> Tuple[Optional[str], int]:
+        try:
+            c = json.loads(self._cursor_path.read_text(encoding="utf-8"))
+            return c.get("segment"), int(c.get("offset") or 0)
+        except Exception:
+            return None, 0
+
+    def _load_attempts(self, segment: str, offset: int) -> int:
+        """Rejections recorded for the record at (segment, offset); 0 if the cursor is elsewhere."""
+        try:
+            c = json.loads(self._cursor_path.read_text(encoding="utf-8"))
+            if c.get("segment") == segment and int(c.get("offset") or 0) == offset:
+                return int(c.get("attempts") or 0)
+        except Exception:
+            pass
+        return 0
+
+    def _save_cursor(self, segment: str, offset: int, attempts: int = 0) -> None:
+        tmp = self._cursor_path.with_suffix(".tmp")
+        state: Dict[str, Any] = {"segment": segment, "offset": offset}
+        if attempts:
+            state["attempts"] = attempts
+        tmp.write_text(json.dumps(state), encoding="utf-8")
+        os.replace(tmp, self._cursor_path)
+
+    def _repair_tail(self) -> None:
+        """Truncate a partial last line of the newest segment (caller holds the lock)."""
+        segs = self._segments()
+        if not segs:
+            return
+        seg = segs[-1]
+        size = seg.stat().st_size
+        if not size:
+            return
+        with open(seg, "r+b") as f:
+            f.seek(size - 1)
+            if f.read(1) == b"\n":
+                return
+            # scan back block-wise to the last complete record
+            pos, keep = size, 0
+            while pos > 0:
+                step = min(64 * 1024, pos)
+                pos -= step
+                f.seek(pos)
+                i = f.read(step).rfind(b"\n")
+                if i >= 0:
+                    keep = pos + i + 1
+                    break
+            f.truncate(keep)
+            f.flush()
+            os.fsync(f.fileno())
+        logger.warning(f"core.spool | ✂️ truncated torn tail of {seg.name}: {size - keep} bytes")
+
+    @staticmethod
+    def _encode(bundle: Dict[str, Any]) -> bytes:
+        body = json.dumps(bundle, ensure_ascii=False, default=json_default, separators=(",", ":")).encode("utf-8")
+        return f"{zlib.crc32(body):08x} ".encode("ascii") + body + b"\n"
+
+    # ---------------- write ----------------
+
+    def append(self, bundle: Dict[str, Any]) -> None:
+        """Durably append one bundle (flush + fsync before returning)."""
+        line = self._encode(bundle)
+        with self._lock:
+            self._repair_tail()
+            segs = self._segments()
+            seg = segs[-1] if segs else None
+            if seg is None or seg.stat().st_size + len(line) > self.segment_bytes and seg.stat().st_size > 0:
+                nxt = int(seg.stem) + 1 if seg is not None else 1
+                seg = self.dir / f"{nxt:08d}.seg"
+            with open(seg, "ab") as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+        logger.info(f"core.spool | 📥 spooled bundle bytes={len(line)} segment={seg.name}")
+
+    # ---------------- read ----------------
+
+    def pending(self) -> bool:
+        """True if any record has not been replayed yet."""
+        with self._lock:
+            segs = self._segments()
+            if not segs:
+                return False
+            cur_seg, cur_off = self._load_cursor()
+            if cur_seg is None or cur_seg < segs[0].name:
+                return True
+            if len(segs) > 1 or cur_seg != segs[-1].name:
+                return True
+            return segs[-1].stat().st_size > cur_off
+
+    def _records(self) -> Iterator[Tuple[str, int, int, Optional[Dict[str, Any]]]]:
+        """Yield (segment, offset, next_offset, bundle|None) from the cursor on; None = corrupt record."""
+        cur_seg, cur_off = self._load_cursor()
+        segs = self._segments()
+        for seg in segs:
+            if cur_seg is not None and seg.name < cur_seg:
+                continue
+            start = cur_off if seg.name == cur_seg else 0
+            with open(seg, "rb") as f:
+                f.seek(start)
+                for line in f:
+                    offset, start = start, start + len(line)
+                    if not line.endswith(b"\n"):
+                        if seg == segs[-1]:
+                            return  # writer may still be appending (a crash tail is repaired on open)
+                        logger.error(f"core.spool | ❌ torn record in {seg.name} @ {offset}, skipping rest of segment")
+                        yield seg.name, offset, start, None
+                        break
+                    crc, _, body = line[:-1].partition(b" ")
+                    try:
+                        if int(crc, 16) != zlib.crc32(body):
+                            raise ValueError("checksum mismatch")
+                        yield seg.name, offset, start, json.loads(body)
+                    except Exception as e:
+                        logger.error(f"core.spool | ❌ corrupt record in {seg.name} @ {offset}: {e}")
+                        yield seg.name, offset, start, None
+
+    def _dead_letter(self, segment: str, offset: int, bundle: Dict[str, Any]) -> None:
+        """Move a repeatedly rejected record to dead/<segment> (same format, fsynced)."""
+        self._dead_dir.mkdir(parents=True, exist_ok=True)
+        with open(self._dead_dir / segment, "ab") as f:
+            f.write(self._encode(bundle))
+            f.flush()
+            os.fsync(f.fileno())
+        logger.error(
+            f"core.spool | ☠️ bundle from {segment} @ {offset} rejected {self.max_attempts}x, moved to {self._dead_dir / segment}"
+        )
+
+    def replay(self, handler: Callable[[Dict[str, Any]], bool], limit: Optional[int] = None) -> Tuple[int, bool]:
+        """Feed records to `handler` in order, advancing the cursor after each success.
+
+        The handler returns True (written), False (rejected) or raises (DB unavailable).
+        Both stop the replay so order is preserved; a raise is retried indefinitely, a
+        rejection counts toward max_attempts, after which the record is dead-lettered and
+        the cursor moves on. Returns (replayed, drained).
+        """
+        done = 0
+        for seg, offset, nxt, bundle in self._records():
+            if bundle is not None:
+                try:
+                    accepted = handler(bundle)
+                except Exception as e:
+                    logger.warning(f"core.spool | replay failed, will retry: {e}")
+                    return done, False
+                if accepted:
+                    done += 1
+                else:
+                    attempts = self._load_attempts(seg, offset) + 1
+                    if attempts < self.max_attempts:
+                        with self._lock:
+                            self._save_cursor(seg, offset, attempts)
+                        logger.warning(f"core.spool | bundle rejected ({attempts}/{self.max_attempts}) {seg} @ {offset}")
+                        return done, False
+                    self._dead_letter(seg, offset, bundle)
+            with self._lock:
+                self._save_cursor(seg, nxt)
+                self._gc()
+            if limit is not None and done >= limit:
+                break
+        return done, not self.pending()
+
+    def _gc(self) -> None:
+        """Delete segments entirely before the cursor."""
+        cur_seg, _ = self._load_cursor()
+        if cur_seg is None:
+            return
+        for seg in self._segments():
+            if seg.name < cur_seg:
+                try:
+                    seg.unlink()
+                except Exception:
+                    pass
+
+
+class SpoolDrainer:
+    """Background thread that replays the spool through `writer(bundle) -> bool`."""
+
+    def __init__(self, spool: BundleSpool, writer: Callable[[Dict[str, Any]], bool], interval: float = 15.0):
+        self.spool = spool
+        self.writer = writer
+        self.interval = interval
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="spool-drainer", daemon=True)
+        self._thread.start()
+
+    def wake(self) -> None:
+        self._wake.set()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def _run(self) -> None:
+        backoff = self.interval
+        while not self._stop.is_set():
+            if self.spool.pending():
+                n, drained = self.spool.replay(self.writer)
+                if n:
+                    logger.info(f"core.spool | 📤 replayed {n} bundles drained={drained}")
+                backoff = self.interval if drained or n else min(backoff * 2, 300.0)
+            else:
+                backoff = self.interval
+            self._wake.wait(backoff)
+            self._wake.clear()
+
+
+def get_spool() -> Optional[BundleSpool]:
+    """Spool configured via SPOOL_* settings, or None when disabled."""
+    if not config.SPOOL_ENABLED:
+        return None
+    return BundleSpool(config.SPOOL_DIR, config.SPOOL_SEGMENT_BYTES, config.SPOOL_MAX_ATTEMPTS)
@@ -13,9 +13,13 @@ ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 sys.path.insert(0, ROOT)
 sys.path.insert(0, os.path.join(ROOT, "scraper"))
 
-from core.database import db
+from core.database import db, is_transient_error
+from core.config import config
+from core.spool import SpoolDrainer, get_spool
 from core.browser import Browser
-from utils.logger import get_logger
+from utils import enable_file_logging
+from utils.logger import get_logger, log_extra
+from utils.timeconv import to_iso
 from processors import MatchProcessor, stats_processor
 from processors.stats_processor import build_player_stats_fallback
 
@@ -30,6 +34,13 @@ class FetchLoop:
     def __init__(self, max_events: int = 50):
         self.max_events = max_events
         self.browser: Optional[Browser] = None
+        # DB degraded -> bundles go to the local spool, drainer replays them in order
+        self._spool = get_spool()
+        self._drainer: Optional[SpoolDrainer] = None
+        self._spool_until = 0.0
+        if self._spool is not None:
+            self._drainer = SpoolDrainer(self._spool, self._replay_bundle, config.SPOOL_DRAIN_INTERVAL)
+            self._drainer.start()
 
     async def run_cycle(self) -> Dict[str, Any]:
         start = time.time()
@@ -188,25 +199,7 @@ class FetchLoop:
                 comp = (ev.get("tournament") or {}).get("name") or (ev.get("competition") or {}).get("name")
                 # Start time (timestamp variants)
                 ts_val = ev.get("startTimeUTC") or ev.get("startTime") or ev.get("startTimestamp")
-                start_iso = None
-                if ts_val is not None:
-                    try:
-                        if isinstance(ts_val, (int,float)):
-                            if ts_val > 10**12:
-                                ts_val = ts_val/1000.0
-                            start_iso = datetime.utcfromtimestamp(ts_val).replace(tzinfo=timezone.utc).isoformat()
-                        elif isinstance(ts_val, str):
-                            # Try ISO parse; fallback numeric string -> epoch
-                            try:
-                                start_iso = datetime.fromisoformat(ts_val.replace("Z","+00:00")).astimezone(timezone.utc).isoformat()
-                            except Exception:
-                                if ts_val.isdigit():
-                                    ts = int(ts_val)
-                                    if ts > 10**12:
-                                        ts = ts/1000.0
-                                    start_iso = datetime.utcfromtimestamp(ts).replace(tzinfo=timezone.utc).isoformat()
-                    except Exception:
-                        start_iso = None
+                start_iso = to_iso(ts_val)
                 status_obj = ev.get("status") or {}
                 status_type = status_obj.get("type") or status_obj.get("description") or ev.get("statusType") or "scheduled"
                 status_type = str(status_type).lower()
@@ -379,18 +372,13 @@ class FetchLoop:
             try:
                 if os.getenv("LOG_GOAL_MISMATCH", "1").lower() in {"1","true","yes"}:
                     matches_by_id = { (m.get("source"), m.get("source_event_id")): m for m in bundle.get("matches", []) }
-                    # Group goal events per match
-                    goals_by_match: Dict[tuple, Dict[str,int]] = {}
-                    for ev in bundle.get("events", []):
-                        if ev.get("event_type") in {"goal","penalty_goal","own_goal"}:
-                            key = (ev.get("source"), ev.get("source_event_id"))
-                            if key not in goals_by_match:
-                                goals_by_match[key] = {"home":0,"away":0,"total":0}
-                            side = ev.get("team") or "?"
-                            if side in ("home","away"):
-                                goals_by_match[key][side] += 1
-                                goals_by_match[key]["total"] += 1
-                    for key, counts in goals_by_match.items():
+                    # Goal counts per match come precomputed from MatchProcessor (incident_facts) -> no events rescan
+                    for facts in bundle.get("incident_facts", []):
+                        counts = facts.get("goals") or {}
+                        total = (counts.get("home") or 0) + (counts.get("away") or 0)
+                        if not total:
+                            continue
+                        key = (facts.get("source"), facts.get("source_event_id"))
                         m = matches_by_id.get(key)
                         if not m:
                             continue
@@ -400,17 +388,11 @@ class FetchLoop:
                             continue
                         if hs != counts.get("home") or as_ != counts.get("away"):
                             logger.warning(
-                                f"[goal_mismatch] ev={key[1]} stored_score={hs}-{as_} counted_events={counts.get('home')}-{counts.get('away')} total_goal_events={counts.get('total')}"
+                                f"[goal_mismatch] ev={key[1]} stored_score={hs}-{as_} counted_events={counts.get('home')}-{counts.get('away')} total_goal_events={total}"
                             )
                             # Optional verbose dump for the suspicious match
                             if os.getenv("LOG_GOAL_MISMATCH_VERBOSE", "0").lower() in {"1","true","yes"}:
-                                sample = [
-                                    {
-                                        k: ev.get(k) for k in ("id","minute","event_type","player_sofascore_id","assist_player_sofascore_id","team")
-                                    }
-                                    for ev in bundle.get("events", []) if ev.get("source_event_id") == key[1] and ev.get("event_type") in {"goal","penalty_goal","own_goal"}
-                                ]
-                                logger.warning(f"[goal_mismatch_dump] ev={key[1]} events={sample}")
+                                logger.warning(f"[goal_mismatch_dump] ev={key[1]} events={facts.get('goal_events')}")
             except Exception as mx:
                 logger.debug(f"goal mismatch logging failed: {mx}")
             return bundle
@@ -418,38 +400,105 @@ class FetchLoop:
             import traceback
             logger.error(f"❌ Processing phase failed: {e}")
             logger.error(traceback.format_exc())
-            return {k: [] for k in ("competitions","teams","players","matches","lineups","formations","events","player_stats","match_stats")}
+            return {k: [] for k in ("competitions","teams","players","matches","lineups","formations","events","player_stats","match_stats","incident_facts")}
 
     async def _storage_phase(self, bundle: Dict[str, List[Dict[str, Any]]]) -> Dict[str, Any]:
         logger.info("💾 Phase 4: Storing in database...")
+        spool = self._spool
+        if spool is not None and (time.time() < self._spool_until or spool.pending()):
+            # older bundles still waiting (or DB marked slow) -> keep order, let the drainer write
+            spool.append(bundle)
+            if self._drainer:
+                self._drainer.wake()
+            logger.warning("📥 DB degraded, bundle spooled for background replay")
+            return {"spooled": True, "total_stored": 0}
+
+        t0 = time.time()
+        res = self._write_bundle(bundle)
+        elapsed = time.time() - t0
+        if spool is not None:
+            if self._storage_failed(res):
+                spool.append(bundle)
+                self._spool_until = time.time() + config.SPOOL_COOLDOWN_SECONDS
+                res["spooled"] = True
+                logger.warning(f"📥 Storage unavailable ({res['error']}), bundle spooled (cooldown {config.SPOOL_COOLDOWN_SECONDS:.0f}s)")
+            elif elapsed > config.SPOOL_LATENCY_SECONDS:
+                self._spool_until = time.time() + config.SPOOL_COOLDOWN_SECONDS
+                logger.warning(f"🐢 Storage took {elapsed:.1f}s, spooling next cycles for {config.SPOOL_COOLDOWN_SECONDS:.0f}s")
+        return res
+
+    @staticmethod
+    def _storage_failed(res: Dict[str, Any]) -> bool:
+        """True when the write stopped on a transient DB error (connection, timeout, 5xx).
+
+        Only then is the bundle spooled; upserts are idempotent, so tables that did make it
+        are simply rewritten on replay. Row-level failures are not: their rows were already
+        quarantined and a replay would fail the same way.
+        """
+        return bool(res.get("error")) and bool(res.get("transient"))
+
+    def _replay_bundle(self, bundle: Dict[str, List[Dict[str, Any]]]) -> bool:
+        """Drainer callback: True = written, False = rejected (counts toward SPOOL_MAX_ATTEMPTS),
+        raises while the DB is unavailable (retried without counting)."""
+        res = self._write_bundle(bundle)
+        if self._storage_failed(res):
+            raise RuntimeError(res["error"])
+        return not res.get("error")
+
+    @staticmethod
+    def _upsert_group(res: Dict[str, Any], jobs: Dict[str, Any]) -> None:
+        """Run independent table upserts on pooled clients; (ok, fail) per table lands in res.
+
+        The first exception is re-raised after every job has finished and been recorded.
+        """
+        jobs = {name: fn for name, fn in jobs.items() if fn is not None}
+        err: Optional[Exception] = None
+        for name, out in db.run_parallel(jobs).items():
+            if isinstance(out, Exception):
+                err = err or out
+                continue
+            ok, fail = out
+            res[name] = {"ok": ok, "fail": fail}
+            logger.info(f"✅ {name + ':':<14}ok={ok}, fail={fail}")
+        if err is not None:
+            raise err
+
+    @staticmethod
+    def _stored_total(res: Dict[str, Any]) -> int:
+        return sum(v["ok"] for v in res.values() if isinstance(v, dict) and "ok" in v and "fail" in v)
+
+    def _write_bundle(self, bundle: Dict[str, List[Dict[str, Any]]]) -> Dict[str, Any]:
         res: Dict[str, Any] = {}
-        total = 0
 
         try:
             comps = bundle.get("competitions", [])
-            if comps:
-                ok, fail = db.upsert_competitions(comps)
-                res["competitions"] = {"ok": ok, "fail": fail}; total += ok
-                logger.info(f"✅ competitions: ok={ok}, fail={fail}")
-
             teams = bundle.get("teams", [])
-            if teams:
-                ok, fail = db.upsert_teams(teams)
-                res["teams"] = {"ok": ok, "fail": fail}; total += ok
-                logger.info(f"✅ teams:        ok={ok}, fail={fail}")
+            # base entities do not reference each other -> one request each, concurrently
+            self._upsert_group(res, {
+                "competitions": (lambda: db.upsert_competitions(comps)) if comps else None,
+                "teams": (lambda: db.upsert_teams(teams)) if teams else None,
+            })
 
             # mappings
-            team_map = db.get_team_ids_by_sofa([t["sofascore_id"] for t in teams]) if teams else {}
-            comp_map: Dict[Any, Any] = {}
-            if comps:
+            def _comp_map() -> Dict[Any, Any]:
                 try:
                     client = getattr(db, "client", None)
                     if client:
                         ids = [c["sofascore_id"] for c in comps]
                         q = client.table("competitions").select("id,sofascore_id").in_("sofascore_id", ids).execute()
-                        comp_map = {r["sofascore_id"]: r["id"] for r in (q.data or [])}
+                        return {r["sofascore_id"]: r["id"] for r in (q.data or [])}
                 except Exception as e:
                     logger.warning(f"⚠️ competition mapping failed: {e}")
+                return {}
+
+            maps = db.run_parallel({
+                "team": lambda: db.get_team_ids_by_sofa([t["sofascore_id"] for t in teams]) if teams else {},
+                "comp": lambda: _comp_map() if comps else {},
+            })
+            for m_ in maps.values():
+                if isinstance(m_, Exception):
+                    raise m_
+            team_map, comp_map = maps["team"], maps["comp"]
 
             # players → team backfill: assign team_id to players based on lineups
             # Only run if we have both teams and players and at least one lineup
@@ -471,100 +520,86 @@ class FetchLoop:
                 except Exception as e:
                     logger.warning(f"⚠️ player team backfill failed: {e}")
 
-            # players must be inserted before matches so that we can map
-            # player_ids for lineups and statistics.  Upsert them here.
+            # players must be inserted before lineups / statistics so that we can map
+            # player_ids; matches only need the team / competition maps -> both together.
             players = bundle.get("players", [])
-            if players:
-                ok, fail = db.upsert_players(players)
-                res["players"] = {"ok": ok, "fail": fail}; total += ok
-                logger.info(f"✅ players:      ok={ok}, fail={fail}")
-
-            # matches
             matches = bundle.get("matches", [])
-            if matches:
-                for m in matches:
-                    if (cid := m.get("competition_sofascore_id")) in comp_map:
-                        m["competition_id"] = comp_map[cid]
-                    if (hs := m.get("home_team_sofascore_id")) in team_map:
-                        m["home_team_id"] = team_map[hs]
-                    if (as_ := m.get("away_team_sofascore_id")) in team_map:
-                        m["away_team_id"] = team_map[as_]
-                ok, fail = db.batch_upsert_matches(matches)
-                res["matches"] = {"ok": ok, "fail": fail}; total += ok
-                logger.info(f"✅ matches:      ok={ok}, fail={fail}")
-
-            # get match map for FKs
-            match_map = db.get_match_ids_by_source_ids(
-                [(m["source"], m["source_event_id"]) for m in matches if m.get("source") and m.get("source_event_id")]
-            ) if matches else {}
-            player_map = db.get_player_ids_by_sofa(
-                [p["sofascore_id"] for p in bundle.get("players", [])]
-            ) if bundle.get("players") else {}
-
-            # lineups
+            for m in matches:
+                if (cid := m.get("competition_sofascore_id")) in comp_map:
+                    m["competition_id"] = comp_map[cid]
+                if (hs := m.get("home_team_sofascore_id")) in team_map:
+                    m["home_team_id"] = team_map[hs]
+                if (as_ := m.get("away_team_sofascore_id")) in team_map:
+                    m["away_team_id"] = team_map[as_]
+            self._upsert_group(res, {
+                "players": (lambda: db.upsert_players(players)) if players else None,
+                "matches": (lambda: db.batch_upsert_matches(matches)) if matches else None,
+            })
+
+            # get match/player maps for FKs (independent -> parallel on pooled clients)
+            maps = db.run_parallel({
+                "match": lambda: db.get_match_ids_by_source_ids(
+                    [(m["source"], m["source_event_id"]) for m in matches if m.get("source") and m.get("source_event_id")]
+                ) if matches else {},
+                "player": lambda: db.get_player_ids_by_sofa(
+                    [p["sofascore_id"] for p in bundle.get("players", [])]
+                ) if bundle.get("players") else {},
+            })
+            for m_ in maps.values():
+                if isinstance(m_, Exception):
+                    raise m_
+            match_map, player_map = maps["match"], maps["player"]
+
+            # child tables only reference matches / players / teams -> map FKs, then upsert together
             lineups = bundle.get("lineups", [])
-            if lineups:
-                for r in lineups:
-                    tup = (r.get("source"), r.get("source_event_id"))
-                    if tup in match_map:
-                        r["match_id"] = match_map[tup]
-                    if (ts := r.get("team_sofascore_id")) in team_map:
-                        r["team_id"] = team_map[ts]
-                    if (ps := r.get("player_sofascore_id")) in player_map:
-                        r["player_id"] = player_map[ps]
-                ok, fail = db.upsert_lineups(lineups)
-                res["lineups"] = {"ok": ok, "fail": fail}; total += ok
-                logger.info(f"✅ lineups:      ok={ok}, fail={fail}")
+            for r in lineups:
+                tup = (r.get("source"), r.get("source_event_id"))
+                if tup in match_map:
+                    r["match_id"] = match_map[tup]
+                if (ts := r.get("team_sofascore_id")) in team_map:
+                    r["team_id"] = team_map[ts]
+                if (ps := r.get("player_sofascore_id")) in player_map:
+                    r["player_id"] = player_map[ps]
 
-            # formations
             forms = bundle.get("formations", [])
-            if forms:
-                for r in forms:
-                    tup = (r.get("source"), r.get("source_event_id"))
-                    if tup in match_map:
-                        r["match_id"] = match_map[tup]
-                    if (ts := r.get("team_sofascore_id")) in team_map:
-                        r["team_id"] = team_map[ts]
-                ok, fail = db.upsert_formations(forms)
-                res["formations"] = {"ok": ok, "fail": fail}; total += ok
-                logger.info(f"✅ formations:   ok={ok}, fail={fail}")
+            for r in forms:
+                tup = (r.get("source"), r.get("source_event_id"))
+                if tup in match_map:
+                    r["match_id"] = match_map[tup]
+                if (ts := r.get("team_sofascore_id")) in team_map:
+                    r["team_id"] = team_map[ts]
 
-            # events
             mev = bundle.get("events", [])
-            if mev:
-                for r in mev:
-                    tup = (r.get("source"), r.get("source_event_id"))
-                    if tup in match_map:
-                        r["match_id"] = match_map[tup]
-                ok, fail = db.upsert_match_events(mev)
-                res["events"] = {"ok": ok, "fail": fail}; total += ok
-                logger.info(f"✅ events:       ok={ok}, fail={fail}")
+            for r in mev:
+                tup = (r.get("source"), r.get("source_event_id"))
+                if tup in match_map:
+                    r["match_id"] = match_map[tup]
 
-            # player stats
             pstats = bundle.get("player_stats", [])
-            if pstats:
-                for r in pstats:
-                    tup = (r.get("source"), r.get("source_event_id"))
-                    if tup in match_map:
-                        r["match_id"] = match_map[tup]
-                    if (ps := r.get("player_sofascore_id")) in player_map:
-                        r["player_id"] = player_map[ps]
-                    if (ts := r.get("team_sofascore_id")) in team_map:
-                        r["team_id"] = team_map[ts]
-                ok, fail = db.upsert_player_stats(pstats)
-                res["player_stats"] = {"ok": ok, "fail": fail}; total += ok
-                logger.info(f"✅ player_stats: ok={ok}, fail={fail}")
+            for r in pstats:
+                tup = (r.get("source"), r.get("source_event_id"))
+                if tup in match_map:
+                    r["match_id"] = match_map[tup]
+                if (ps := r.get("player_sofascore_id")) in player_map:
+                    r["player_id"] = player_map[ps]
+                if (ts := r.get("team_sofascore_id")) in team_map:
+                    r["team_id"] = team_map[ts]
 
             # match stats
             mstats = bundle.get("match_stats", [])
             if mstats:
                 # Diagnostics: understand zero upsert cases
                 if os.getenv("LOG_MATCH_STATS_DEBUG", "1").lower() in {"1","true","yes"}:
-                    total_rows = len(mstats)
-                    missing_match = sum(1 for r in mstats if not r.get("match_id"))
+                    # counted now: the rows are mapped in place right below, before an async
+                    # log listener would format the record
+                    missing_mid = sum(1 for r in mstats if not r.get("match_id"))
                     missing_team = sum(1 for r in mstats if not r.get("team_sofascore_id") and not r.get("team_id"))
                     logger.info(
-                        f"[match_stats_debug] incoming_rows={total_rows} missing_match_id={missing_match} missing_team_identifier={missing_team} sample={mstats[:2]}"
+                        "[match_stats_debug] incoming_rows=%s missing_match_id=%s missing_team_identifier=%s sample=%s",
+                        len(mstats), missing_mid, missing_team,
+                        [dict(r) for r in mstats[:2]],
+                        extra=log_extra("fetch_loop.match_stats_debug.incoming", rows=len(mstats),
+                                        missing_match_id=missing_mid, missing_team_identifier=missing_team),
                     )
                 for r in mstats:
                     tup = (r.get("source"), r.get("source_event_id"))
@@ -574,17 +609,27 @@ class FetchLoop:
                         r["team_id"] = team_map[ts]
                 if os.getenv("LOG_MATCH_STATS_DEBUG", "1").lower() in {"1","true","yes"}:
                     mapped = sum(1 for r in mstats if r.get("match_id") and r.get("team_id"))
-                    logger.info(f"[match_stats_debug] after_mapping fully_mapped={mapped}/{len(mstats)}")
-                ok, fail = db.upsert_match_stats(mstats)
-                res["match_stats"] = {"ok": ok, "fail": fail}; total += ok
-                logger.info(f"✅ match_stats:  ok={ok}, fail={fail}")
+                    logger.info("[match_stats_debug] after_mapping fully_mapped=%s/%s", mapped, len(mstats),
+                                extra=log_extra("fetch_loop.match_stats_debug.mapped", mapped=mapped, rows=len(mstats)))
+
+            self._upsert_group(res, {
+                "lineups": (lambda: db.upsert_lineups(lineups)) if lineups else None,
+                "formations": (lambda: db.upsert_formations(forms)) if forms else None,
+                "events": (lambda: db.upsert_match_events(mev)) if mev else None,
+                "player_stats": (lambda: db.upsert_player_stats(pstats)) if pstats else None,
+                "match_stats": (lambda: db.upsert_match_stats(mstats)) if mstats else None,
+            })
 
-            res["total_stored"] = total
+            # rows skipped by change detection this cycle (incl. light snapshot)
+            res["change_detection"] = db.log_change_stats()
+            res["db_metrics"] = db.log_metrics()
+            res["total_stored"] = self._stored_total(res)
             return res
         except Exception as e:
             logger.error(f"❌ Storage phase failed: {e}")
-            res["total_stored"] = total
+            res["total_stored"] = self._stored_total(res)
             res["error"] = str(e)
+            res["transient"] = is_transient_error(e)
             return res
 
     # ----------------- helpers -----------------
@@ -636,15 +681,26 @@ class FetchLoop:
         for inc in incs:
             side = "home" if inc.get("isHome") else "away"
             minute = None
-            if isinstance(inc.get("time"), dict):
-                minute = inc["time"].get("minute")
-            minute = minute or inc.get("minute")
+            t = inc.get("time")
+            if isinstance(t, dict):
+                minute = t.get("minute")
+            elif isinstance(t, (int, float)):
+                # raw SofaScore incident: time=int + addedTime (999 = placeholder), as in EventsProcessor
+                minute = int(t)
+                add = inc.get("addedTime")
+                if isinstance(add, (int, float)) and 0 < add < 30:
+                    minute += int(add)
+            if minute is None:
+                minute = inc.get("minute")
             pl = inc.get("player") or {}
             res.append({
                 "minute": minute,
                 "type": inc.get("incidentType"),
                 "team": side,
                 "player_name": pl.get("name"),
+                "player_sofascore_id": pl.get("id"),
+                "playerIn": inc.get("playerIn"),
+                "playerOut": inc.get("playerOut"),
                 "description": inc.get("text"),
                 "card_color": inc.get("color"),
             })
@@ -661,7 +717,9 @@ class FetchLoop:
 
 # ------------- standalone -------------
 async def main():
+    enable_file_logging()
     logger.info("🚀 Starting FetchLoop...")
+    config.validate_config()  # fail fast on missing credentials / browser paths
     db.health_check()
     loop = FetchLoop(max_events=20)
     while True:
@@ -35,11 +35,14 @@ from pipeline import fetch_day, enrich_event, store_bundle, build_standings
 from processors.match_processor import MatchProcessor
 from core.config import SOFA_TOURNAMENTS_ALLOW
 try:  # optional enhanced name-based filter
-    from utils.leagues_filter import should_track_match  # type: ignore
+    from utils.leagues_filter import should_track_event, warm_rankings_cache  # type: ignore
 except Exception:  # pragma: no cover
-    def should_track_match(_: dict) -> bool:  # type: ignore
+    def should_track_event(_: dict, allow_ids=None) -> bool:  # type: ignore
         return True
 
+    def warm_rankings_cache(wait: float = 0.0) -> bool:  # type: ignore
+        return False
+
 logger = get_logger(__name__)
 
 DAYS_BACK_DEFAULT = 365 * 2
@@ -120,24 +123,14 @@ def run_day(browser: Browser, processor: MatchProcessor, day: datetime, *, throt
     if allow is None:
         allow = getattr(run_day, "_allow_ids", None)
     # allow is injected in main before loop via function attribute
-    if getattr(run_day, "_allow_ids", None):
-        def _ut(ev):
-            try:
-                return int((ev.get("tournament") or {}).get("uniqueTournament", {}).get("id"))
-            except Exception:
-                return None
-        before = len(events)
-        # Keep event if ID in allow_ids OR (fallback) passes name-based tracking
-        allow_ids = run_day._allow_ids  # type: ignore[attr-defined]
-        events = [ev for ev in events if (_ut(ev) in allow_ids) or should_track_match(ev)]
-        if before != len(events):
-            logger.info(f"[allowlist] filtered events {before}->{len(events)} (allow_ids+name_fallback)")
-    else:
-        # No explicit IDs -> rely purely on name-based decision
-        before = len(events)
-        events = [ev for ev in events if should_track_match(ev)]
-        if before != len(events):
-            logger.info(f"[allowlist] name-only filtered events {before}->{len(events)}")
+    # Keep event if uniqueTournament ID in allow_ids OR (fallback) passes name-based tracking;
+    # decisions are memoised per tournament, so this is one dict lookup per event
+    allow_ids = getattr(run_day, "_allow_ids", None)
+    before = len(events)
+    events = [ev for ev in events if should_track_event(ev, allow_ids)]
+    if before != len(events):
+        mode = "allow_ids+name_fallback" if allow_ids else "name-only"
+        logger.info(f"[allowlist] filtered events {before}->{len(events)} ({mode})")
     if max_events and len(events) > max_events:
         events = events[:max_events]
     enriched = []
@@ -221,6 +214,10 @@ def main():
     except Exception:
         setattr(run_day, "_debug", False)
 
+    # Rankings (TOP N) cache: disk copy or one bounded fetch before the first day is filtered
+    if not warm_rankings_cache(wait=30.0):
+        logger.warning("[allowlist] rankings unavailable, name-based tracking only until refresh")
+
     browser = Browser()
     processor = MatchProcessor()
     totals: dict[str, int] = {}
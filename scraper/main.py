@@ -36,6 +36,11 @@ def cli():
     p.add_argument("--interval", type=int, default=30, help="Interval između ciklusa u sekundama (default: 30)")
     p.add_argument("--max-failures", type=int, default=5, help="Maksimalno uzastopnih neuspjeha (default: 5)")
     args = p.parse_args()
+    try:
+        from utils import enable_file_logging
+        enable_file_logging()
+    except Exception as e:
+        logger.warning(f"main | file logging disabled: {e}")
 
     if args.once:
         logger.info("main | Running single cycle...")
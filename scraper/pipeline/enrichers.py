@@ -10,16 +10,27 @@ except Exception:  # pragma: no cover
 from datetime import datetime, timezone
 from utils.logger import get_logger
 from core.config import SOFA_TOURNAMENTS_ALLOW
-try:  # optional fallback name-based tracking helper
-    from utils.leagues_filter import should_track_competition  # type: ignore
+try:  # optional fallback name-based tracking helper (memoised per uniqueTournament)
+    from utils.leagues_filter import should_track_event  # type: ignore
 except Exception:  # pragma: no cover
-    def should_track_competition(_: dict) -> bool:  # type: ignore
-        return False
+    def should_track_event(match: dict, allow_ids=None) -> bool:  # type: ignore
+        ut = ((match.get("tournament") or {}).get("uniqueTournament") or {})
+        return bool(allow_ids and ut.get("id") in allow_ids)
 
 logger = get_logger(__name__)
 
 # Single-event enrichment split out of legacy script.
 
+def lineup_pid_index(*side_blocks: Dict[str, Any]) -> Dict[int, Dict[str, Any]]:
+    """pid -> lineup player node over the given side blocks ({"players": [...]}); first occurrence wins."""
+    idx: Dict[int, Dict[str, Any]] = {}
+    for side_block in side_blocks:
+        for pl in (side_block.get("players") or []):
+            pid = (pl.get("player") or {}).get("id")
+            if pid and pid not in idx:
+                idx[pid] = pl
+    return idx
+
 def enrich_event(browser: Any, event: Dict[str, Any], throttle: float = 0.0, *, heavy: bool = True) -> Dict[str, Any]:
     """Enrich a single SofaScore event.
 
@@ -30,15 +41,9 @@ def enrich_event(browser: Any, event: Dict[str, Any], throttle: float = 0.0, *,
     or once status becomes live / finished.
     """
     eid = event.get("id")
-    # Allow-list gating (uniqueTournament id) – skip early if not allowed
+    # Allow-list gating (uniqueTournament id, then rankings / priority names) – skip early if not allowed
     try:
-        tour = (event.get("tournament") or {})
-        ut = tour.get("uniqueTournament") if isinstance(tour.get("uniqueTournament"), dict) else {}
-        utid_val = ut.get("id") if isinstance(ut, dict) else None
-        comp_obj = ut if ut else tour
-        allow_list_hit = bool(SOFA_TOURNAMENTS_ALLOW and utid_val in SOFA_TOURNAMENTS_ALLOW)
-        name_priority_hit = should_track_competition(comp_obj) if comp_obj else False
-        if not (allow_list_hit or name_priority_hit):
+        if not should_track_event(event, SOFA_TOURNAMENTS_ALLOW):
             # Mark skip reason (prefer explicit allow miss vs name miss)
             reason = "not_in_allow_or_priority"
             return {"event": event, "event_id": eid, "_skip": reason}
@@ -108,13 +113,9 @@ def enrich_event(browser: Any, event: Dict[str, Any], throttle: float = 0.0, *,
         enriched["_raw_lineups"] = lu
         # --- per-player detailed stats enrichment (goals, assists etc.) ---
         try:
-            # Collect unique player IDs from both sides (limit to reasonable set)
-            pid_set = []
-            for side_block in (home, away):
-                for pl in (side_block.get("players") or []):
-                    pid = (pl.get("player") or {}).get("id")
-                    if pid and pid not in pid_set:
-                        pid_set.append(pid)
+            # pid -> lineup node (first occurrence, home before away); used for selection, merge and checks
+            pid_nodes = lineup_pid_index(home, away)
+            pid_set = list(pid_nodes)
             # Fetch individual statistics and merge into lineup player nodes
             # Mapping to unify keys used later by stats_processor
             def _merge_stats(pl_node, stats_node):
@@ -204,19 +205,17 @@ def enrich_event(browser: Any, event: Dict[str, Any], throttle: float = 0.0, *,
                 worker_count = 8
             selected_pids = []
             for pid in pid_set:
-                # locate entry to decide if we skip
-                entry_ref = None
-                for side_block in (home, away):
-                    for pl in (side_block.get("players") or []):
-                        if (pl.get("player") or {}).get("id") == pid:
-                            entry_ref = pl
-                            break
-                    if entry_ref:
-                        break
-                if entry_ref and _is_unused_bench(entry_ref):
+                if _is_unused_bench(pid_nodes[pid]):
                     bench_skipped.append(pid)
                 else:
                     selected_pids.append(pid)
+            def _apply(pid: int, stats_block) -> None:
+                if isinstance(stats_block, dict) and stats_block and pid in pid_nodes:
+                    _merge_stats(pid_nodes[pid], stats_block)
+                    success_pids.add(pid)
+                    logger.debug(f"[enrich_player_stat] ev={eid} pid={pid} direct={use_direct} minutes_played={stats_block.get('minutesPlayed')} fetch_keys={list(stats_block.keys())}")
+                else:
+                    failed_pids.append(pid)
             def _fetch_one(pid: int):
                 if use_direct:
                     return pid, _direct_player_stats(eid, pid)
@@ -231,24 +230,7 @@ def enrich_event(browser: Any, event: Dict[str, Any], throttle: float = 0.0, *,
                             pid, stats_block = None, None
                         if not pid:
                             continue
-                        if isinstance(stats_block, dict) and stats_block:
-                            merged = False
-                            for side_block in (home, away):
-                                for pl in (side_block.get("players") or []):
-                                    if (pl.get("player") or {}).get("id") == pid:
-                                        _merge_stats(pl, stats_block)
-                                        merged = True
-                                        mp = stats_block.get("minutesPlayed")
-                                        logger.debug(f"[enrich_player_stat] ev={eid} pid={pid} direct={use_direct} minutes_played={mp} fetch_keys={list(stats_block.keys())}")
-                                        break
-                                if merged:
-                                    break
-                            if merged:
-                                success_pids.add(pid)
-                            else:
-                                failed_pids.append(pid)
-                        else:
-                            failed_pids.append(pid)
+                        _apply(pid, stats_block)
             else:
                 for pid in selected_pids:
                     if use_direct:
@@ -256,24 +238,7 @@ def enrich_event(browser: Any, event: Dict[str, Any], throttle: float = 0.0, *,
                     else:
                         detail = _fetch(f"event/{eid}/player/{pid}/statistics", {}) or {}
                         stats_block = detail.get("statistics") if isinstance(detail, dict) else None
-                    if isinstance(stats_block, dict) and stats_block:
-                        merged = False
-                        for side_block in (home, away):
-                            for pl in (side_block.get("players") or []):
-                                if (pl.get("player") or {}).get("id") == pid:
-                                    _merge_stats(pl, stats_block)
-                                    merged = True
-                                    mp = stats_block.get("minutesPlayed")
-                                    logger.debug(f"[enrich_player_stat] ev={eid} pid={pid} direct={use_direct} minutes_played={mp} fetch_keys={list(stats_block.keys())}")
-                                    break
-                            if merged:
-                                break
-                        if merged:
-                            success_pids.add(pid)
-                        else:
-                            failed_pids.append(pid)
-                    else:
-                        failed_pids.append(pid)
+                    _apply(pid, stats_block)
                     if throttle > 0:
                         time.sleep(throttle)
             if failed_pids or bench_skipped:
@@ -285,13 +250,12 @@ def enrich_event(browser: Any, event: Dict[str, Any], throttle: float = 0.0, *,
                 logger.warning("[enrich_player_stat_missing] " + " ".join(msg_parts))
             # Extra debug: list any player whose merged minutes look suspicious (>120)
             try:
-                for side_lbl, side_block in (("home", home), ("away", away)):
-                    for pl in (side_block.get("players") or []):
-                        pid = (pl.get("player") or {}).get("id")
-                        stats_obj = pl.get("statistics") or {}
-                        mp = stats_obj.get("minutesPlayed")
-                        if pid in success_pids and isinstance(mp,(int,float)) and mp > 120:
-                            logger.warning(f"[enrich_player_stat_minutes_suspicious] ev={eid} pid={pid} minutesPlayed={mp}")
+                for pid, pl in pid_nodes.items():
+                    if pid not in success_pids:
+                        continue
+                    mp = (pl.get("statistics") or {}).get("minutesPlayed")
+                    if isinstance(mp,(int,float)) and mp > 120:
+                        logger.warning(f"[enrich_player_stat_minutes_suspicious] ev={eid} pid={pid} minutesPlayed={mp}")
             except Exception:
                 pass
         except Exception as e:
@@ -1,8 +1,8 @@
 from __future__ import annotations
 from typing import Any, Dict, List
 import time
-from datetime import datetime, timezone, timedelta
 from utils.logger import get_logger
+from utils.timeconv import to_date
 
 logger = get_logger(__name__)
 
@@ -52,15 +52,7 @@ def enrich_manager_details(browser: Any, managers: List[Dict[str, Any]], throttl
             dob = node.get("dateOfBirth") or node.get("birthDate")
             ts_raw = node.get("dateOfBirthTimestamp")
             if not dob and ts_raw is not None:
-                try:
-                    ts = int(ts_raw)
-                    if ts > 10**12:
-                        ts //= 1000
-                    epoch = datetime(1970,1,1, tzinfo=timezone.utc)
-                    dob_dt = epoch + timedelta(seconds=ts)
-                    dob = dob_dt.date().isoformat()
-                except Exception:
-                    dob = None
+                dob = to_date(ts_raw)
             if dob:
                 m["date_of_birth"] = dob
     logger.info(f"[manager_enrich] coverage nationality={sum(1 for x in managers if x.get('nationality'))}/{len(managers)} dob={sum(1 for x in managers if x.get('date_of_birth'))}/{len(managers)}")
@@ -1,6 +1,8 @@
 from __future__ import annotations
 from typing import List, Dict, Any
 from utils.logger import get_logger
+from core.config import config
+from core.columnar import to_columnar
 from .fetchers import fetch_day
 from .enrichers import enrich_event
 from .store import store_bundle
@@ -28,6 +30,8 @@ def run_day(browser, day: str, throttle: float = 0.0) -> Dict[str, Any]:
             bundle["standings"] = std_rows
     except Exception as e:
         logger.debug(f"[orchestrator] standings build failed: {e}")
+    if config.BUNDLE_COLUMNAR:
+        to_columnar(bundle)
     counts = store_bundle(bundle, browser=browser, throttle=throttle)
     logger.info(f"[orchestrator] stored: {counts}")
     return {"fetched": len(events), "enriched": len(enriched), "stored": counts}
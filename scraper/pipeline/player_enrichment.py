@@ -1,6 +1,7 @@
 from __future__ import annotations
 from typing import List, Dict, Any
 from utils.logger import get_logger
+from utils.timeconv import to_date
 
 logger = get_logger(__name__)
 
@@ -15,16 +16,7 @@ def _extract_dob(node: Dict[str, Any]):
     dob = node.get("dateOfBirth") or node.get("birthDate")
     ts = node.get("dateOfBirthTimestamp") or node.get("birthDateTimestamp")
     if not dob and ts is not None:
-        try:
-            ts_int = int(ts)
-            if ts_int > 10**12:  # ms -> s
-                ts_int //= 1000
-            from datetime import datetime, timezone, timedelta
-            epoch = datetime(1970, 1, 1, tzinfo=timezone.utc)
-            dob_dt = epoch + timedelta(seconds=ts_int)
-            dob = dob_dt.date().isoformat()
-        except Exception:
-            dob = None
+        dob = to_date(ts)
     return dob
 
 
@@ -72,16 +64,10 @@ def enrich_player_details(browser, players: List[Dict[str, Any]], throttle: floa
         # Secondary fallback: if i dalje nema date_of_birth ali postoji dateOfBirthTimestamp u detail node
         if not p.get("date_of_birth"):
             ts_raw = node.get("dateOfBirthTimestamp") or node.get("birthDateTimestamp")
-            if ts_raw:
-                try:
-                    ts_int = int(ts_raw)
-                    if ts_int > 10**12:
-                        ts_int //= 1000
-                    from datetime import datetime, timezone as _tz
-                    p["date_of_birth"] = datetime.utcfromtimestamp(ts_int).replace(tzinfo=_tz.utc).date().isoformat()
-                    changed = True
-                except Exception:
-                    pass
+            dob = to_date(ts_raw) if ts_raw else None
+            if dob:
+                p["date_of_birth"] = dob
+                changed = True
         if changed:
             enriched += 1
         if throttle:
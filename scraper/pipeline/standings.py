@@ -1,7 +1,12 @@
 from __future__ import annotations
 from typing import Any, Dict, List, Tuple, Optional, Set
+import json
+import os
+import threading
 import time
+from pathlib import Path
 from utils.logger import get_logger
+from core.config import config
 from processors.standings_processor import StandingsProcessor
 
 logger = get_logger(__name__)
@@ -11,10 +16,136 @@ logger = get_logger(__name__)
 #   fetch_competition_standings(browser, comp_sofa:int, season_id:int|None) -> (raw_payload, path_used)
 #   build_standings(browser, enriched_events, throttle=0.0) -> List[raw rows ready for store (sofascore ids retained)]
 
-_standings_negative_paths: Set[str] = set()  # cache of failing endpoint variants for current process
-_neg_counts: Dict[Tuple[int,int], int] = {}  # (comp, season_id|0) -> failures count
 _MAX_NEG_VARIANTS = 6
 
+
+class _EndpointState:
+    """Endpoint discovery + debounce state, persisted to STANDINGS_STATE_PATH (JSON).
+
+    working:   comp -> (variant template that returned standings, ts); tried first next time
+    neg_paths: formatted path -> ts it failed (skipped for STANDINGS_NEGATIVE_TTL)
+    neg_counts:(comp, season_id|0) -> (failures, ts); >= _MAX_NEG_VARIANTS aborts the combo
+    last_fetch:(utid, season_name) -> ts of the last successful fetch (debounce)
+
+    Loaded lazily on first use, written atomically (tmp + replace) when changed. Entries
+    expire (working: STANDINGS_STATE_TTL, negatives: STANDINGS_NEGATIVE_TTL, debounce: once
+    older than the fetch interval) and each section keeps the newest STANDINGS_STATE_MAX.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.working: Dict[int, Tuple[str, float]] = {}
+        self.neg_paths: Dict[str, float] = {}
+        self.neg_counts: Dict[Tuple[int, int], Tuple[int, float]] = {}
+        self.last_fetch: Dict[Tuple[int, str], float] = {}
+        self.dirty = False
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    # ---------------- persistence ----------------
+
+    def ensure_loaded(self) -> "_EndpointState":
+        if self._loaded:
+            return self
+        with self._lock:
+            if self._loaded:
+                return self
+            self._loaded = True
+            if not self.path:
+                return self
+            try:
+                data = json.loads(Path(self.path).read_text(encoding="utf-8"))
+                for k, (tpl, ts) in (data.get("working") or {}).items():
+                    self.working[int(k)] = (str(tpl), float(ts))
+                for k, ts in (data.get("neg_paths") or {}).items():
+                    self.neg_paths[str(k)] = float(ts)
+                for k, (n, ts) in (data.get("neg_counts") or {}).items():
+                    c, sid = k.split(":", 1)
+                    self.neg_counts[(int(c), int(sid))] = (int(n), float(ts))
+                for k, ts in (data.get("last_fetch") or {}).items():
+                    c, season = k.split("|", 1)
+                    self.last_fetch[(int(c), season)] = float(ts)
+            except FileNotFoundError:
+                return self
+            except Exception as e:
+                logger.debug(f"[standings] state load failed path={self.path}: {e}")
+            self.prune()
+            logger.debug(f"[standings] state loaded working={len(self.working)} neg_paths={len(self.neg_paths)} last_fetch={len(self.last_fetch)}")
+        return self
+
+    def prune(self, now: Optional[float] = None) -> None:
+        now = now or time.time()
+        keep = max(1, config.STANDINGS_STATE_MAX)
+        debounce = max(_MIN_INTERVAL, config.STANDINGS_RECONCILE_SECONDS)
+
+        def _fresh(d: Dict[Any, Any], ttl: float, ts=lambda v: v) -> Dict[Any, Any]:
+            items = [(k, v) for k, v in d.items() if now - ts(v) < ttl]
+            if len(items) > keep:
+                items.sort(key=lambda kv: ts(kv[1]), reverse=True)
+                items = items[:keep]
+            return dict(items)
+
+        self.working = _fresh(self.working, config.STANDINGS_STATE_TTL, lambda v: v[1])
+        self.neg_paths = _fresh(self.neg_paths, config.STANDINGS_NEGATIVE_TTL)
+        self.neg_counts = _fresh(self.neg_counts, config.STANDINGS_NEGATIVE_TTL, lambda v: v[1])
+        self.last_fetch = _fresh(self.last_fetch, debounce)
+
+    def save(self) -> None:
+        if not self.dirty or not self.path:
+            return
+        with self._lock:
+            self.prune()
+            payload = {
+                "working": {str(c): [tpl, ts] for c, (tpl, ts) in self.working.items()},
+                "neg_paths": self.neg_paths,
+                "neg_counts": {f"{c}:{sid}": [n, ts] for (c, sid), (n, ts) in self.neg_counts.items()},
+                "last_fetch": {f"{c}|{season}": ts for (c, season), ts in self.last_fetch.items()},
+            }
+            try:
+                path = Path(self.path)
+                path.parent.mkdir(parents=True, exist_ok=True)
+                tmp = path.with_suffix(".tmp")
+                tmp.write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
+                os.replace(tmp, path)
+                self.dirty = False
+            except Exception as e:
+                logger.debug(f"[standings] state save failed path={self.path}: {e}")
+
+    # ---------------- accessors ----------------
+
+    def is_negative(self, path: str, now: float) -> bool:
+        ts = self.neg_paths.get(path)
+        return ts is not None and now - ts < config.STANDINGS_NEGATIVE_TTL
+
+    def mark_negative(self, path: str) -> None:
+        self.neg_paths[path] = time.time()
+        self.dirty = True
+
+    def neg_count(self, key: Tuple[int, int], now: float) -> int:
+        n, ts = self.neg_counts.get(key, (0, 0.0))
+        return n if now - ts < config.STANDINGS_NEGATIVE_TTL else 0
+
+    def add_negatives(self, key: Tuple[int, int], n: int) -> int:
+        now = time.time()
+        total = self.neg_count(key, now) + n
+        self.neg_counts[key] = (total, now)
+        self.dirty = True
+        return total
+
+    def mark_working(self, comp: int, key: Tuple[int, int], template: str) -> None:
+        if self.working.get(comp, ("",))[0] != template:
+            logger.debug(f"[standings] working variant comp={comp} -> {template}")
+        self.working[comp] = (template, time.time())
+        self.neg_counts.pop(key, None)
+        self.dirty = True
+
+    def set_last_fetch(self, key: Tuple[int, str], ts: float) -> None:
+        self.last_fetch[key] = ts
+        self.dirty = True
+
+
+_state = _EndpointState(config.STANDINGS_STATE_PATH)
+
 _VARIANTS_WITH_SEASON = [
     "tournament/{c}/season/{s}/standings/total",
     "unique-tournament/{c}/season/{s}/standings/total",
@@ -35,46 +166,56 @@ _VARIANTS_NO_SEASON = [
 ]
 
 def fetch_competition_standings(browser: Any, comp_sofa: int, season_id: Optional[int], throttle: float = 0.0) -> Tuple[Optional[Dict[str,Any]], Optional[str]]:
+    state = _state.ensure_loaded()
     key = (comp_sofa, season_id or 0)
-    if _neg_counts.get(key, 0) >= _MAX_NEG_VARIANTS:
+    now = time.time()
+    if state.neg_count(key, now) >= _MAX_NEG_VARIANTS:
         logger.debug(f"[standings] abort cached-negative comp={comp_sofa} season_id={season_id}")
         return None, None
-    variants: List[str] = []
+    variants: List[Tuple[str, str]] = []  # (template, path)
     if season_id:
-        variants.extend(v.format(c=comp_sofa, s=season_id) for v in _VARIANTS_WITH_SEASON)
-    variants.extend(v.format(c=comp_sofa, s=season_id or 0) for v in _VARIANTS_NO_SEASON)
+        variants.extend((v, v.format(c=comp_sofa, s=season_id)) for v in _VARIANTS_WITH_SEASON)
+    variants.extend((v, v.format(c=comp_sofa, s=season_id or 0)) for v in _VARIANTS_NO_SEASON)
+    # variant that worked for this competition before goes first (persisted across restarts)
+    known = state.working.get(comp_sofa)
+    if known:
+        variants.sort(key=lambda tp: tp[0] != known[0])
     used = None
     negatives_this_call = 0
-    for path in variants:
-        if path in _standings_negative_paths:
-            continue
-        try:
-            data = browser.fetch_data(path) or None
-            if throttle > 0:
-                time.sleep(throttle)
-            if not data:
-                _standings_negative_paths.add(path); negatives_this_call += 1; continue
-            if isinstance(data, dict) and data.get("__error__"):
-                _standings_negative_paths.add(path); negatives_this_call += 1; continue
-            if isinstance(data, dict) and not any(k in data for k in ("standings","overallStandings","tables","allStandings","rows","data","standingsData")):
-                _standings_negative_paths.add(path); negatives_this_call += 1; continue
-            used = path
-            return data, used
-        except Exception:
-            _standings_negative_paths.add(path); negatives_this_call += 1; continue
-        finally:
-            if negatives_this_call and negatives_this_call % _MAX_NEG_VARIANTS == 0:
-                _neg_counts[key] = _neg_counts.get(key, 0) + negatives_this_call
-                if _neg_counts[key] >= _MAX_NEG_VARIANTS:
-                    break
-    if negatives_this_call:
-        _neg_counts[key] = _neg_counts.get(key, 0) + negatives_this_call
-    return None, used
+    try:
+        for template, path in variants:
+            if state.is_negative(path, now):
+                continue
+            try:
+                data = browser.fetch_data(path) or None
+                if throttle > 0:
+                    time.sleep(throttle)
+                if not data:
+                    state.mark_negative(path); negatives_this_call += 1; continue
+                if isinstance(data, dict) and data.get("__error__"):
+                    state.mark_negative(path); negatives_this_call += 1; continue
+                if isinstance(data, dict) and not any(k in data for k in ("standings","overallStandings","tables","allStandings","rows","data","standingsData")):
+                    state.mark_negative(path); negatives_this_call += 1; continue
+                used = path
+                state.mark_working(comp_sofa, key, template)
+                return data, used
+            except Exception:
+                state.mark_negative(path); negatives_this_call += 1; continue
+            finally:
+                if negatives_this_call and negatives_this_call % _MAX_NEG_VARIANTS == 0 and used is None:
+                    total = state.add_negatives(key, negatives_this_call)
+                    negatives_this_call = 0
+                    if total >= _MAX_NEG_VARIANTS:
+                        break
+        if negatives_this_call:
+            state.add_negatives(key, negatives_this_call)
+        return None, used
+    finally:
+        state.save()
 
 _processor = StandingsProcessor()
 
-# Debounce cache: (utid, season_name) -> last_fetch_epoch
-_LAST_FETCH: Dict[Tuple[int,str], float] = {}
+# Debounce: (utid, season_name) -> last_fetch_epoch lives in _state.last_fetch (persisted)
 _MIN_INTERVAL = float(__import__('os').getenv('STANDINGS_MIN_INTERVAL_SECONDS', '180'))  # 3 minute default
 
 def build_standings(browser: Any, enriched_events: List[Dict[str, Any]], throttle: float = 0.0) -> List[Dict[str, Any]]:
@@ -126,15 +267,18 @@ def build_standings(browser: Any, enriched_events: List[Dict[str, Any]], throttl
                 finished_comp.add(int(utid))
     except Exception:
         finished_comp = set()
+    # With the local engine (STANDINGS_LOCAL) finished results update tables in store_bundle;
+    # the provider table is only a periodic reconciliation, never forced by a finished match.
+    interval = config.STANDINGS_RECONCILE_SECONDS if config.STANDINGS_LOCAL else _MIN_INTERVAL
     for (comp_utid, season_name), meta in combos.items():
         season_id = meta.get("season_id")
         key = (comp_utid, season_name)
         now = time.time()
-        last = _LAST_FETCH.get(key, 0)
+        last = _state.ensure_loaded().last_fetch.get(key, 0)
         age = now - last
-        force = comp_utid in finished_comp
-        if age < _MIN_INTERVAL and not force:
-            logger.debug(f"[standings] debounce skip utid={comp_utid} season={season_name} age={int(age)}s < {_MIN_INTERVAL}s")
+        force = comp_utid in finished_comp and not config.STANDINGS_LOCAL
+        if age < interval and not force:
+            logger.debug(f"[standings] debounce skip utid={comp_utid} season={season_name} age={int(age)}s < {interval:.0f}s")
             continue
         raw, path = fetch_competition_standings(browser, comp_utid, season_id, throttle=throttle)
         if not raw:
@@ -148,9 +292,10 @@ def build_standings(browser: Any, enriched_events: List[Dict[str, Any]], throttl
                     r.setdefault("season_tournament_sofascore_id", meta.get("tid"))
             rows.extend(parsed)
             logger.info(f"[standings] utid={comp_utid} tid={meta.get('tid')} season={season_name} rows={len(parsed)} via={path}")
-            _LAST_FETCH[key] = now
+            _state.set_last_fetch(key, now)
         except Exception as e:
             logger.debug(f"[standings] parse fail utid={comp_utid} tid={meta.get('tid')} season={season_name}: {e}")
+    _state.save()
     if rows:
         logger.debug(f"[standings] total_rows={len(rows)}")
     else:
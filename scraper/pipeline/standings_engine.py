@@ -0,0 +1,256 @@
+# scraper/pipeline/standings_engine.py
+"""
+Incremental league tables from stored results (instead of re-fetching provider standings
+every time a match finishes).
+
+store_bundle drives it with the batch's match rows (competition / team UUIDs mapped):
+
+  seed(db, rows)     before the matches upsert: every (competition_id, season) with a finished
+                     result in the batch that is not in memory yet is loaded from the DB -
+                     stored finished results plus the stored standings rows. Per-team offsets
+                     (stored - computed) keep what the results alone cannot explain: matches
+                     missing from a partial backfill, points deductions.
+  apply(rows)        after the upsert: new / corrected results (idempotent per
+                     source_event_id) update counts, goals, points and form in place.
+  reconcile(db, ..)  provider standings (pipeline.standings, every STANDINGS_RECONCILE_SECONDS)
+                     reset the offsets and the rank tiebreak order.
+  rows(keys)         standings rows of the changed tables, ranked by points, goal difference,
+                     goals for, then the last provider / stored rank (stands in for
+                     head-to-head rules the results alone cannot decide).
+
+Only tables with a baseline (stored or provider standings) are emitted, and only for the
+baseline teams: cups / knockout rounds without a provider table never get local rows.
+"""
+from __future__ import annotations
+
+import bisect
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from utils.logger import get_logger
+from utils.timeconv import to_iso
+
+logger = get_logger(__name__)
+
+FINISHED_STATUSES = ("finished", "ft")
+FORM_LEN = 5
+COUNT_FIELDS = ("played", "wins", "draws", "losses", "goals_for", "goals_against", "points")
+_MAX_TABLES = 512
+
+Key = Tuple[str, str]  # (competition_id, season)
+Result = Tuple[str, str, int, int, str]  # (home_team_id, away_team_id, home_score, away_score, start_time)
+
+
+def _as_int(v: Any) -> Optional[int]:
+    try:
+        return int(v) if v is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _is_finished(m: Dict[str, Any]) -> bool:
+    return bool(m.get("is_finished")) or str(m.get("status") or "").lower() in FINISHED_STATUSES
+
+
+def _result_of(m: Dict[str, Any]) -> Optional[Result]:
+    home, away = m.get("home_team_id"), m.get("away_team_id")
+    hs = _as_int(m.get("home_score") if m.get("home_score") is not None else m.get("final_home_score"))
+    as_ = _as_int(m.get("away_score") if m.get("away_score") is not None else m.get("final_away_score"))
+    if not (home and away) or hs is None or as_ is None:
+        return None
+    return (home, away, hs, as_, to_iso(m.get("start_time")) or "")
+
+
+class _TeamLine:
+    __slots__ = ("counts", "offset", "recent", "rank_hint")
+
+    def __init__(self) -> None:
+        self.counts = [0] * len(COUNT_FIELDS)
+        self.offset = [0] * len(COUNT_FIELDS)
+        self.recent: List[Tuple[str, int, str]] = []  # (start_time, event id, W/D/L), sorted
+        self.rank_hint: Optional[int] = None
+
+    def totals(self) -> List[int]:
+        return [c + o for c, o in zip(self.counts, self.offset)]
+
+
+class _Table:
+    __slots__ = ("results", "teams", "baseline")
+
+    def __init__(self) -> None:
+        self.results: Dict[int, Result] = {}
+        self.teams: Dict[str, _TeamLine] = {}
+        self.baseline: Set[str] = set()
+
+    def _line(self, team_id: str) -> _TeamLine:
+        ln = self.teams.get(team_id)
+        if ln is None:
+            ln = self.teams[team_id] = _TeamLine()
+        return ln
+
+    def _contribute(self, eid: int, res: Result, sign: int) -> None:
+        home, away, hs, as_, start = res
+        for team, gf, ga in ((home, hs, as_), (away, as_, hs)):
+            ln = self._line(team)
+            letter = "W" if gf > ga else "D" if gf == ga else "L"
+            c = ln.counts
+            c[0] += sign
+            c[1 + "WDL".index(letter)] += sign
+            c[4] += sign * gf
+            c[5] += sign * ga
+            c[6] += sign * (3 if letter == "W" else 1 if letter == "D" else 0)
+            item = (start, eid, letter)
+            if sign > 0:
+                bisect.insort(ln.recent, item)
+            else:
+                i = bisect.bisect_left(ln.recent, item)
+                if i < len(ln.recent) and ln.recent[i] == item:
+                    del ln.recent[i]
+
+    def record(self, eid: int, res: Result) -> bool:
+        old = self.results.get(eid)
+        if old == res:
+            return False
+        if old is not None:
+            self._contribute(eid, old, -1)
+        self.results[eid] = res
+        self._contribute(eid, res, 1)
+        return True
+
+    def remove(self, eid: int) -> bool:
+        old = self.results.pop(eid, None)
+        if old is None:
+            return False
+        self._contribute(eid, old, -1)
+        return True
+
+    def set_baseline(self, rows: Iterable[Dict[str, Any]]) -> int:
+        """Adopt stored / provider rows as the current truth; returns teams that disagreed."""
+        mismatched = 0
+        baseline: Set[str] = set()
+        for r in rows:
+            team = r.get("team_id")
+            if not team:
+                continue
+            ln = self._line(team)
+            before = ln.totals()
+            for i, f in enumerate(COUNT_FIELDS):
+                v = _as_int(r.get(f))
+                if v is not None:
+                    ln.offset[i] = v - ln.counts[i]
+            if self.baseline and team in self.baseline and ln.totals() != before:
+                mismatched += 1
+            ln.rank_hint = _as_int(r.get("rank"))
+            baseline.add(team)
+        self.baseline = baseline
+        return mismatched
+
+
+class StandingsEngine:
+    """In-memory (competition_id, season) tables, seeded lazily from the DB (LRU-bounded)."""
+
+    def __init__(self, max_tables: int = _MAX_TABLES) -> None:
+        self._tables: "OrderedDict[Key, _Table]" = OrderedDict()
+        self._max_tables = max_tables
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(m: Dict[str, Any]) -> Optional[Key]:
+        comp, season = m.get("competition_id"), m.get("season")
+        return (comp, str(season)) if comp and season else None
+
+    def _load(self, db: Any, key: Key, with_stored: bool = True) -> Optional[_Table]:
+        comp, season = key
+        try:
+            results = db.get_finished_results(comp, season, FINISHED_STATUSES)
+            stored = db.get_standings(comp, season) if with_stored else []
+        except Exception as e:
+            logger.warning(f"[standings.engine] seed failed competition={comp} season={season}: {e}")
+            return None
+        t = _Table()
+        for r in results:
+            eid = _as_int(r.get("source_event_id"))
+            res = _result_of(r)
+            if eid is not None and res is not None:
+                t.record(eid, res)
+        t.set_baseline(stored)
+        self._tables[key] = t
+        while len(self._tables) > self._max_tables:
+            self._tables.popitem(last=False)
+        logger.debug(f"[standings.engine] seeded competition={comp} season={season} results={len(t.results)} baseline_teams={len(t.baseline)}")
+        return t
+
+    def seed(self, db: Any, match_rows: Iterable[Dict[str, Any]]) -> None:
+        """Load tables touched by finished rows of this batch (call before the matches upsert)."""
+        keys = {self._key(m) for m in match_rows if _is_finished(m)}
+        keys.discard(None)
+        with self._lock:
+            for key in keys:
+                if key in self._tables:
+                    self._tables.move_to_end(key)
+                else:
+                    self._load(db, key)
+
+    def apply(self, match_rows: Iterable[Dict[str, Any]]) -> Set[Key]:
+        """Fold stored match rows into loaded tables; returns keys whose table changed."""
+        changed: Set[Key] = set()
+        with self._lock:
+            for m in match_rows:
+                key = self._key(m)
+                t = self._tables.get(key) if key else None
+                eid = _as_int(m.get("source_event_id"))
+                if t is None or eid is None:
+                    continue
+                res = _result_of(m) if _is_finished(m) else None
+                if res is not None:
+                    hit = t.record(eid, res)
+                else:
+                    hit = t.remove(eid)  # e.g. result annulled / status corrected
+                if hit:
+                    changed.add(key)
+        return changed
+
+    def reconcile(self, db: Any, provider_rows: Iterable[Dict[str, Any]]) -> Set[Key]:
+        """Provider standings (UUID-mapped) become the new baseline; returns reconciled keys."""
+        grouped: Dict[Key, List[Dict[str, Any]]] = {}
+        for r in provider_rows:
+            key = self._key(r)
+            if key:
+                grouped.setdefault(key, []).append(r)
+        done: Set[Key] = set()
+        with self._lock:
+            for key, rows in grouped.items():
+                t = self._tables.get(key) or self._load(db, key, with_stored=False)
+                if t is None:
+                    continue
+                mismatched = t.set_baseline(rows)
+                if mismatched:
+                    logger.info(f"[standings.engine] reconcile competition={key[0]} season={key[1]} adjusted_teams={mismatched}/{len(rows)}")
+                done.add(key)
+        return done
+
+    def rows(self, keys: Iterable[Key]) -> List[Dict[str, Any]]:
+        """Standings rows (wire format of upsert_standings) for the given tables."""
+        out: List[Dict[str, Any]] = []
+        with self._lock:
+            for key in keys:
+                t = self._tables.get(key)
+                if t is None or not t.baseline:
+                    continue
+                lines = []
+                for team in t.baseline:
+                    ln = t.teams[team]
+                    tot = ln.totals()
+                    order = (-tot[6], -(tot[4] - tot[5]), -tot[4], ln.rank_hint or 10**6, team)
+                    lines.append((order, team, ln, tot))
+                lines.sort(key=lambda x: x[0])
+                for rank, (_, team, ln, tot) in enumerate(lines, 1):
+                    row: Dict[str, Any] = {"competition_id": key[0], "season": key[1], "team_id": team, "rank": rank}
+                    row.update(zip(COUNT_FIELDS, tot))
+                    row["form"] = "".join(x[2] for x in ln.recent[-FORM_LEN:]) or None
+                    out.append(row)
+        return out
+
+
+standings_engine = StandingsEngine()
@@ -1,31 +1,61 @@
 from __future__ import annotations
-from typing import Dict, List, Any, Tuple
+from functools import partial
+from typing import Callable, Dict, List, Any, Tuple
 import datetime as _dt
 from utils.logger import get_logger
-from core.database import db
+from core.config import config
+from core.database import db as _default_db
+from core.columnar import ColumnarTable
+from utils.timeconv import epoch_year, to_date, to_date_many
 from .manager_enrichment import enrich_manager_details
 from .player_enrichment import enrich_player_details
+from .standings_engine import standings_engine
 
 logger = get_logger(__name__)
 
 
-def store_bundle(bundle: Dict[str, List[Dict[str, Any]]], browser=None, throttle: float = 0.0) -> Dict[str, Tuple[int,int]]:
+def _pairs(rows: Any, a: str, b: str):
+    """(row[a], row[b]) for a row list or a ColumnarTable (column zip, no row dicts)."""
+    if isinstance(rows, ColumnarTable):
+        return zip(rows.values(a), rows.values(b))
+    return ((r.get(a), r.get(b)) for r in rows)
+
+
+def _upsert_table(db, table: str, ct: ColumnarTable, row_upsert) -> Tuple[int, int]:
+    # sinks without the columnar entrypoint get materialised rows
+    if hasattr(db, "upsert_columnar"):
+        return db.upsert_columnar(table, ct)
+    return row_upsert(ct.to_rows())
+
+
+def _upsert_group(db, counts: Dict[str, Tuple[int, int]], jobs: Dict[str, Callable[[], Tuple[int, int]]]) -> None:
+    """Independent table upserts -> db.run_parallel (one pooled client each); first error re-raised
+    after every result has been recorded in counts."""
+    err = None
+    for name, out in db.run_parallel(jobs).items():
+        if isinstance(out, Exception):
+            err = err or out
+        else:
+            counts[name] = out
+    if err is not None:
+        raise err
+
+
+def store_bundle(bundle: Dict[str, List[Dict[str, Any]]], browser=None, throttle: float = 0.0, sink=None) -> Dict[str, Tuple[int,int]]:
     """Persist a prepared bundle (competitions, teams, players, matches, etc.).
 
     Returns mapping {table: (ok, fail)} similar to legacy implementation.
     This is a refactored version extracted from legacy.init_match_dataset.store_bundle
     to keep that script thin and reusable from fetch loop / backfills.
+
+    `sink` overrides the default PostgREST client, e.g. core.pg_bulk.PgBulkClient for
+    COPY-based historical loads.
     """
+    db = sink if sink is not None else _default_db
     counts: Dict[str, Tuple[int,int]] = {}
 
     # 1) Base entities (competitions, teams) ---------------------------------
     comps = bundle.get("competitions", []) or []
-    if comps:
-        counts["competitions"] = db.upsert_competitions(comps)
-        try:
-            logger.info(f"[store][competitions][verify] db_count={db.table_count('competitions')}")
-        except Exception:
-            pass
     teams = bundle.get("teams", []) or []
     _teams_input = list(teams)  # keep original for diagnostic counts
     # optional enrichment for each team to pull venue/founded/capacity
@@ -49,7 +79,7 @@ def store_bundle(bundle: Dict[str, List[Dict[str, Any]]], browser=None, throttle
                                     ts = int(f_raw)
                                     # treat as epoch seconds (positive or negative)
                                     if abs(ts) > 10**8:  # roughly > ~3 years, so epoch
-                                        year_val = _dt.datetime.utcfromtimestamp(ts).year
+                                        year_val = epoch_year(ts)
                                     else:
                                         # likely already a year like 1907
                                         year_val = int(str(ts)[:4])
@@ -76,22 +106,33 @@ def store_bundle(bundle: Dict[str, List[Dict[str, Any]]], browser=None, throttle
                     pass
             enriched_teams.append(t2)
         teams = enriched_teams
+    # competitions / teams do not reference each other -> written concurrently
+    _upsert_group(db, counts, {
+        name: partial(fn, rows)
+        for name, fn, rows in (("competitions", db.upsert_competitions, comps), ("teams", db.upsert_teams, teams))
+        if rows
+    })
+    if comps:
+        db.verify_written("competitions", "sofascore_id", (c.get("sofascore_id") for c in comps))
     if teams:
-        counts["teams"] = db.upsert_teams(teams)
         try:
             uniq_in = len({t.get("sofascore_id") for t in _teams_input if t.get("sofascore_id")})
             ok, fail = counts["teams"]
             logger.info(f"[store][teams] batch_in={len(_teams_input)} unique_in={uniq_in} upsert_ok={ok} fail={fail}")
-            try:
-                logger.info(f"[store][teams][verify] db_count={db.table_count('teams')}")
-            except Exception:
-                pass
+            db.verify_written("teams", "sofascore_id", (t.get("sofascore_id") for t in teams))
         except Exception:
             pass
 
     # Maps for FK linking
-    comp_map = db.get_competition_ids_by_sofa([c.get("sofascore_id") for c in comps]) if comps else {}
-    team_map = db.get_team_ids_by_sofa([t.get("sofascore_id") for t in teams]) if teams else {}
+    # independent lookups -> parallel on pooled clients
+    maps = db.run_parallel({
+        "comp": lambda: db.get_competition_ids_by_sofa([c.get("sofascore_id") for c in comps]) if comps else {},
+        "team": lambda: db.get_team_ids_by_sofa([t.get("sofascore_id") for t in teams]) if teams else {},
+    })
+    for _m in maps.values():
+        if isinstance(_m, Exception):
+            raise _m
+    comp_map, team_map = maps["comp"], maps["team"]
 
     # 2) Players (inject team_id from team_sofascore_id) ---------------------
     # Build auxiliary maps from lineups BEFORE processing players so we can assign
@@ -100,7 +141,11 @@ def store_bundle(bundle: Dict[str, List[Dict[str, Any]]], browser=None, throttle
     lineup_team_map: Dict[int, int] = {}
     lineup_number_map: Dict[int, Any] = {}
     try:
-        for lr in (bundle.get("lineups") or []):
+        lineups_in = bundle.get("lineups") or []
+        if isinstance(lineups_in, ColumnarTable):
+            lineups_in = ({"player_sofascore_id": ps, "team_sofascore_id": ts, "team_id": ti, "jersey_number": jn}
+                          for ps, ts, ti, jn in zip(*(lineups_in.values(c) for c in ("player_sofascore_id", "team_sofascore_id", "team_id", "jersey_number"))))
+        for lr in lineups_in:
             psid = lr.get("player_sofascore_id")
             tsid = lr.get("team_sofascore_id") or lr.get("team_id")
             if isinstance(psid, int):
@@ -122,20 +167,11 @@ def store_bundle(bundle: Dict[str, List[Dict[str, Any]]], browser=None, throttle
         # NEW: fallback – ako imamo timestamp a nema date_of_birth, konvertiraj
         if not p2.get("date_of_birth"):
             ts_raw = p2.get("dateOfBirthTimestamp") or p2.get("birthDateTimestamp")
-            if ts_raw:
-                try:
-                    ts_int = int(ts_raw)
-                    if ts_int > 10**12:  # ms -> s
-                        ts_int //= 1000
-                    from datetime import timezone, timedelta
-                    epoch = _dt.datetime(1970, 1, 1, tzinfo=timezone.utc)
-                    dob_dt = epoch + timedelta(seconds=ts_int)
-                    dob_str = dob_dt.date().isoformat()
-                    p2["date_of_birth"] = dob_str
-                    # označi iz kojeg je izvora došao (debug) ako već nemamo _dob_src
-                    p2.setdefault("_dob_src", "ts_fallback")
-                except Exception:
-                    pass
+            dob_str = to_date(ts_raw) if ts_raw else None
+            if dob_str:
+                p2["date_of_birth"] = dob_str
+                # označi iz kojeg je izvora došao (debug) ako već nemamo _dob_src
+                p2.setdefault("_dob_src", "ts_fallback")
         tsid = p2.pop("team_sofascore_id", None)
         # If missing team_sofascore_id but present in lineup map, set it now (so mapping below can translate to FK)
         if tsid is None and p2.get("sofascore_id") in lineup_team_map:
@@ -163,19 +199,12 @@ def store_bundle(bundle: Dict[str, List[Dict[str, Any]]], browser=None, throttle
             pass
         if browser is not None:
             enrich_player_details(browser, players, throttle=throttle)
-            # Post-enrichment safety: još jednom konvertiraj raw timestamp ako je ostao
-            for pl in players:
-                if not pl.get("date_of_birth"):
-                    ts_raw = pl.get("dateOfBirthTimestamp") or pl.get("birthDateTimestamp")
-                    if ts_raw:
-                        try:
-                            ts_int = int(ts_raw)
-                            if ts_int > 10**12:
-                                ts_int //= 1000
-                            from datetime import timezone as _tz
-                            pl["date_of_birth"] = _dt.datetime.utcfromtimestamp(ts_int).replace(tzinfo=_tz.utc).date().isoformat()
-                        except Exception:
-                            pass
+            # Post-enrichment safety: još jednom konvertiraj raw timestamp ako je ostao (batch)
+            pending = [pl for pl in players if not pl.get("date_of_birth")
+                       and (pl.get("dateOfBirthTimestamp") or pl.get("birthDateTimestamp"))]
+            for pl, dob in zip(pending, to_date_many(pl.get("dateOfBirthTimestamp") or pl.get("birthDateTimestamp") for pl in pending)):
+                if dob:
+                    pl["date_of_birth"] = dob
         # Debug: log sample of player DOB fields coverage
         try:
             dob_total = sum(1 for x in players if x.get("date_of_birth"))
@@ -237,6 +266,11 @@ def store_bundle(bundle: Dict[str, List[Dict[str, Any]]], browser=None, throttle
         # ensure updated_at for status freshness
         m2.setdefault("updated_at", _dt.datetime.utcnow().isoformat())
         match_rows.append(m2)
+    std_changed: set = set()
+    if match_rows and config.STANDINGS_LOCAL:
+        # load (competition, season) tables touched by finished results *before* the upsert,
+        # so the batch is applied as a delta on top of what was stored
+        standings_engine.seed(db, match_rows)
     if match_rows:
         # Info log to confirm venue presence before DB upsert
         try:
@@ -247,6 +281,8 @@ def store_bundle(bundle: Dict[str, List[Dict[str, Any]]], browser=None, throttle
         except Exception:
             pass
         counts["matches"] = db.batch_upsert_matches(match_rows)
+        if config.STANDINGS_LOCAL:
+            std_changed = standings_engine.apply(match_rows)
     else:
         logger.debug("[store][matches] no match rows -> skipping match_state snapshot")
 
@@ -379,10 +415,27 @@ def store_bundle(bundle: Dict[str, List[Dict[str, Any]]], browser=None, throttle
         except Exception:
             player_map = {}
 
+    # 6-14) child tables only reference matches / players / teams / managers written above:
+    # rows are mapped in order, the upserts are collected here and run together at the end
+    writes: Dict[str, Callable[[], Tuple[int, int]]] = {}
+
     # 6) Lineups ------------------------------------------------------------
     line_raw = bundle.get("lineups", []) or []
-    line_rows: List[Dict[str, Any]] = []
+    line_rows: Any = []
     lineup_player_team: Dict[int, str] = {}
+    if isinstance(line_raw, ColumnarTable):
+        # same rules as the row loop below, as per-distinct-value column mappings
+        lt = line_raw.drop("match_id").map("source_event_id", se_to_mid_sid, "match_id").where_present("match_id")
+        lt = lt.map("team_sofascore_id", lambda t: team_map.get(t) if t else None, "_team")
+        lt = lt.map(("source_event_id", "side"), lambda k: (side_team_cache.get(str(k[0])) or {}).get(k[1]) if k[1] else None,
+                    "_team", only_missing=True)
+        lt = lt.map("_team", lambda t: t or None, "team_id", only_missing=True)
+        lt = lt.map("player_sofascore_id", lambda p: player_map.get(p) if p else None, "player_id")
+        for psid, team_id in _pairs(lt, "player_sofascore_id", "_team"):
+            if psid and team_id and psid not in lineup_player_team:
+                lineup_player_team[psid] = team_id
+        line_rows = lt.drop("source_event_id", "side", "_team")
+        line_raw = []
     for r in line_raw:
         eid = r.get("source_event_id")
         mid = se_to_mid_sid.get(eid)
@@ -412,9 +465,13 @@ def store_bundle(bundle: Dict[str, List[Dict[str, Any]]], browser=None, throttle
         except Exception:
             pass
         line_rows.append(pr)
-    if line_rows:
+    if isinstance(line_rows, ColumnarTable):
+        if line_rows:
+            logger.debug(f"[store] lineups (columnar) mapped={len(line_rows)}")
+            writes["lineups"] = partial(_upsert_table, db, "lineups", line_rows, db.upsert_lineups)
+    elif line_rows:
         logger.debug(f"[store] lineups in={len(line_raw)} mapped={len(line_rows)} sample={line_rows[:1]}")
-        counts["lineups"] = db.upsert_lineups(line_rows)
+        writes["lineups"] = partial(db.upsert_lineups, line_rows)
 
     # 7) Formations ---------------------------------------------------------
     form_raw = bundle.get("formations", []) or []
@@ -439,11 +496,17 @@ def store_bundle(bundle: Dict[str, List[Dict[str, Any]]], browser=None, throttle
         form_rows.append(fr)
     if form_rows:
         logger.debug(f"[store] formations in={len(form_raw)} mapped={len(form_rows)} sample={form_rows[:1]}")
-        counts["formations"] = db.upsert_formations(form_rows)
+        writes["formations"] = partial(db.upsert_formations, form_rows)
 
     # 8) Events -------------------------------------------------------------
     ev_rows: List[Dict[str, Any]] = []
-    for r in bundle.get("events", []) or []:
+    ev_in = bundle.get("events", []) or []
+    if isinstance(ev_in, ColumnarTable):
+        et = ev_in.drop("match_id").map("source_event_id", se_to_mid_sid, "match_id").where_present("match_id")
+        if et:
+            writes["events"] = partial(_upsert_table, db, "match_events", et, db.upsert_match_events)
+        ev_in = []
+    for r in ev_in:
         eid = r.get("source_event_id")
         mid = se_to_mid_sid.get(eid)
         if not mid:
@@ -452,7 +515,7 @@ def store_bundle(bundle: Dict[str, List[Dict[str, Any]]], browser=None, throttle
         er["match_id"] = mid
         ev_rows.append(er)
     if ev_rows:
-        counts["events"] = db.upsert_match_events(ev_rows)
+        writes["events"] = partial(db.upsert_match_events, ev_rows)
 
     # 9) Shots --------------------------------------------------------------
     sh_rows: List[Dict[str, Any]] = []
@@ -518,7 +581,10 @@ def store_bundle(bundle: Dict[str, List[Dict[str, Any]]], browser=None, throttle
     assist_by_min_scorer: Dict[tuple, int] = {}
     assist_by_scorer_only: Dict[int, int] = {}
     try:
-        event_goal_assists = [er for er in bundle.get("events", []) if er.get("event_type") in {"goal","own_goal"}]
+        ev_in = bundle.get("events", []) or []
+        if isinstance(ev_in, ColumnarTable):
+            ev_in = ev_in.where("event_type", lambda t: t in {"goal","own_goal"}).iter_rows()
+        event_goal_assists = [er for er in ev_in if er.get("event_type") in {"goal","own_goal"}]
         scorer_goal_minutes: Dict[int, List[int]] = {}
         scorer_assist_candidates: Dict[int, List[int]] = {}
         for er in event_goal_assists:
@@ -603,7 +669,7 @@ def store_bundle(bundle: Dict[str, List[Dict[str, Any]]], browser=None, throttle
             )
         except Exception:
             pass
-        counts["shots"] = db.upsert_shots(sh_rows)
+        writes["shots"] = partial(db.upsert_shots, sh_rows)
 
     # 10) Average positions -------------------------------------------------
     ap_raw = bundle.get("average_positions", []) or []
@@ -611,9 +677,9 @@ def store_bundle(bundle: Dict[str, List[Dict[str, Any]]], browser=None, throttle
     # Build quick index from player_id->team_id via lineups and player_stats already mapped
     player_team_hint: Dict[str, str] = {}
     try:
-        for lr in line_rows:
-            if lr.get("player_id") and lr.get("team_id"):
-                player_team_hint[lr["player_id"]] = lr["team_id"]
+        for lpid, ltid in _pairs(line_rows, "player_id", "team_id"):
+            if lpid and ltid:
+                player_team_hint[lpid] = ltid
     except Exception:
         pass
     try:
@@ -647,11 +713,22 @@ def store_bundle(bundle: Dict[str, List[Dict[str, Any]]], browser=None, throttle
         ap_rows.append(ar)
     if ap_rows:
         logger.debug(f"[store] avg_positions in={len(ap_raw)} mapped={len(ap_rows)} sample={ap_rows[:1]}")
-        counts["average_positions"] = db.upsert_average_positions(ap_rows)
+        writes["average_positions"] = partial(db.upsert_average_positions, ap_rows)
 
     # 11) Player stats ------------------------------------------------------
     ps_raw = bundle.get("player_stats", []) or []
     ps_rows: List[Dict[str, Any]] = []
+    if isinstance(ps_raw, ColumnarTable):
+        pt = ps_raw.drop("match_id").map("source_event_id", se_to_mid_sid, "match_id").where_present("match_id")
+        pt = pt.map("player_sofascore_id", lambda p: player_map.get(p) if p else None, "player_id")
+        # side fallback first, team_sofascore_id hit overrides it (elif u row putu)
+        pt = pt.map(("source_event_id", "team"), lambda k: (side_team_cache.get(str(k[0])) or {}).get(k[1]) if k[1] else None, "team_id")
+        pt = pt.map("team_sofascore_id", lambda t: team_map.get(t) if t else None, "team_id")
+        pt = pt.drop("source_event_id")
+        if pt:
+            logger.debug(f"[store] player_stats (columnar) mapped={len(pt)}")
+            writes["player_stats"] = partial(_upsert_table, db, "player_stats", pt, db.upsert_player_stats)
+        ps_raw = []
     for r in ps_raw:
         eid = r.get("source_event_id")
         mid = se_to_mid_sid.get(eid)
@@ -674,7 +751,7 @@ def store_bundle(bundle: Dict[str, List[Dict[str, Any]]], browser=None, throttle
         ps_rows.append(pr)
     if ps_rows:
         logger.debug(f"[store] player_stats in={len(ps_raw)} mapped={len(ps_rows)} sample={ps_rows[:1]}")
-        counts["player_stats"] = db.upsert_player_stats(ps_rows)
+        writes["player_stats"] = partial(db.upsert_player_stats, ps_rows)
 
     # 12) Match stats -------------------------------------------------------
     ms_raw = bundle.get("match_stats", []) or []
@@ -694,7 +771,7 @@ def store_bundle(bundle: Dict[str, List[Dict[str, Any]]], browser=None, throttle
         ms_rows.append(mr)
     if ms_rows:
         logger.debug(f"[store] match_stats in={len(ms_raw)} mapped={len(ms_rows)} sample={ms_rows[:1]}")
-        counts["match_stats"] = db.upsert_match_stats(ms_rows)
+        writes["match_stats"] = partial(db.upsert_match_stats, ms_rows)
 
     # 13) Standings ---------------------------------------------------------
     std_rows = bundle.get("standings", []) or []
@@ -731,13 +808,23 @@ def store_bundle(bundle: Dict[str, List[Dict[str, Any]]], browser=None, throttle
             logger.debug(f"[store][standings] missing teams sofascore={list(missing_team_sofa)[:5]} count={len(missing_team_sofa)}")
         if mapped_std:
             logger.debug(f"[store] standings in={len(std_rows)} mapped={len(mapped_std)} sample={mapped_std[:1]}")
-            counts["standings"] = db.upsert_standings(mapped_std)
+            if config.STANDINGS_LOCAL:
+                # provider table = periodic reconciliation of the local engine
+                std_changed |= standings_engine.reconcile(db, mapped_std)
+            else:
+                writes["standings"] = partial(db.upsert_standings, mapped_std)
         else:
             logger.debug(f"[store][standings] dropped_all pre={pre_rows} mapped=0 (missing_comp={len(missing_comp_sofa)} missing_team={len(missing_team_sofa)})")
             # Extra verbose diagnostics: show a sample original row so we can inspect sofascore ids
             if std_rows:
                 logger.debug(f"[store][standings] sample_original={std_rows[0]}")
 
+    if std_changed:
+        local_std = standings_engine.rows(std_changed)
+        if local_std:
+            logger.info(f"[store][standings] local tables={len(std_changed)} rows={len(local_std)}")
+            writes["standings"] = partial(db.upsert_standings, local_std)
+
     # 14) match_managers ----------------------------------------------------
     mm_raw = bundle.get("match_managers", []) or []
     mm_rows: List[Dict[str, Any]] = []
@@ -770,12 +857,16 @@ def store_bundle(bundle: Dict[str, List[Dict[str, Any]]], browser=None, throttle
             mm_rows.append(row)
     if mm_rows:
         logger.debug(f"[store] match_managers in={len(mm_raw)} mapped={len(mm_rows)} sample={mm_rows[:1]}")
-        counts["match_managers"] = db.upsert_match_managers(mm_rows)
+        writes["match_managers"] = partial(db.upsert_match_managers, mm_rows)
+
+    _upsert_group(db, counts, writes)
 
     # Final diagnostic summary so caller logs always show what we actually persisted
     try:
         logger.info("[store][summary] " + ", ".join(f"{k}={counts.get(k)}" for k in sorted(counts.keys())))
     except Exception:
         pass
+    db.log_change_stats()
+    db.log_metrics()
 
     return counts
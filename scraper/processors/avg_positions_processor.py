@@ -1,5 +1,6 @@
 from __future__ import annotations
 from typing import Any, Dict, List
+from core.records import AvgPositionRow
 
 class AveragePositionsProcessor:
     """Parse /average-positions payload into rows for average_positions table."""
@@ -28,14 +29,14 @@ class AveragePositionsProcessor:
                     ax = float(ax); ay = float(ay)
                 except Exception:
                     continue
-                out.append({
-                    "source": "sofascore",
-                    "source_event_id": int(event_id),
-                    "player_sofascore_id": pid,
-                    "avg_x": ax,
-                    "avg_y": ay,
-                    "side": side,
-                })
+                out.append(AvgPositionRow(
+                    source="sofascore",
+                    source_event_id=int(event_id),
+                    player_sofascore_id=pid,
+                    avg_x=ax,
+                    avg_y=ay,
+                    side=side,
+                ))
         return out
 
 avg_positions_processor = AveragePositionsProcessor()
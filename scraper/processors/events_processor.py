@@ -3,6 +3,7 @@ from __future__ import annotations
 from typing import Any, Dict, List, Optional
 import re
 from utils.logger import get_logger
+from core.records import EventRow
 
 logger = get_logger(__name__)
 
@@ -164,19 +165,19 @@ class EventsProcessor:
             out_id = (inc.get("playerOut") or {}).get("id") if isinstance(inc.get("playerOut"), dict) else None
             # Description preference
             desc = inc.get("reason") or inc.get("text") or raw_class or raw_type
-            rows.append({
-                "source": "sofascore",
-                "source_event_id": ev_id,
-                "minute": minute,
-                "event_type": etype,
-                "team": team_side,
-                "player_name": pname,
-                "player_sofascore_id": primary_player_id,
-                "assist_player_sofascore_id": assist_id,
-                "player_in_sofascore_id": in_id,
-                "player_out_sofascore_id": out_id,
-                "description": desc,
-            })
+            rows.append(EventRow(
+                source="sofascore",
+                source_event_id=ev_id,
+                minute=minute,
+                event_type=etype,
+                team=team_side,
+                player_name=pname,
+                player_sofascore_id=primary_player_id,
+                assist_player_sofascore_id=assist_id,
+                player_in_sofascore_id=in_id,
+                player_out_sofascore_id=out_id,
+                description=desc,
+            ))
         # Log if we failed to resolve most minutes for this match
         if rows:
             unknown_cnt = sum(1 for r in rows if r.get("minute", -1) < 0)
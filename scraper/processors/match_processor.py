@@ -1,7 +1,6 @@
 from __future__ import annotations
 from typing import Any, Dict, List
 import os
-from datetime import datetime, timezone, timedelta
 
 from .status_processor import status_processor
 from .team_processor import team_processor
@@ -11,47 +10,13 @@ from .stats_processor import stats_processor
 from .shots_processor import shots_processor
 from .avg_positions_processor import avg_positions_processor
 
-def _get(dt_val) -> str:
-    if not dt_val:
-        return None
-    if isinstance(dt_val, (int, float)):
-        if dt_val > 10**12:
-            dt_val = dt_val / 1000.0
-        try:
-            return datetime.utcfromtimestamp(dt_val).replace(tzinfo=timezone.utc).isoformat()
-        except Exception:
-            return None
-    if isinstance(dt_val, str):
-        s = dt_val.strip()
-        # Preferred: ISO with timezone (Z or +00:00) -> convert to UTC
-        try:
-            return datetime.fromisoformat(s.replace("Z", "+00:00")).astimezone(timezone.utc).isoformat()
-        except Exception:
-            # Fallbacks: numeric string -> timestamp
-            try:
-                if s.isdigit():
-                    ts = int(s)
-                    if ts > 10**12:
-                        ts = ts / 1000.0
-                    return datetime.utcfromtimestamp(ts).replace(tzinfo=timezone.utc).isoformat()
-            except Exception:
-                pass
-
-            # Try replacing space with T then assume local timezone for naive datetimes
-            try:
-                s2 = s.replace(" ", "T")
-                dt = datetime.fromisoformat(s2)
-                if dt.tzinfo is None:
-                    # Attach UTC for naive datetimes (provider timestamps should be canonical UTC)
-                    dt = dt.replace(tzinfo=timezone.utc)
-                return dt.astimezone(timezone.utc).isoformat()
-            except Exception:
-                return None
-    return None
-
-from utils.logger import get_logger
+from utils.logger import get_logger, log_extra
+from utils.timeconv import epoch_seconds, to_epoch, to_iso, to_iso_seconds
 _mp_logger = get_logger(__name__)
 
+GOAL_EVENT_TYPES = frozenset({"goal", "penalty_goal", "own_goal"})
+GOAL_DETAIL_KEYS = ("minute", "event_type", "player_sofascore_id", "assist_player_sofascore_id", "team")
+
 class MatchProcessor:
     """Transforms enriched events into a bundle (entity lists) for storage."""
     def process(self, enriched_events: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
@@ -69,6 +34,7 @@ class MatchProcessor:
         average_positions: List[Dict[str, Any]] = []
         managers: List[Dict[str, Any]] = []
         match_managers: List[Dict[str, Any]] = []
+        incident_facts: List[Dict[str, Any]] = []
         venue_ok_count = 0
         venue_missing: List[int] = []
 
@@ -104,27 +70,55 @@ class MatchProcessor:
             # Events (incidents)
             event_rows = events_processor.parse(enriched)
             events.extend(event_rows)
-            sub_in_ids = {er.get("player_in_sofascore_id") for er in event_rows if er.get("event_type") == "substitution" and er.get("player_in_sofascore_id")}
-            sub_out_ids = {er.get("player_out_sofascore_id") for er in event_rows if er.get("event_type") == "substitution" and er.get("player_out_sofascore_id")}
-            # Goal counts per side (for score anomaly diagnostics / potential correction)
+            # Jedan prolaz kroz incidente: izmjene, golovi po strani, detalji golova, kartoni,
+            # igrači iz incidenata (+ strana) i (minute, strijelac) -> asistent za shots patch
+            sub_in_ids: set = set()
+            sub_out_ids: set = set()
             goal_counts = {"home": 0, "away": 0}
-            goal_events_detail = []  # collect (side, minute, player_sofa_id, assist_sofa_id, event_type)
+            card_counts = {"home": {"yellow": 0, "red": 0}, "away": {"yellow": 0, "red": 0}}
+            goal_events_detail: List[Dict[str, Any]] = []
+            goal_assists: Dict[tuple, int] = {}
+            ev_player_side: Dict[int, Any] = {}
             try:
                 for er in event_rows:
-                    if er.get("event_type") in {"goal", "own_goal"}:
-                        side = er.get("team")
+                    etype = er.get("event_type")
+                    side = er.get("team")
+                    if etype == "substitution":
+                        if er.get("player_in_sofascore_id"):
+                            sub_in_ids.add(er.get("player_in_sofascore_id"))
+                        if er.get("player_out_sofascore_id"):
+                            sub_out_ids.add(er.get("player_out_sofascore_id"))
+                    elif etype in GOAL_EVENT_TYPES:
                         if side in goal_counts:
                             goal_counts[side] += 1
-                            if len(goal_events_detail) < 20:  # cap to avoid huge log
-                                goal_events_detail.append({
-                                    "side": side,
-                                    "minute": er.get("minute"),
-                                    "player": er.get("player_sofascore_id"),
-                                    "assist": er.get("assist_player_sofascore_id"),
-                                    "etype": er.get("event_type"),
-                                })
+                            goal_events_detail.append({k: er.get(k) for k in GOAL_DETAIL_KEYS})
+                        ap = er.get("assist_player_sofascore_id")
+                        sp = er.get("player_sofascore_id")
+                        mn = er.get("minute")
+                        if ap and sp and mn is not None:
+                            try:
+                                # keep first (provider order) if multiple
+                                goal_assists.setdefault((int(mn), int(sp)), int(ap))
+                            except Exception:
+                                pass
+                    elif etype in ("yellow_card", "red_card") and side in card_counts:
+                        card_counts[side]["yellow" if etype == "yellow_card" else "red"] += 1
+                    for key in ("player_sofascore_id", "assist_player_sofascore_id", "player_in_sofascore_id", "player_out_sofascore_id"):
+                        pid = er.get(key)
+                        if isinstance(pid, int) and ev_player_side.get(pid) is None:
+                            # side only known for the incident's primary player
+                            ev_player_side[pid] = side if key == "player_sofascore_id" and side else None
             except Exception:
                 pass
+            incident_facts.append({
+                "source": "sofascore",
+                "source_event_id": ev_id,
+                "goals": goal_counts,
+                "goal_events": goal_events_detail,
+                "cards": card_counts,
+                "sub_in_ids": list(sub_in_ids),
+                "sub_out_ids": list(sub_out_ids),
+            })
 
             # Status & time
             # Raw scoreboard values (prefer these absolutely; they have been reliable)
@@ -142,7 +136,6 @@ class MatchProcessor:
             # accurate indicator of when play actually started (fixes cases where
             # scheduled-events or other snapshots contain stale startTimestamp).
             cps_raw = (base.get("time") or {}).get("currentPeriodStartTimestamp")
-            date_utc = _get(base.get("startTimestamp") or base.get("startTimeUTC") or base.get("startTime"))
             # Determine canonical UTC start_time.
             # PROBLEM OBSERVED: Using naive ISO (no TZ) treated as UTC produced 60–90 min shifts.
             # FIX: Strictly trust numeric startTimestamp first. Only accept ISO values that are timezone-aware.
@@ -159,37 +152,23 @@ class MatchProcessor:
             try:
                 if isinstance(st_num, (int, float)) or (isinstance(st_num, str) and str(st_num).isdigit()):
                     # Ensure we always format as strict ISO: YYYY-MM-DDTHH:MM:SS+00:00 (force seconds + UTC)
-                    raw_iso = _get(st_num)
-                    try:
-                        if raw_iso:
-                            dtp = datetime.fromisoformat(raw_iso.replace("Z", "+00:00"))
-                            # Rebuild with seconds
-                            date_utc = dtp.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S+00:00")
-                        else:
-                            date_utc = raw_iso
-                    except Exception:
-                        date_utc = raw_iso
+                    date_utc = to_iso_seconds(st_num)
                     ts_choice_meta["chosen"] = "startTimestamp"
                     ts_choice_meta["reason"] = "forced_numeric_only"
                 else:
                     ts_choice_meta["reason"] = "missing_startTimestamp"
                     # Diagnostic: log once per match if numeric missing
-                    _mp_logger.warning(f"[match_processor][start_timestamp_missing] ev={ev_id} raw={raw_start_candidates}")
+                    _mp_logger.warning("[match_processor][start_timestamp_missing] ev=%s raw=%s", ev_id, raw_start_candidates,
+                                       extra=log_extra("match_processor.start_timestamp_missing", ev=ev_id))
             except Exception as e:
                 ts_choice_meta["error"] = str(e)
-            _mp_logger.info(f"[match_processor][start_time_forced] ev={ev_id} meta={ts_choice_meta} canonical={date_utc}")
+            _mp_logger.info("[match_processor][start_time_forced] ev=%s meta=%s canonical=%s", ev_id, ts_choice_meta, date_utc,
+                            extra=log_extra("match_processor.start_time_forced", ev=ev_id, chosen=ts_choice_meta["chosen"], canonical=date_utc))
             # Persist the original numeric scheduled start (epoch seconds) separately for drift detection
-            scheduled_start_ts = None
-            try:
-                raw_ts = base.get("startTimestamp")
-                if isinstance(raw_ts, (int, float)):
-                    scheduled_start_ts = int(raw_ts if raw_ts < 10**12 else raw_ts / 1000)
-                elif isinstance(raw_ts, str) and raw_ts.isdigit():
-                    scheduled_start_ts = int(raw_ts)
-                    if scheduled_start_ts > 10**12:
-                        scheduled_start_ts = int(scheduled_start_ts / 1000)
-            except Exception:
-                scheduled_start_ts = None
+            raw_ts = base.get("startTimestamp")
+            scheduled_start_ts = epoch_seconds(raw_ts)
+            if scheduled_start_ts is not None:
+                scheduled_start_ts = int(scheduled_start_ts)
             home_colors = (base.get("homeTeam") or {}).get("teamColors") or {}
             away_colors = (base.get("awayTeam") or {}).get("teamColors") or {}
             home_color = home_colors.get("primary") or "#222222"
@@ -199,16 +178,14 @@ class MatchProcessor:
             try:
                 cps = (base.get("time") or {}).get("currentPeriodStartTimestamp")
                 if cps:
-                    current_period_start = _get(cps)
+                    current_period_start = to_iso(cps)
             except Exception:
                 pass
             # kickoff_offset_min: difference between actual first period start and scheduled start (if both available)
             kickoff_offset_min = None
             try:
                 if current_period_start and scheduled_start_ts:
-                    cps_dt = datetime.fromisoformat(current_period_start.replace("Z", "+00:00"))
-                    sched_dt = datetime.fromtimestamp(scheduled_start_ts, tz=timezone.utc)
-                    delta_min = int((cps_dt - sched_dt).total_seconds() / 60)
+                    delta_min = int((to_epoch(current_period_start) - scheduled_start_ts) / 60)
                     # Only store reasonable delays/early starts
                     if -30 <= delta_min <= 90 and delta_min != 0:
                         kickoff_offset_min = delta_min
@@ -313,25 +290,10 @@ class MatchProcessor:
             # Uklonjena goal-count korekcija; opcionalni debug usporedbe više nije potreban za isključivo raw zapis.
 
             # Ensure ALL players from events (including subs and assists) are registered
-            try:
-                ev_player_ids = set()
-                for er in event_rows:
-                    for key in ("player_sofascore_id","assist_player_sofascore_id","player_in_sofascore_id","player_out_sofascore_id"):
-                        pid = er.get(key)
-                        if isinstance(pid, int):
-                            ev_player_ids.add(pid)
-                for pid in ev_player_ids:
-                    if pid not in players:
-                        side_guess = None
-                        # crude: if any goal/other event with this pid has team side, reuse
-                        for er in event_rows:
-                            if er.get("player_sofascore_id") == pid and er.get("team"):
-                                side_guess = er.get("team")
-                                break
-                        team_sid = home_tid if side_guess == "home" else away_tid if side_guess == "away" else None
-                        players[pid] = {"sofascore_id": pid, "full_name": f"Player {pid}", "team_sofascore_id": team_sid}
-            except Exception:
-                pass
+            for pid, side_guess in ev_player_side.items():
+                if pid not in players:
+                    team_sid = home_tid if side_guess == "home" else away_tid if side_guess == "away" else None
+                    players[pid] = {"sofascore_id": pid, "full_name": f"Player {pid}", "team_sofascore_id": team_sid}
 
             # Player & match stats
             raw_lineups = enriched.get("_raw_lineups") or {}
@@ -369,17 +331,7 @@ class MatchProcessor:
                     parsed_shots = shots_processor.parse(raw_shots, ev_id)
                     # Attempt to enrich missing assist IDs for goal shots via incidents (events) map
                     try:
-                        # Build local goal assist lookup: (minute, player_sofa_id) -> assist_sofa_id
-                        goal_assists: Dict[tuple, int] = {}
-                        for er in event_rows:
-                            if er.get("event_type") in {"goal","own_goal"}:
-                                ap = er.get("assist_player_sofascore_id")
-                                sp = er.get("player_sofascore_id")
-                                mn = er.get("minute")
-                                if ap and sp and mn is not None:
-                                    key = (int(mn), int(sp))
-                                    # keep first (provider order) if multiple
-                                    goal_assists.setdefault(key, int(ap))
+                        # goal_assists: (minute, player_sofa_id) -> assist_sofa_id (built in the incident pass)
                         if goal_assists:
                             patched = 0
                             fuzzy_hits = 0
@@ -538,6 +490,7 @@ class MatchProcessor:
             "average_positions": average_positions,
             "managers": managers,
             "match_managers": match_managers,
+            "incident_facts": incident_facts,
         }
 
 match_processor = MatchProcessor()
@@ -1,5 +1,6 @@
 from __future__ import annotations
 from typing import Any, Dict, List, Optional
+from core.records import ShotRow
 
 class ShotsProcessor:
     """Parse SofaScore shotmap payload into DB-ready shot rows.
@@ -115,25 +116,25 @@ class ShotsProcessor:
                     except Exception:
                         team_id_ref = None
                     side = side if side in ("home","away") else None
-            row = {
-                "source": "sofascore",
-                "source_event_id": int(event_id),
-                "player_sofascore_id": pid,
-                "assist_player_sofascore_id": assist_id,
-                "minute": minute,
-                "x": x,
-                "y": y,
-                "xg": s.get("xg") or s.get("expectedGoals") or s.get("xG"),
-                "body_part": (s.get("bodyPart") or "").lower() if isinstance(s.get("bodyPart"), str) else None,
-                "situation": (s.get("situation") or "").lower() if isinstance(s.get("situation"), str) else None,
-                "is_penalty": bool(s.get("isPenalty") or (isinstance(outcome, str) and outcome.startswith("pen_"))) or None,
-                "is_own_goal": bool(s.get("isOwnGoal") or outcome == "own_goal") or None,
-                "outcome": outcome,
-                "team": side,
+            row = ShotRow(
+                source="sofascore",
+                source_event_id=int(event_id),
+                player_sofascore_id=pid,
+                assist_player_sofascore_id=assist_id,
+                minute=minute,
+                x=x,
+                y=y,
+                xg=s.get("xg") or s.get("expectedGoals") or s.get("xG"),
+                body_part=(s.get("bodyPart") or "").lower() if isinstance(s.get("bodyPart"), str) else None,
+                situation=(s.get("situation") or "").lower() if isinstance(s.get("situation"), str) else None,
+                is_penalty=bool(s.get("isPenalty") or (isinstance(outcome, str) and outcome.startswith("pen_"))) or None,
+                is_own_goal=bool(s.get("isOwnGoal") or outcome == "own_goal") or None,
+                outcome=outcome,
+                team=side,
                 # Preserve raw isHome if present for fallback mapping in legacy transform
-                "isHome": s.get("isHome") if isinstance(s.get("isHome"), bool) else None,
-                "source_item_id": source_item_id,
-            }
+                isHome=s.get("isHome") if isinstance(s.get("isHome"), bool) else None,
+                source_item_id=source_item_id,
+            )
             # ako je situation=assisted a nemamo assist_id, dodaj male debug info (privremeno)
             try:
                 if row.get("situation") == "assisted" and row.get("assist_player_sofascore_id") is None:
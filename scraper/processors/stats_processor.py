@@ -3,6 +3,8 @@ from __future__ import annotations
 from typing import Any, Dict, List, Optional, Tuple
 import os
 from utils.logger import get_logger
+from core.records import PlayerStatRow
+from .subs_minutes import build_subs_index
 _sp_logger = get_logger(__name__)
 
 # ==== helperi (dodaj u stats_processor.py ili gdje ti je zgodno) ====
@@ -250,12 +252,12 @@ class StatsProcessor:
                     if comp_vals:
                         extracted["shots_total"] = sum(comp_vals)
 
-                rec: Dict[str, Any] = {
-                    "source": "sofascore",
-                    "source_event_id": int(event_id),
-                    "team": side,
-                    "player_sofascore_id": pid,
-                }
+                rec = PlayerStatRow(
+                    source="sofascore",
+                    source_event_id=int(event_id),
+                    team=side,
+                    player_sofascore_id=pid,
+                )
                 # provider team id so storage phase can map to team UUID
                 if side == "home" and home_team_sofa is not None:
                     rec["team_sofascore_id"] = int(home_team_sofa)
@@ -382,61 +384,76 @@ def build_player_stats_fallback(enriched_event: Dict[str, Any]) -> List[Dict[str
         if not lineups:
             return []
         def _name(n: Optional[str]) -> str:
-            return (n or "").strip().lower()
+            return " ".join((n or "").split()).lower()
         ev_id = enriched_event.get("event_id") or enriched_event.get("source_event_id")
         out_map: Dict[str, Dict[int, Dict[str, Any]]] = {"home": {}, "away": {}}
+        # per-side name -> pid index (first lineup entry wins, as before); pid index is out_map itself
+        name_idx: Dict[str, Dict[str, int]] = {"home": {}, "away": {}}
         for side in ("home","away"):
             for p in (lineups.get(side) or []):
                 pobj = p.get("player") or p
                 pid = pobj.get("id")
                 if not pid:
                     continue
-                out_map[side][int(pid)] = {
-                    "source": "sofascore",
-                    "source_event_id": ev_id,
-                    "team": side,
-                    "player_sofascore_id": int(pid),
-                    "team_sofascore_id": int(enriched_event.get(f"{side}_team_sofa")) if enriched_event.get(f"{side}_team_sofa") else None,
-                    "goals": 0,
-                    "assists": None,
-                    "minutes_played": None,
-                    "is_substitute": not bool(p.get("isStarting")),
-                    "was_subbed_in": False,
-                    "was_subbed_out": False,
-                    "_name": _name(pobj.get("name")),
-                }
-        # Traverse incidents
+                nm = _name(pobj.get("name"))
+                if nm:
+                    name_idx[side].setdefault(nm, int(pid))
+                out_map[side][int(pid)] = PlayerStatRow(
+                    source="sofascore",
+                    source_event_id=ev_id,
+                    team=side,
+                    player_sofascore_id=int(pid),
+                    team_sofascore_id=int(enriched_event.get(f"{side}_team_sofa")) if enriched_event.get(f"{side}_team_sofa") else None,
+                    goals=0,
+                    assists=None,
+                    minutes_played=None,
+                    is_substitute=not bool(p.get("isStarting")),
+                    was_subbed_in=False,
+                    was_subbed_out=False,
+                )
+        # Traverse incidents (goals); player resolved by incident id, then by normalised name
         for inc in incidents:
-            side = "home" if inc.get("team") == "home" or inc.get("isHome") else ("away" if inc.get("team") == "away" else None)
-            if side not in ("home","away"):
+            if inc.get("team") in ("home","away"):
+                side = inc.get("team")
+            elif isinstance(inc.get("isHome"), bool):
+                side = "home" if inc.get("isHome") else "away"
+            else:
                 continue
-            minute = None
-            tnode = inc.get("time") or {}
-            if isinstance(tnode, dict):
-                minute = tnode.get("minute")
-            if minute is None:
-                minute = inc.get("minute")
             itype = (inc.get("type") or inc.get("incidentType") or "").lower()
-            pname = _name((inc.get("player") or {}).get("name") or inc.get("player_name") or inc.get("playerName"))
-            target_pid = None
-            for cand, dat in out_map[side].items():
-                if dat.get("_name") == pname and pname:
-                    target_pid = cand
-                    break
+            if itype not in {"goal","penalty_goal","own_goal"}:
+                continue
+            pobj = inc.get("player") if isinstance(inc.get("player"), dict) else {}
+            target_pid = pobj.get("id") or inc.get("player_sofascore_id")
+            try:
+                target_pid = int(target_pid) if target_pid is not None else None
+            except Exception:
+                target_pid = None
+            if target_pid not in out_map[side]:
+                pname = _name(pobj.get("name") or inc.get("player_name") or inc.get("playerName"))
+                target_pid = name_idx[side].get(pname) if pname else None
             if target_pid is None:
                 continue
             rec = out_map[side][target_pid]
-            if itype in {"goal","penalty_goal","own_goal"}:
-                rec["goals"] = (rec.get("goals") or 0) + 1
-            elif itype == "substitution_in":
-                rec["was_subbed_in"] = True
-                rec["is_substitute"] = True
-                if minute is not None:
-                    rec.setdefault("_in_min", minute)
-            elif itype == "substitution_out":
-                rec["was_subbed_out"] = True
-                if minute is not None:
-                    rec.setdefault("_out_min", minute)
+            rec["goals"] = (rec.get("goals") or 0) + 1
+        # Substitution minutes from the shared subs index
+        try:
+            ev_key = int(ev_id)
+        except Exception:
+            ev_key = None
+        subs = build_subs_index([enriched_event]) if ev_key is not None else {}
+        if subs:
+            for side in ("home","away"):
+                for pid, rec in out_map[side].items():
+                    mins = subs.get((ev_key, pid))
+                    if not mins:
+                        continue
+                    if "in_minute" in mins:
+                        rec["was_subbed_in"] = True
+                        rec["is_substitute"] = True
+                        rec["_in_min"] = mins["in_minute"]
+                    if "out_minute" in mins:
+                        rec["was_subbed_out"] = True
+                        rec["_out_min"] = mins["out_minute"]
         # Finalise minutes
         for side in ("home","away"):
             for pid, rec in out_map[side].items():
@@ -454,7 +471,6 @@ def build_player_stats_fallback(enriched_event: Dict[str, Any]) -> List[Dict[str
         out: List[Dict[str, Any]] = []
         for side in ("home","away"):
             for rec in out_map[side].values():
-                rec.pop("_name", None)
                 out.append(rec)
         return out
     except Exception:
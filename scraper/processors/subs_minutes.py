@@ -18,7 +18,7 @@ def build_subs_index(enriched_events: List[Dict[str, Any]]) -> Dict[Tuple[int,in
         incidents = enr.get("events") or []
         for inc in incidents:
             try:
-                rtype = str(inc.get("type") or "").lower()
+                rtype = str(inc.get("type") or inc.get("incidentType") or "").lower()
                 if "substitution" not in rtype:
                     continue
                 minute = None
@@ -36,10 +36,23 @@ def build_subs_index(enriched_events: List[Dict[str, Any]]) -> Dict[Tuple[int,in
                     if minute is not None and t.get("addMinutes") not in (None, ""):
                         try: minute += int(t.get("addMinutes"))
                         except Exception: pass
+                if minute is None and isinstance(inc.get("time"), (int, float)):
+                    # raw SofaScore incident: time=int, addedTime (999 = placeholder)
+                    minute = int(inc.get("time"))
+                    try:
+                        add = int(inc.get("addedTime") or 0)
+                        if 0 < add < 30:
+                            minute += add
+                    except Exception:
+                        pass
                 if minute is None:
-                    minute = 0
+                    # no usable minute: skip rather than treat the sub as 0' (would swap who played)
+                    continue
                 pin = inc.get("playerIn") or inc.get("player_in") or inc.get("playerInPlayer") or inc.get("player")
                 pout = inc.get("playerOut") or inc.get("player_out") or inc.get("playerOutPlayer") or inc.get("relatedPlayer")
+                if rtype.endswith("_out") and pin is inc.get("player"):
+                    # one-sided 'substitution_out' row: its player went off
+                    pin, pout = None, pout or pin
                 in_id = pin.get("id") if isinstance(pin, dict) else None
                 out_id = pout.get("id") if isinstance(pout, dict) else None
                 if in_id:
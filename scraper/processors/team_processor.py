@@ -1,6 +1,8 @@
 # scraper/processors/team_processor.py
 from __future__ import annotations
 from typing import Any, Dict, List, Tuple, Optional
+from core.records import LineupRow
+from utils.timeconv import epoch_year, to_date
 
 class TeamProcessor:
     """Vadi timove i igrače (iz lineups) u jednostavne upsert objekte."""
@@ -42,8 +44,7 @@ class TeamProcessor:
                     try:
                         # If it's a large epoch (seconds) convert to year
                         if isinstance(val, (int, float)) and val > 10**8:
-                            from datetime import datetime
-                            founded = datetime.utcfromtimestamp(int(val)).year
+                            founded = epoch_year(int(val))
                         else:
                             # naive parse: take first 4 digits, but validate below
                             founded = int(str(val)[:4])  # naive parse
@@ -116,16 +117,7 @@ class TeamProcessor:
                 dob_str = None
                 dob_ts = pl.get("dateOfBirthTimestamp") or pl.get("dateOfBirth")
                 if dob_ts:
-                    try:
-                        val = int(dob_ts)
-                        if val > 10**12:  # ms -> s
-                            val //= 1000
-                        from datetime import datetime, timezone, timedelta
-                        epoch = datetime(1970, 1, 1, tzinfo=timezone.utc)
-                        dob_dt = epoch + timedelta(seconds=val)
-                        dob_str = dob_dt.date().isoformat()
-                    except Exception:
-                        dob_str = None
+                    dob_str = to_date(dob_ts)
                 # merge if existing (prefer earliest non-null fields)
                 row = out.get(int(pid), {})
                 row.update({
@@ -204,19 +196,19 @@ class TeamProcessor:
                         jersey = p.get(key)
                         break
                 pos = p.get("position") or (pl_obj.get("position") if pl_obj else None)
-                out.append({
-                    "source": source,
-                    "source_event_id": event_id,
-                    "team_sofascore_id": tid,
-                    "player_sofascore_id": player_id,
-                    "jersey_number": jersey,
-                    "position": pos,
+                out.append(LineupRow(
+                    source=source,
+                    source_event_id=event_id,
+                    team_sofascore_id=tid,
+                    player_sofascore_id=player_id,
+                    jersey_number=jersey,
+                    position=pos,
                     # Starting flag heuristics:
                     # 1. Direct flags isStarting / starting
                     # 2. Some payloads only mark substitutes (isSubstitute / substitute = True) -> then starter = not substitute
                     # 3. Presence of subbedInTime but not subbedOutTime usually means came on as sub (so not starter)
                     # 4. Explicit lineup arrays sometimes have "formationPlace" for starters; treat its presence as indicator.
-                    "is_starting": bool(
+                    is_starting=bool(
                         p.get("isStarting")
                         or p.get("starting")
                         or (
@@ -225,11 +217,11 @@ class TeamProcessor:
                         )
                         or (p.get("formationPlace") not in (None, "") and not p.get("subbedInTime"))
                     ),
-                    "is_captain": bool(p.get("isCaptain") or p.get("captain")),
+                    is_captain=bool(p.get("isCaptain") or p.get("captain")),
                     # Pass through raw substitution timing markers for later minutes reconstruction downstream.
-                    "_subbed_in_time": p.get("subbedInTime") or None,
-                    "_subbed_out_time": p.get("subbedOutTime") or None,
-                })
+                    _subbed_in_time=p.get("subbedInTime") or None,
+                    _subbed_out_time=p.get("subbedOutTime") or None,
+                ))
         return out
 
     def parse_formations(self, enriched: Dict[str, Any]) -> List[Dict[str, Any]]:
@@ -0,0 +1,151 @@
+# scraper/tools/bulk_load_bench.py
+"""
+Bulk-load benchmark for core.pg_bulk against a local (or scratch) Postgres.
+
+Creates schema `bulk_bench` with minimal copies of teams / matches / match_events
+(same conflict keys as production), loads synthetic rows twice and prints rows/s:
+  - baseline: one INSERT … ON CONFLICT per row, committed per 50-row batch
+              (what the PostgREST path costs per request, minus HTTP)
+  - bulk:     PgBulkClient (COPY -> staging -> set-based merge) via the normal upsert_* API
+
+Usage:
+    python tools/bulk_load_bench.py --dsn postgresql://postgres@localhost/postgres --matches 5000
+Run the second pass (--repeat) to measure the update path (all keys already present).
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+from datetime import datetime, timezone, timedelta
+
+scraper_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(scraper_dir))
+
+from core.pg_bulk import PgBulkClient  # noqa: E402
+
+SCHEMA = "bulk_bench"
+
+DDL = f"""
+DROP SCHEMA IF EXISTS {SCHEMA} CASCADE;
+CREATE SCHEMA {SCHEMA};
+SET search_path TO {SCHEMA};
+CREATE TABLE teams (
+    id uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+    sofascore_id bigint UNIQUE NOT NULL,
+    name text NOT NULL, short_name text, country text, logo_url text
+);
+CREATE TABLE matches (
+    id uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+    source text NOT NULL, source_event_id bigint NOT NULL,
+    home_team text NOT NULL, away_team text NOT NULL,
+    home_score int, away_score int, start_time timestamptz NOT NULL, status text,
+    competition text, updated_at timestamptz, home_team_id uuid, away_team_id uuid,
+    UNIQUE (source, source_event_id)
+);
+CREATE TABLE match_events (
+    id uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+    match_id uuid NOT NULL, minute int NOT NULL, event_type text NOT NULL,
+    player_name text NOT NULL DEFAULT '', team text NOT NULL, description text,
+    UNIQUE (match_id, minute, event_type, team, player_name)
+);
+"""
+
+
+def synth(n_matches: int, seed_minute: int = 0):
+    teams = [{"sofascore_id": 1000 + i, "name": f"Team {i}", "short_name": f"T{i}", "country": "HR"} for i in range(200)]
+    base = datetime(2023, 8, 1, tzinfo=timezone.utc)
+    matches = []
+    for i in range(n_matches):
+        h, a = i % 200, (i * 7 + 1) % 200
+        matches.append({
+            "source": "sofascore", "source_event_id": 10_000_000 + i,
+            "home_team": f"Team {h}", "away_team": f"Team {a}",
+            "home_score": (i + seed_minute) % 4, "away_score": i % 3,
+            "start_time": (base + timedelta(hours=i)).isoformat(), "status": "finished",
+            "competition": "Bench League",
+        })
+    return teams, matches
+
+
+def events_for(match_ids, seed_minute: int = 0):
+    rows = []
+    for mid in match_ids:
+        for k in range(8):
+            rows.append({
+                "match_id": mid, "minute": 5 + k * 10, "event_type": "goal" if k % 3 == 0 else "yellow_card",
+                "team": "home" if k % 2 else "away", "player_name": f"Player {k}",
+                "description": f"bench {seed_minute}",
+            })
+    return rows
+
+
+def baseline(conn, table: str, rows, key_cols, batch: int = 50) -> float:
+    if not rows:
+        return 0.0
+    cols = list(rows[0].keys())
+    upd = [c for c in cols if c not in key_cols]
+    sql = (
+        f"INSERT INTO {table} ({', '.join(cols)}) VALUES ({', '.join(['%s'] * len(cols))}) "
+        f"ON CONFLICT ({', '.join(key_cols)}) DO UPDATE SET " + ", ".join(f"{c}=EXCLUDED.{c}" for c in upd)
+    )
+    t0 = time.time()
+    with conn.cursor() as cur:
+        for i in range(0, len(rows), batch):
+            for r in rows[i:i + batch]:
+                cur.execute(sql, [r[c] for c in cols])
+            conn.commit()
+    return time.time() - t0
+
+
+def main():
+    ap = argparse.ArgumentParser(description="COPY bulk-load benchmark")
+    ap.add_argument("--dsn", required=True)
+    ap.add_argument("--matches", type=int, default=3000)
+    ap.add_argument("--repeat", action="store_true", help="second pass over existing keys (update path)")
+    args = ap.parse_args()
+
+    sink = PgBulkClient(args.dsn)
+    conn = sink._conn
+    with conn.cursor() as cur:
+        cur.execute(DDL)
+    conn.commit()
+
+    teams, matches = synth(args.matches)
+    results = []
+
+    # --- baseline (row-at-a-time, committed per batch) ---
+    t = baseline(conn, "teams", teams, ["sofascore_id"])
+    results.append(("teams", "row", len(teams), t))
+    t = baseline(conn, "matches", matches, ["source", "source_event_id"])
+    results.append(("matches", "row", len(matches), t))
+    mids = [r[0] for r in sink._query("SELECT id FROM matches ORDER BY source_event_id", ())]
+    evs = events_for(mids)
+    t = baseline(conn, "match_events", evs, ["match_id", "minute", "event_type", "team", "player_name"])
+    results.append(("match_events", "row", len(evs), t))
+
+    with conn.cursor() as cur:
+        cur.execute("TRUNCATE teams, matches, match_events")
+    conn.commit()
+
+    # --- bulk path through the regular DatabaseClient API ---
+    passes = 2 if args.repeat else 1
+    for p in range(passes):
+        teams, matches = synth(args.matches, seed_minute=p)
+        sink.upsert_teams(teams)
+        sink.batch_upsert_matches(matches, batch_size=1000)
+        mids = [r[0] for r in sink._query("SELECT id FROM matches ORDER BY source_event_id", ())]
+        sink.upsert_match_events(events_for(mids, seed_minute=p))
+        for table, st in sink.log_throughput().items():
+            results.append((table, f"copy#{p + 1}", st["rows"], st["seconds"]))
+
+    counts = {t: sink._query(f"SELECT count(*) FROM {t}", ())[0][0] for t in ("teams", "matches", "match_events")}
+    print("\n📊 rows/s per table")
+    print(f"{'table':<14} {'path':<8} {'rows':>8} {'secs':>8} {'rows/s':>10}")
+    for table, path, rows, secs in results:
+        print(f"{table:<14} {path:<8} {rows:>8} {secs:>8.2f} {rows / secs if secs else 0:>10.0f}")
+    print(f"final counts: {counts}")
+    sink.close()
+
+
+if __name__ == "__main__":
+    main()
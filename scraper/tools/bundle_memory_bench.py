@@ -0,0 +1,83 @@
+# scraper/tools/bundle_memory_bench.py
+"""
+Memory benchmark: bytes per bundle row as plain dicts vs core.records slotted rows.
+
+Builds the same synthetic rows for lineups / events / player_stats / shots /
+average_positions both ways and measures retained heap with tracemalloc (values are
+shared small ints/strings, so the numbers are the container overhead a bundle pays).
+
+Usage:
+    python tools/bundle_memory_bench.py --rows 50000
+"""
+import argparse
+import gc
+import sys
+import tracemalloc
+from pathlib import Path
+
+scraper_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(scraper_dir))
+
+from core.records import AvgPositionRow, EventRow, LineupRow, PlayerStatRow, ShotRow  # noqa: E402
+
+SHAPES = {
+    "lineups": (LineupRow, lambda i: {
+        "source": "sofascore", "source_event_id": 12_000_000 + i // 40, "team_sofascore_id": 17,
+        "player_sofascore_id": 800_000 + i, "jersey_number": i % 30, "position": "M",
+        "is_starting": i % 40 < 22, "is_captain": False, "_subbed_in_time": None, "_subbed_out_time": None,
+    }),
+    "events": (EventRow, lambda i: {
+        "source": "sofascore", "source_event_id": 12_000_000 + i // 15, "minute": i % 90,
+        "event_type": "yellow_card", "team": "home", "player_name": "Player",
+        "player_sofascore_id": 800_000 + i, "assist_player_sofascore_id": None,
+        "player_in_sofascore_id": None, "player_out_sofascore_id": None, "description": "Foul",
+    }),
+    "player_stats": (PlayerStatRow, lambda i: {
+        "source": "sofascore", "source_event_id": 12_000_000 + i // 30, "team": "home",
+        "player_sofascore_id": 800_000 + i, "team_sofascore_id": 17, "goals": 0, "assists": 0,
+        "passes": 41, "tackles": 2, "shots_total": 1, "shots_on_target": 0, "minutes_played": 90,
+        "touches": 60, "rating": 7.1, "is_substitute": False,
+    }),
+    "shots": (ShotRow, lambda i: {
+        "source": "sofascore", "source_event_id": 12_000_000 + i // 25, "player_sofascore_id": 800_000 + i,
+        "assist_player_sofascore_id": None, "minute": i % 90, "x": 88.5, "y": 41.0, "xg": 0.12,
+        "body_part": "right-foot", "situation": "regular", "is_penalty": None, "is_own_goal": None,
+        "outcome": "saved", "team": "home", "isHome": True, "source_item_id": 5_000_000 + i,
+    }),
+    "average_positions": (AvgPositionRow, lambda i: {
+        "source": "sofascore", "source_event_id": 12_000_000 + i // 30, "player_sofascore_id": 800_000 + i,
+        "avg_x": 45.2, "avg_y": 51.0, "side": "home",
+    }),
+}
+
+
+def measure(build, n: int) -> float:
+    gc.collect()
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    rows = [build(i) for i in range(n)]
+    used = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+    del rows
+    return used / n
+
+
+def main():
+    ap = argparse.ArgumentParser(description="bundle row memory benchmark")
+    ap.add_argument("--rows", type=int, default=50000, help="rows per table")
+    args = ap.parse_args()
+
+    # pre-build value dicts so both variants measure only the row container they keep
+    print(f"{'table':<18} {'dict B/row':>11} {'record B/row':>13} {'saved':>7}")
+    for table, (cls, make) in SHAPES.items():
+        src = [make(i) for i in range(args.rows)]
+        b_dict = measure(lambda i: dict(src[i]), args.rows)
+        b_rec = measure(lambda i: cls(**src[i]), args.rows)
+        if any(cls(**r).to_dict() != r for r in src[:100]):
+            print(f"❌ {table}: record round-trip differs")
+            sys.exit(1)
+        print(f"{table:<18} {b_dict:>11.0f} {b_rec:>13.0f} {1 - b_rec / b_dict:>6.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+# scraper/tools/clean_rows_bench.py
+"""
+Micro-benchmark: generic _clean_rows loop vs precompiled per-table coercers.
+
+Builds representative bundle rows (matches, teams, players, lineups, player_stats,
+match_stats, shots), checks both cleaners produce identical output and prints rows/s.
+
+Usage:
+    python tools/clean_rows_bench.py --rows 20000 --repeat 3
+"""
+import argparse
+import logging
+import random
+import sys
+import time
+from pathlib import Path
+
+scraper_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(scraper_dir))
+
+from core.database import _clean_rows, _clean_rows_generic  # noqa: E402
+
+
+def make_rows(table: str, n: int, rnd: random.Random):
+    rows = []
+    for i in range(n):
+        if table == "matches":
+            r = {
+                "home_team": f"Home {i}", "away_team": f"Away {i}", "home_score": str(rnd.randint(0, 4)),
+                "away_score": rnd.randint(0, 4), "start_time": "2024-09-01T18:00:00+00:00", "status": "finished",
+                "competition": "Premier League", "source": "sofascore", "source_event_id": 12_000_000 + i,
+                "minute": rnd.choice([None, "45", 90]), "status_type": "finished", "season": {"name": "24/25", "year": "24/25"},
+                "round": {"round": rnd.randint(1, 38)}, "current_period_start": "2024-09-01T19:02:00Z",
+                "league_priority": 90, "venue": "", "raw_payload": {"x": 1}, "home_team_sofascore_id": 17,
+            }
+        elif table == "teams":
+            r = {"name": f"Team {i}", "short_name": "T", "country": "England", "sofascore_id": 1000 + i,
+                 "founded": 1878, "venue": "Stadium", "venue_capacity": "52000", "logo_url": None}
+        elif table == "players":
+            r = {"full_name": f"Player {i}", "position": "M", "number": str(rnd.randint(1, 99)), "nationality": "HR",
+                 "age": None, "height_cm": "181", "sofascore_id": 500_000 + i,
+                 "date_of_birth": rnd.choice([946684800, "1995-04-12", "born 1990", "", 1999])}
+        elif table == "lineups":
+            r = {"match_id": f"m{i // 22}", "team_id": "t", "player_id": f"p{i}", "position": "D",
+                 "jersey_number": "4", "is_starting": True, "is_captain": False, "player_sofascore_id": i}
+        elif table == "player_stats":
+            r = {"match_id": f"m{i // 22}", "player_id": f"p{i}", "team_id": "t", "goals": "1", "assists": 0,
+                 "shots_total": "3", "shots_on_target": 1, "passes": "45", "tackles": "2", "rating": "7.3",
+                 "minutes_played": 90, "touches": "61", "is_substitute": False, "source_event_id": 1}
+        elif table == "match_stats":
+            r = {"match_id": f"m{i}", "team_id": "t", "possession": "54%", "shots_total": 14, "shots_on_target": "5",
+                 "corners": "6", "fouls": 11, "offsides": "2", "yellow_cards": 1, "red_cards": "0", "passes": "512",
+                 "pass_accuracy": "86%", "xg": "1.42", "saves": 3, "updated_at": "2024-09-01T20:00:00Z"}
+        else:  # shots
+            r = {"match_id": f"m{i // 25}", "team_id": "t", "player_id": f"p{i % 22}", "minute": str(rnd.randint(1, 90)),
+                 "x": "88.2", "y": 41.0, "xg": "0.12", "body_part": "right-foot", "situation": "regular",
+                 "is_penalty": False, "is_own_goal": False, "outcome": "saved", "source": "sofascore",
+                 "source_event_id": 1, "source_item_id": str(i)}
+        rows.append(r)
+    return rows
+
+
+def main():
+    ap = argparse.ArgumentParser(description="_clean_rows micro-benchmark")
+    ap.add_argument("--rows", type=int, default=20000, help="rows per table")
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+    logging.getLogger("core.database").setLevel(logging.WARNING)  # silence DOB diagnostics
+
+    rnd = random.Random(7)
+    tables = ["matches", "teams", "players", "lineups", "player_stats", "match_stats", "shots"]
+    print(f"{'table':<14} {'generic rows/s':>15} {'compiled rows/s':>16} {'speedup':>8}")
+    tot_g = tot_c = 0.0
+    for t in tables:
+        rows = make_rows(t, args.rows, rnd)
+        if _clean_rows_generic(t, rows) != _clean_rows(t, rows):
+            print(f"❌ {t}: compiled output differs from generic")
+            sys.exit(1)
+        best_g = best_c = float("inf")
+        for _ in range(args.repeat):
+            t0 = time.perf_counter(); _clean_rows_generic(t, rows); best_g = min(best_g, time.perf_counter() - t0)
+            t0 = time.perf_counter(); _clean_rows(t, rows); best_c = min(best_c, time.perf_counter() - t0)
+        tot_g += best_g; tot_c += best_c
+        print(f"{t:<14} {len(rows) / best_g:>15.0f} {len(rows) / best_c:>16.0f} {best_g / best_c:>7.2f}x")
+    n = args.rows * len(tables)
+    print(f"{'all':<14} {n / tot_g:>15.0f} {n / tot_c:>16.0f} {tot_g / tot_c:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,8 @@
 # scraper/tools/cleanup_duplicates.py - ČISTI DUPLIKATE IZ BAZE
 import sys
+import time
+import heapq
+import itertools
 import argparse
 from pathlib import Path
 from datetime import datetime, timezone
@@ -24,130 +27,155 @@ class DuplicateCleanup:
             'kept_matches': 0
         }
     
+    DELETE_BATCH = 200
+    PROGRESS_EVERY = 5000
+
+    @staticmethod
+    def _signature(match: dict) -> tuple:
+        """(home, away, start hour, competition) – ključ za grupiranje duplikata"""
+        start_time = match.get('start_time', '')
+        if start_time:
+            # Normiraj na sat (ignore minute differences)
+            try:
+                dt = datetime.fromisoformat(start_time.replace('Z', '+00:00'))
+                normalized_time = dt.replace(minute=0, second=0, microsecond=0).isoformat()
+            except Exception:
+                normalized_time = start_time[:13]  # fallback: YYYY-MM-DDTHH
+        else:
+            normalized_time = "unknown"
+        return (
+            (match.get('home_team') or '').strip().lower(),
+            (match.get('away_team') or '').strip().lower(),
+            normalized_time,
+            (match.get('competition') or '').strip().lower()
+        )
+
+    def _iter_groups(self):
+        """Stream matches ordered by (start_time, id) and yield (signature, rows) per group.
+
+        Rows arrive in start_time order, so once the stream leaves an hour bucket every
+        group of that bucket is complete and can be emitted – memory is one hour of matches.
+        Matches without start_time can't be keyset-paged on it; they follow in a second,
+        id-ordered pass and all land in the "unknown" bucket.
+        """
+        cols = "id,home_team,away_team,start_time,competition,status,updated_at,source"
+        with_time = db.scan(
+            "matches", cols, order_by=("start_time", "id"), page_size=1000,
+            where=lambda q: q.not_.is_("start_time", "null"),
+        )
+        without_time = db.scan(
+            "matches", cols, order_by=("id",), page_size=1000,
+            where=lambda q: q.is_("start_time", "null"),
+        )
+        bucket_key = None
+        bucket = defaultdict(list)
+        t0 = time.time()
+        for match in itertools.chain(with_time, without_time):
+            self.stats['total_matches'] += 1
+            sig = self._signature(match)
+            if sig[2] != bucket_key:
+                yield from bucket.items()
+                bucket = defaultdict(list)
+                bucket_key = sig[2]
+            bucket[sig].append(match)
+            n = self.stats['total_matches']
+            if n % self.PROGRESS_EVERY == 0:
+                rate = n / max(time.time() - t0, 1e-6)
+                logger.info(
+                    f"  ⏳ scanned={n:,} dup_groups={self.stats['duplicate_groups']:,} "
+                    f"to_remove={self.stats['duplicates_removed']:,} ({rate:.0f} rows/s) at {bucket_key}"
+                )
+        yield from bucket.items()
+
+    def _flush_deletes(self, ids: list, dry_run: bool) -> int:
+        """Batched delete ... WHERE id IN (...); db.delete_ids splits failing batches to isolate bad ids."""
+        if not ids:
+            return 0
+        if dry_run:
+            return len(ids)
+        return db.delete_ids("matches", ids, batch_size=self.DELETE_BATCH)
+
     def find_duplicates(self) -> dict:
-        """Pronađi duplikate u bazi"""
+        """Pronađi duplikate u bazi (streaming, bez brisanja)"""
         logger.info("🔍 Searching for duplicate matches...")
-        
+        duplicate_groups = {}
         try:
-            # Dohvati sve utakmice
-            matches = db.client.table("matches").select(
-                "id", "home_team", "away_team", "start_time", "competition", 
-                "status", "updated_at", "source"
-            ).execute()
-            
-            self.stats['total_matches'] = len(matches.data)
-            logger.info(f"📊 Found {self.stats['total_matches']} total matches in database")
-            
-            # Grupiraj po ključnim atributima
-            match_groups = defaultdict(list)
-            
-            for match in matches.data:
-                # Kreiraj signature za grupiranje
-                start_time = match.get('start_time', '')
-                if start_time:
-                    # Normiraj na sat (ignore minute differences)
-                    try:
-                        dt = datetime.fromisoformat(start_time.replace('Z', '+00:00'))
-                        normalized_time = dt.replace(minute=0, second=0, microsecond=0).isoformat()
-                    except Exception:
-                        normalized_time = start_time[:13]  # fallback: YYYY-MM-DDTHH
-                else:
-                    normalized_time = "unknown"
-                signature = (
-                    (match.get('home_team') or '').strip().lower(),
-                    (match.get('away_team') or '').strip().lower(),
-                    normalized_time,
-                    (match.get('competition') or '').strip().lower()
-                )
-                match_groups[signature].append(match)
-            
-            # Filtriraj samo grupe s duplikatima
-            duplicate_groups = {k: v for k, v in match_groups.items() if len(v) > 1}
-            
-            self.stats['duplicate_groups'] = len(duplicate_groups)
-            
-            logger.info(f"🚨 Found {len(duplicate_groups)} groups with duplicates:")
-            
-            # Prikaži top 10 najgorih slučajeva
-            sorted_groups = sorted(duplicate_groups.items(), key=lambda x: len(x[1]), reverse=True)
-            
-            for i, (signature, matches) in enumerate(sorted_groups[:10]):
-                home, away, time, comp = signature
-                logger.info(f"  {i+1}. {home.title()} vs {away.title()} ({comp.title()}): {len(matches)} copies")
-            
-            if len(sorted_groups) > 10:
-                logger.info(f"  ... and {len(sorted_groups) - 10} more duplicate groups")
-            
-            return duplicate_groups
-            
+            for signature, matches in self._iter_groups():
+                if len(matches) > 1:
+                    duplicate_groups[signature] = matches
+                    self.stats['duplicate_groups'] += 1
         except Exception as e:
             logger.error(f"❌ Failed to find duplicates: {e}")
-            return {}
-    
-    def cleanup_duplicates(self, duplicate_groups: dict, dry_run: bool = True) -> int:
-        """Očisti duplikate - zadrži najnoviji"""
-        if not duplicate_groups:
-            logger.info("✅ No duplicates to clean")
-            return 0
-        
-        logger.info(f"🧹 Cleaning {len(duplicate_groups)} duplicate groups (dry_run={dry_run})...")
-        
+        logger.info(f"📊 Found {self.stats['total_matches']} total matches, {len(duplicate_groups)} duplicate groups")
+        return duplicate_groups
+
+    def cleanup_duplicates(self, duplicate_groups, dry_run: bool = True) -> int:
+        """Očisti duplikate - zadrži najnoviji; deletes idu u batchevima preko in_("id", ...).
+
+        `duplicate_groups` may be a dict or any iterable of (signature, matches) – run_cleanup
+        passes the live stream so the table is never held in memory.
+        """
+        streamed = not isinstance(duplicate_groups, dict)
+        items = duplicate_groups if streamed else duplicate_groups.items()
+        logger.info(f"🧹 Cleaning duplicate groups (dry_run={dry_run})...")
+
         removed_count = 0
-        
-        for signature, matches in duplicate_groups.items():
-            home, away, time, comp = signature
-            
-            # Sortiraj po updated_at (najnoviji prvo)
-            sorted_matches = sorted(
-                matches, 
-                key=lambda x: x.get('updated_at', ''), 
-                reverse=True
-            )
-            
-            # Zadrži prvi (najnoviji), obriši ostale
+        pending = []
+        worst = []  # top 10 groups by copies (min-heap)
+        for signature, matches in items:
+            if len(matches) < 2:
+                continue
+            if streamed:
+                self.stats['duplicate_groups'] += 1
+            home, away, _time, comp = signature
+
+            # Sortiraj po updated_at (najnoviji prvo), zadrži prvi
+            sorted_matches = sorted(matches, key=lambda x: x.get('updated_at') or '', reverse=True)
             to_keep = sorted_matches[0]
             to_remove = sorted_matches[1:]
-            
-            logger.info(f"  📌 {home.title()} vs {away.title()}: keeping 1, removing {len(to_remove)}")
-            logger.debug(f"    Keeping: {to_keep['id']} (updated: {to_keep.get('updated_at', 'unknown')})")
-            
-            for match in to_remove:
-                if not dry_run:
-                    try:
-                        db.client.table("matches").delete().eq("id", match["id"]).execute()
-                        removed_count += 1
-                        logger.info(f"    Removed: {match['id']}")
-                    except Exception as e:
-                        logger.error(f"    Failed to remove {match['id']}: {e}")
-                else:
-                    removed_count += 1
-                    logger.debug(f"    Would remove: {match['id']}")
-        
+            logger.debug(f"  📌 {home.title()} vs {away.title()}: keep {to_keep['id']}, remove {len(to_remove)}")
+
+            heapq.heappush(worst, (len(matches), home, away, comp))
+            if len(worst) > 10:
+                heapq.heappop(worst)
+
+            pending.extend(m["id"] for m in to_remove)
+            self.stats['duplicates_removed'] += len(to_remove)
+            if len(pending) >= self.DELETE_BATCH:
+                removed_count += self._flush_deletes(pending, dry_run)
+                pending = []
+        removed_count += self._flush_deletes(pending, dry_run)
+
+        if worst:
+            logger.info("🚨 Worst duplicate groups:")
+            for i, (n, home, away, comp) in enumerate(sorted(worst, reverse=True)):
+                logger.info(f"  {i+1}. {home.title()} vs {away.title()} ({comp.title()}): {n} copies")
+
         self.stats['duplicates_removed'] = removed_count
         self.stats['kept_matches'] = self.stats['total_matches'] - removed_count
-        
+
         if dry_run:
             logger.info(f"🔍 DRY RUN: Would remove {removed_count} duplicate matches")
         else:
             logger.info(f"✅ CLEANED: Removed {removed_count} duplicate matches")
-        
+
         return removed_count
-    
+
     def run_cleanup(self, dry_run: bool = True):
-        """Pokreni potpuni cleanup process"""
+        """Pokreni potpuni cleanup process – jedan streaming prolaz (scan → grupe → batch delete)"""
         logger.info("🚀 Starting duplicate cleanup process...")
-        
-        # 1. Find duplicates
-        duplicate_groups = self.find_duplicates()
-        
-        if not duplicate_groups:
+        t0 = time.time()
+
+        try:
+            self.cleanup_duplicates(self._iter_groups(), dry_run=dry_run)
+        except Exception as e:
+            logger.error(f"❌ Cleanup failed mid-stream: {e}")
+
+        logger.info(f"⏱️ Done in {time.time() - t0:.1f}s")
+        if not self.stats['duplicate_groups']:
             logger.info("🎉 No duplicates found! Database is clean.")
             return
-        
-        # 2. Clean duplicates
-        self.cleanup_duplicates(duplicate_groups, dry_run=dry_run)
-        
-        # 3. Print summary
+
         self.print_summary(dry_run)
     
     def print_summary(self, dry_run: bool):
@@ -0,0 +1,137 @@
+# scraper/tools/columnar_bundle_bench.py
+"""
+Benchmark: row-list vs columnar (core.columnar) bundle tables on a large backfill day.
+
+For lineups / events / player_stats it measures retained heap of the bundle table and
+the time of the store_bundle prep for that table: FK mapping (match/player/team),
+whitelist + coercion and conflict-key dedupe, up to the upsert payload. The upsert
+itself is captured, not sent; both paths must produce the same payload.
+
+Usage:
+    python tools/columnar_bundle_bench.py --matches 400
+"""
+import argparse
+import gc
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+scraper_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(scraper_dir))
+
+from core.columnar import ColumnarTable, np  # noqa: E402
+from core.database import DatabaseClient  # noqa: E402
+from core.records import EventRow, LineupRow, PlayerStatRow  # noqa: E402
+
+
+class _Capture(DatabaseClient):
+    """DatabaseClient whose _upsert only records the payload (no connection)."""
+
+    def __init__(self):
+        self.payload = []
+
+    def _upsert(self, table, payload, on_conflict=None, **kw):
+        self.payload = payload
+        return (len(payload), 0)
+
+
+def make_day(n_matches: int, rnd: random.Random):
+    lineups, events, stats = [], [], []
+    for m in range(n_matches):
+        eid = 12_000_000 + m
+        for side, tsid in (("home", 2 * m + 1), ("away", 2 * m + 2)):
+            for i in range(20):
+                psid = 800_000 + m * 40 + (i if side == "home" else 20 + i)
+                lineups.append(LineupRow(source="sofascore", source_event_id=eid, team_sofascore_id=tsid, side=side,
+                                         player_sofascore_id=psid, jersey_number=i + 1, position="DMFG"[i % 4],
+                                         is_starting=i < 11, is_captain=i == 0))
+                if i < 14:
+                    stats.append(PlayerStatRow(source="sofascore", source_event_id=eid, team=side, player_sofascore_id=psid,
+                                               team_sofascore_id=tsid, goals=rnd.choice([0, 0, 0, 1]), assists=0,
+                                               passes=rnd.randint(5, 80), tackles=rnd.randint(0, 6), minutes_played=90 if i < 11 else 25,
+                                               touches=rnd.randint(10, 100), rating=round(rnd.uniform(5.5, 8.5), 1)))
+        for k in range(12):
+            events.append(EventRow(source="sofascore", source_event_id=eid, minute=rnd.randint(1, 90),
+                                   event_type=rnd.choice(["goal", "yellow_card", "substitution"]), team=rnd.choice(["home", "away"]),
+                                   player_name=f"Player {rnd.randint(1, 40)}", player_sofascore_id=800_000 + m * 40 + rnd.randint(0, 39),
+                                   description="Regular"))
+    return {"lineups": lineups, "events": events, "player_stats": stats}
+
+
+def prep_rows(table, rows, maps):
+    mid_map, team_map, player_map = maps
+    out = []
+    for r in rows:
+        mid = mid_map.get(r.get("source_event_id"))
+        if not mid:
+            continue
+        pr = {k: v for k, v in r.items() if k not in ("source_event_id", "side")}
+        pr["match_id"] = mid
+        tsid = r.get("team_sofascore_id")
+        if tsid and tsid in team_map:
+            pr["team_id"] = team_map[tsid]
+        psid = r.get("player_sofascore_id")
+        if psid and psid in player_map:
+            pr["player_id"] = player_map[psid]
+        out.append(pr)
+    sink = _Capture()
+    {"lineups": sink.upsert_lineups, "match_events": sink.upsert_match_events,
+     "player_stats": sink.upsert_player_stats}[table](out)
+    return sink.payload
+
+
+def prep_columnar(table, ct, maps):
+    mid_map, team_map, player_map = maps
+    ct = ct.map("source_event_id", mid_map, "match_id").where_present("match_id")
+    ct = ct.map("team_sofascore_id", team_map, "team_id")
+    ct = ct.map("player_sofascore_id", player_map, "player_id").drop("source_event_id", "side")
+    sink = _Capture()
+    sink.upsert_columnar(table, ct)
+    return sink.payload
+
+
+def heap(build):
+    gc.collect()
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    obj = build()
+    used = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+    return obj, used
+
+
+def main():
+    ap = argparse.ArgumentParser(description="row vs columnar bundle benchmark")
+    ap.add_argument("--matches", type=int, default=400, help="matches in the synthetic day")
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    day = make_day(args.matches, random.Random(7))
+    maps = (
+        {12_000_000 + m: f"match-{m}" for m in range(args.matches)},
+        {t: f"team-{t}" for t in range(1, 2 * args.matches + 1)},
+        {800_000 + p: f"player-{p}" for p in range(40 * args.matches)},
+    )
+    print(f"numpy: {'yes' if np is not None else 'no (array fallback)'}")
+    print(f"{'table':<14} {'rows':>7} {'rows MB':>8} {'col MB':>7} {'rows ms':>8} {'col ms':>7}")
+    for name, table in (("lineups", "lineups"), ("events", "match_events"), ("player_stats", "player_stats")):
+        rows = day[name]
+        _, b_rows = heap(lambda: [r.copy() for r in rows])
+        ct, b_col = heap(lambda: ColumnarTable.from_rows(rows))
+        expect = prep_rows(table, rows, maps)
+        got = prep_columnar(table, ct, maps)
+        key = lambda r: sorted((k, repr(v)) for k, v in r.items())
+        if sorted(map(key, expect)) != sorted(map(key, got)):
+            print(f"❌ {name}: payloads differ ({len(expect)} vs {len(got)})")
+            sys.exit(1)
+        t_rows = t_col = float("inf")
+        for _ in range(args.repeat):
+            t0 = time.perf_counter(); prep_rows(table, rows, maps); t_rows = min(t_rows, time.perf_counter() - t0)
+            t0 = time.perf_counter(); prep_columnar(table, ct, maps); t_col = min(t_col, time.perf_counter() - t0)
+        print(f"{name:<14} {len(rows):>7} {b_rows / 2**20:>8.1f} {b_col / 2**20:>7.1f} {t_rows * 1e3:>8.1f} {t_col * 1e3:>7.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+# scraper/tools/compact_state_history.py - SAŽIMA STARU match_state_history
+"""
+Retention / compaction job for match_state_history.
+
+Rows older than --compact-days keep only state changes (status, period, score) per match;
+repeated per-minute snapshots written before change-only history are deleted. With
+--retention-days > 0, rows older than that are removed entirely.
+
+Usage:
+    python tools/compact_state_history.py                      # dry run, config defaults
+    python tools/compact_state_history.py --execute --compact-days 2 --retention-days 180
+"""
+import sys
+import argparse
+from pathlib import Path
+
+# Add scraper to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from core.database import db
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compact / expire match_state_history')
+    parser.add_argument('--execute', action='store_true',
+                       help='Actually delete rows (default is dry run)')
+    parser.add_argument('--compact-days', type=int, default=None,
+                       help='Downsample rows older than N days (default DB_HISTORY_COMPACT_DAYS)')
+    parser.add_argument('--retention-days', type=int, default=None,
+                       help='Delete rows older than N days, 0 = keep (default DB_HISTORY_RETENTION_DAYS)')
+    args = parser.parse_args()
+
+    try:
+        st = db.compact_state_history(
+            compact_days=args.compact_days,
+            retention_days=args.retention_days,
+            dry_run=not args.execute,
+        )
+        verb = "removed" if args.execute else "would remove"
+        logger.info(f"🧹 match_state_history: scanned={st['scanned']} {verb}={st['deleted']} "
+                    f"(redundant={st['redundant']} expired={st['expired']})")
+    except Exception as e:
+        logger.error(f"❌ History compaction failed: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -101,22 +101,16 @@ class HealthChecker:
         logger.info("🔍 Checking live count consistency...")
         
         try:
-            # Raw count
-            raw_result = db.client.table("matches").select("count", count="exact").in_(
-                "status", ["live", "ht", "inprogress", "halftime"]
-            ).execute()
-            
-            raw_count = raw_result.count if hasattr(raw_result, 'count') else 0
-            
-            # Valid count (with filter)
-            valid_result = db.client.table("matches").select("start_time", "status").in_(
-                "status", ["live", "ht", "inprogress", "halftime"]
-            ).execute()
-            
+            # Raw + valid count u jednom streamu (keyset paginacija)
             now = datetime.now(timezone.utc)
+            raw_count = 0
             valid_count = 0
             
-            for match in valid_result.data:
+            for match in db.scan(
+                "matches", "id,start_time,status",
+                where=lambda q: q.in_("status", ["live", "ht", "inprogress", "halftime"]),
+            ):
+                raw_count += 1
                 start_time = datetime.fromisoformat(match['start_time'].replace('Z', '+00:00'))
                 hours_elapsed = (now - start_time).total_seconds() / 3600
                 if -0.25 <= hours_elapsed <= 3:
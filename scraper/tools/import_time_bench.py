@@ -0,0 +1,93 @@
+# scraper/tools/import_time_bench.py
+"""
+Import-time benchmark for CLI tools and core modules.
+
+Each module is imported in a fresh interpreter (best of --repeat runs); the report shows
+wall time including interpreter startup, the bare interpreter baseline, and whether the
+import pulled in heavy / side-effectful dependencies (supabase client, selenium, numpy).
+Nothing here needs credentials or a browser: imports must not validate config, build the
+DB client or hit the rankings API.
+
+Usage:
+    python tools/import_time_bench.py
+    python tools/import_time_bench.py --modules tools.get_match core.database --repeat 5
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+scraper_dir = Path(__file__).parent.parent
+
+DEFAULT_MODULES = [
+    "core.config",
+    "core.database",
+    "utils.leagues_filter",
+    "processors",
+    "pipeline.store",
+    "tools.get_match",
+    "tools.compact_state_history",
+    "tools.cleanup_duplicates",
+    "tools.health_check",
+    "fetch_loop",
+]
+HEAVY = ("supabase", "selenium", "numpy", "requests")
+
+_PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+import {mod}
+dt = time.perf_counter() - t0
+print(json.dumps({{"import_s": dt, "heavy": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def run(mod: str, env: dict):
+    t0 = time.perf_counter()
+    code = _PROBE.format(mod=mod, heavy=HEAVY) if mod else "pass"
+    p = subprocess.run([sys.executable, "-c", code], cwd=str(scraper_dir), env=env,
+                       capture_output=True, text=True)
+    wall = time.perf_counter() - t0
+    if p.returncode != 0:
+        return wall, None, p.stderr.strip().splitlines()[-1:] or ["?"]
+    last = [ln for ln in p.stdout.splitlines() if ln.startswith("{")]
+    return wall, json.loads(last[-1]) if last else None, []
+
+
+def main():
+    ap = argparse.ArgumentParser(description="import-time benchmark")
+    ap.add_argument("--modules", nargs="*", default=DEFAULT_MODULES)
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--budget", type=float, default=1.0, help="fail if a module's wall time exceeds this (s)")
+    args = ap.parse_args()
+
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join([str(scraper_dir), env.get("PYTHONPATH", "")]).rstrip(os.pathsep)
+    base = min(run("", env)[0] for _ in range(args.repeat))
+    print(f"interpreter baseline {base * 1000:.0f} ms")
+    print(f"{'module':<30} {'wall ms':>8} {'import ms':>10}  heavy deps loaded")
+    over = 0
+    for mod in args.modules:
+        best = None
+        for _ in range(args.repeat):
+            wall, info, err = run(mod, env)
+            if info is None:
+                print(f"{mod:<30} {'-':>8} {'-':>10}  import failed: {err[0]}")
+                break
+            if best is None or wall < best[0]:
+                best = (wall, info)
+        if best is None:
+            continue
+        wall, info = best
+        over += wall > args.budget
+        print(f"{mod:<30} {wall * 1000:>8.0f} {info['import_s'] * 1000:>10.0f}  {', '.join(info['heavy']) or '-'}")
+    if over:
+        print(f"❌ {over} module(s) over {args.budget:.1f}s")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
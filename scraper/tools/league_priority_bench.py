@@ -0,0 +1,146 @@
+# scraper/tools/league_priority_bench.py
+"""
+Benchmark: league priority / tracking name rules, linear scans vs the compiled matchers.
+
+A synthetic day repeats a few hundred distinct tournament names (priority leagues,
+synonyms, diacritics, cups, lower divisions) over thousands of events. The "legacy"
+variants are the previous Config.get_league_priority and should_track_competition name
+rules; both must return the same results as the current implementation. The event
+filter case adds the allow-list check and compares against should_track_event
+(decision memoised per uniqueTournament).
+No network: the rankings cache is marked fresh (no synthetic tournament is in it).
+
+Usage:
+    python tools/league_priority_bench.py --events 5000
+"""
+import argparse
+import random
+import sys
+import time
+import unicodedata
+from pathlib import Path
+
+scraper_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(scraper_dir))
+
+from core.config import Config  # noqa: E402
+from utils import leagues_filter as lf  # noqa: E402
+
+BASE_NAMES = list(Config.LEAGUE_PRIORITIES) + [
+    "UEFA Champions League, Knockout stage", "Premier League 2", "2. Bundesliga", "Serie A Women",
+    "LaLiga Hypermotion", "VriendenLoterij Eredivisie", "Liga Portugal Betclic", "Jupiler Pro League",
+    "Superliga Srbije", "Mozzart Bet Superliga", "Trendyol Süper Lig", "Brasileirão Série B",
+    "Primera División", "Liga Profesional de Fútbol", "Copa Libertadores", "USL Championship",
+    "Ekstraklasa", "Fortuna Liga", "NB I", "Süper Lig", "Prva HNL", "Ligat ha'Al", "Premiership",
+    "Úrvalsdeild", "Veikkausliiga", "Virsliga", "A Lyga", "Meistriliiga", "Erovnuli Liga",
+]
+
+
+def make_tournaments(n_distinct: int, rnd: random.Random):
+    out = []
+    for i in range(n_distinct):
+        name = BASE_NAMES[i] if i < len(BASE_NAMES) else f"{rnd.choice(BASE_NAMES)} {rnd.choice(['U19', 'U21', 'Reserve', 'Women', 'Group ' + chr(65 + i % 8)])}"
+        out.append({"id": 10_000 + i, "name": name, "slug": name.lower().replace(" ", "-")})
+    return out
+
+
+# ---- previous implementations -------------------------------------------------
+
+def legacy_priority(competition_name):
+    if not competition_name:
+        return 10
+    normalized_name = competition_name.lower().strip()
+    for league, priority in Config.LEAGUE_PRIORITIES.items():
+        if normalized_name == league.lower():
+            return priority
+    for league, priority in Config.LEAGUE_PRIORITIES.items():
+        if league.lower() in normalized_name:
+            return priority
+    if 'champions' in normalized_name:
+        return 120
+    if 'europa' in normalized_name:
+        return 110
+    if 'premier' in normalized_name:
+        return 90
+    if 'bundesliga' in normalized_name:
+        return 75
+    if 'serie a' in normalized_name:
+        return 80
+    return 10
+
+
+def legacy_norm(txt):
+    if not txt:
+        return ""
+    return unicodedata.normalize('NFKD', txt).encode('ascii', 'ignore').decode('ascii').strip().lower()
+
+
+def legacy_track(tournament):
+    tid = tournament.get("id")
+    tname = tournament.get("name") or ""
+    tslug = tournament.get("slug") or ""
+    if isinstance(tid, int) and tid in lf._cached_top_ids:
+        return True
+    if legacy_norm(tname) in lf._cached_top_names_norm:
+        return True
+    cname = legacy_norm(lf.NAME_SYNONYMS.get(legacy_norm(tname), tname))
+    cslug = legacy_norm(lf.NAME_SYNONYMS.get(legacy_norm(tslug.replace('-', ' ')), tslug.replace('-', ' ')))
+    return cname in lf._ALWAYS_INCLUDE_BY_NAME or cslug in lf._ALWAYS_INCLUDE_BY_NAME
+
+
+def legacy_event(event, allow_ids):
+    ut = event["tournament"]["uniqueTournament"]
+    return bool(allow_ids and ut.get("id") in allow_ids) or legacy_track(ut)
+
+
+def timed(fn, items):
+    t0 = time.perf_counter()
+    for x in items:
+        fn(x)
+    return time.perf_counter() - t0
+
+
+def main():
+    ap = argparse.ArgumentParser(description="league priority / tracking matcher benchmark")
+    ap.add_argument("--events", type=int, default=5000, help="events in the synthetic day")
+    ap.add_argument("--tournaments", type=int, default=300, help="distinct tournaments")
+    args = ap.parse_args()
+
+    lf._disk_loaded, lf._cached_at = True, time.time()  # no rankings load / refresh
+    rnd = random.Random(11)
+    tours = make_tournaments(args.tournaments, rnd)
+    day = [rnd.choice(tours) for _ in range(args.events)]
+    names = [t["name"] for t in day]
+    events = [{"id": i, "tournament": {"id": t["id"] + 50_000, "name": t["name"], "uniqueTournament": t}} for i, t in enumerate(day)]
+    allow = {t["id"] for t in tours[::7]}
+
+    if [legacy_priority(n) for n in names] != [Config.get_league_priority(n) for n in names]:
+        print("❌ priority results differ")
+        sys.exit(1)
+    if [legacy_track(t) for t in day] != [lf.should_track_competition(t) for t in day]:
+        print("❌ tracking results differ")
+        sys.exit(1)
+    if [legacy_event(e, allow) for e in events] != [lf.should_track_event(e, allow) for e in events]:
+        print("❌ event filter results differ")
+        sys.exit(1)
+
+    Config._priority_memo = {}
+    lf._norm.cache_clear()
+    lf._priority_name_hit.cache_clear()
+    lf.invalidate_tracking_cache()
+    cases = (
+        ("priority legacy", legacy_priority, names),
+        ("priority compiled", Config.get_league_priority, names),
+        ("tracking legacy", legacy_track, day),
+        ("tracking memoised", lf.should_track_competition, day),
+        ("event filter legacy", lambda e: legacy_event(e, allow), events),
+        ("event filter memo", lambda e: lf.should_track_event(e, allow), events),
+    )
+    print(f"{args.events} events, {args.tournaments} distinct tournaments")
+    for label, fn, items in cases:
+        secs = timed(fn, items)
+        print(f"{label:<20} {secs * 1e3:>7.2f} ms  ({secs * 1e9 / len(items):>6.0f} ns/event)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+# scraper/tools/lineup_index_bench.py
+"""
+Micro-benchmark: per-player stats selection/merge in enrich_event.
+
+Compares the old per-pid scans over both lineup side blocks (dedupe, bench selection,
+merge lookup, minutes check) with the pid -> node index from
+pipeline.enrichers.lineup_pid_index. Both variants touch the same nodes; only the
+lookup strategy differs.
+
+Usage:
+    python tools/lineup_index_bench.py --players 40 --events 2000
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+scraper_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(scraper_dir))
+
+from pipeline.enrichers import lineup_pid_index  # noqa: E402
+
+
+def make_lineups(n: int, rnd: random.Random):
+    sides = []
+    for base in (1_000_000, 2_000_000):
+        players = []
+        for i in range(n):
+            sub = i >= 11
+            players.append({
+                "player": {"id": base + i, "name": f"Player {base + i}"},
+                "substitute": sub,
+                "statistics": {"minutesPlayed": 0 if sub and rnd.random() < 0.6 else rnd.randint(1, 95)},
+            })
+        sides.append({"players": players})
+    return sides[0], sides[1]
+
+
+def stats_for(pid: int):
+    return {"minutesPlayed": 90, "goals": pid % 2, "totalPass": 40, "touches": 60}
+
+
+def is_unused_bench(entry):
+    mp = (entry.get("statistics") or {}).get("minutesPlayed")
+    return bool(entry.get("substitute")) and mp in (None, 0)
+
+
+def legacy(home, away):
+    pid_set = []
+    for side_block in (home, away):
+        for pl in (side_block.get("players") or []):
+            pid = (pl.get("player") or {}).get("id")
+            if pid and pid not in pid_set:
+                pid_set.append(pid)
+    selected = []
+    for pid in pid_set:
+        entry_ref = None
+        for side_block in (home, away):
+            for pl in (side_block.get("players") or []):
+                if (pl.get("player") or {}).get("id") == pid:
+                    entry_ref = pl
+                    break
+            if entry_ref:
+                break
+        if not (entry_ref and is_unused_bench(entry_ref)):
+            selected.append(pid)
+    merged = 0
+    for pid in selected:
+        block = stats_for(pid)
+        done = False
+        for side_block in (home, away):
+            for pl in (side_block.get("players") or []):
+                if (pl.get("player") or {}).get("id") == pid:
+                    pl["_merged"] = block
+                    done = True
+                    break
+            if done:
+                break
+        merged += done
+    for side_block in (home, away):
+        for pl in (side_block.get("players") or []):
+            _ = (pl.get("player") or {}).get("id") in selected and (pl.get("_merged") or {}).get("minutesPlayed")
+    return merged
+
+
+def indexed(home, away):
+    nodes = lineup_pid_index(home, away)
+    selected = [pid for pid, pl in nodes.items() if not is_unused_bench(pl)]
+    merged = 0
+    for pid in selected:
+        nodes[pid]["_merged"] = stats_for(pid)
+        merged += 1
+    ok = set(selected)
+    for pid, pl in nodes.items():
+        _ = pid in ok and (pl.get("_merged") or {}).get("minutesPlayed")
+    return merged
+
+
+def main():
+    ap = argparse.ArgumentParser(description="lineup pid index micro-benchmark")
+    ap.add_argument("--players", type=int, default=40, help="players per side")
+    ap.add_argument("--events", type=int, default=2000)
+    args = ap.parse_args()
+
+    rnd = random.Random(11)
+    lineups = [make_lineups(args.players, rnd) for _ in range(50)]
+    if any(legacy(h, a) != indexed(h, a) for h, a in lineups):
+        print("❌ merged counts differ")
+        sys.exit(1)
+    res = {}
+    for name, fn in (("legacy scan", legacy), ("pid index", indexed)):
+        t0 = time.perf_counter()
+        for i in range(args.events):
+            h, a = lineups[i % len(lineups)]
+            fn(h, a)
+        res[name] = time.perf_counter() - t0
+    for name, secs in res.items():
+        print(f"{name:<12} {args.events / secs:>10.0f} events/s  ({secs * 1e6 / args.events:.1f} µs/event)")
+    print(f"speedup {res['legacy scan'] / res['pid index']:.1f}x @ {args.players} players/side")
+
+
+if __name__ == "__main__":
+    main()
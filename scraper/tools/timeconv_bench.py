@@ -0,0 +1,85 @@
+# scraper/tools/timeconv_bench.py
+"""
+Micro-benchmark: per-value epoch/ISO parsing vs utils.timeconv (memoised + batch).
+
+The inputs mimic a backfill day: kickoff timestamps shared by many matches, ISO period
+starts, and player birth timestamps repeated across lineups/stats/players. The
+"inline" variants are the try/except conversions previously copied into processors,
+enrichment and the DB cleaner.
+
+Usage:
+    python tools/timeconv_bench.py --values 200000
+"""
+import argparse
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+scraper_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(scraper_dir))
+
+from utils.timeconv import to_date, to_date_many, to_iso, to_iso_many  # noqa: E402
+
+
+def inline_iso(v):
+    if isinstance(v, (int, float)):
+        if v > 10**12:
+            v = v / 1000.0
+        try:
+            return datetime.utcfromtimestamp(v).replace(tzinfo=timezone.utc).isoformat()
+        except Exception:
+            return None
+    try:
+        return datetime.fromisoformat(v.replace("Z", "+00:00")).astimezone(timezone.utc).isoformat()
+    except Exception:
+        return None
+
+
+def inline_date(v):
+    try:
+        ts = int(v)
+        if ts > 10**12:
+            ts //= 1000
+        return (datetime(1970, 1, 1, tzinfo=timezone.utc) + timedelta(seconds=ts)).date().isoformat()
+    except Exception:
+        return None
+
+
+def main():
+    ap = argparse.ArgumentParser(description="timestamp conversion micro-benchmark")
+    ap.add_argument("--values", type=int, default=200000)
+    args = ap.parse_args()
+
+    rnd = random.Random(3)
+    kickoffs = [1_700_000_000 + 900 * rnd.randint(0, 400) for _ in range(300)]
+    periods = [datetime.fromtimestamp(k + 60 * rnd.randint(0, 50), tz=timezone.utc).isoformat().replace("+00:00", "Z") for k in kickoffs]
+    births = [rnd.randint(-400_000_000, 1_100_000_000) for _ in range(6000)]
+    starts = [rnd.choice(kickoffs + periods) for _ in range(args.values)]
+    dobs = [rnd.choice(births) for _ in range(args.values)]
+
+    if [inline_iso(v) for v in starts[:2000]] != [to_iso(v) for v in starts[:2000]]:
+        print("❌ iso results differ")
+        sys.exit(1)
+    if [inline_date(v) for v in dobs[:2000]] != [to_date(v) for v in dobs[:2000]]:
+        print("❌ date results differ")
+        sys.exit(1)
+
+    cases = (
+        ("iso  inline", lambda: [inline_iso(v) for v in starts]),
+        ("iso  to_iso", lambda: [to_iso(v) for v in starts]),
+        ("iso  batch", lambda: to_iso_many(starts)),
+        ("date inline", lambda: [inline_date(v) for v in dobs]),
+        ("date to_date", lambda: [to_date(v) for v in dobs]),
+        ("date batch", lambda: to_date_many(dobs)),
+    )
+    for name, fn in cases:
+        t0 = time.perf_counter()
+        fn()
+        secs = time.perf_counter() - t0
+        print(f"{name:<13} {args.values / secs / 1e6:>6.2f} M values/s  ({secs * 1e9 / args.values:.0f} ns/value)")
+
+
+if __name__ == "__main__":
+    main()
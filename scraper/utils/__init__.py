@@ -6,13 +6,29 @@ Utils module - contains utility functions and helpers
 from .logger import get_logger, ScraperLogger
 from .data_validator import validator, DataValidator
 
-# Create global utility instances
-scraper_logger = ScraperLogger()
+_scraper_logger = None
+
+
+def enable_file_logging() -> ScraperLogger:
+    """Attach the daily logs/scraper_YYYYMMDD.log handler (idempotent); called by production entry points."""
+    global _scraper_logger
+    if _scraper_logger is None:
+        _scraper_logger = ScraperLogger()
+    return _scraper_logger
+
+
+def __getattr__(name):
+    # global file logger is created on first use (no logs/ dir or file handler on import)
+    if name == 'scraper_logger':
+        return enable_file_logging()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 __all__ = [
     'get_logger',
     'ScraperLogger',
     'scraper_logger',
+    'enable_file_logging',
     'validator',
     'DataValidator'
-]
\ No newline at end of file
+]
@@ -5,6 +5,12 @@ Provides a higher-level should_track_competition() decision that combines:
   * Explicit priority league names (taken from Config.LEAGUE_PRIORITIES)
   * Synonym / canonical name mapping (normalisation + diacritics stripping)
 
+The rankings cache never blocks the per-event path: it is loaded from disk
+(SOFA_RANKINGS_CACHE) on first use / warm_rankings_cache() at startup and, once
+older than SOFA_RANKINGS_TTL, refreshed by a background thread while the stale
+copy keeps serving (stale-while-revalidate). Failed refreshes back off
+(SOFA_RANKINGS_RETRY, doubling up to the TTL) instead of retrying per call.
+
 Intended as a complement / safety net to the stricter integer allow-list
 resolved in core.config (SOFA_TOURNAMENTS_ALLOW). If that allow-list is
 defined we still prefer it (fast membership test); this module helps catch
@@ -13,16 +19,15 @@ when operating without an env-provided allow list.
 """
 from __future__ import annotations
 
-from typing import Any, Dict, Set
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Hashable, Optional, Set
+import json
 import os
+import threading
 import time
 import unicodedata
 
-try:  # Optional – keep lightweight if requests not installed
-    import requests  # type: ignore
-except Exception:  # pragma: no cover
-    requests = None  # type: ignore
-
 from core.config import Config
 
 # ---- Env configuration (support both legacy & new var names) -----------------
@@ -35,9 +40,13 @@ SOFA_SEASON = int(os.getenv("SOFA_SEASON", os.getenv("RANKINGS_SEASON", "2026"))
 SOFA_RTYPE = int(os.getenv("SOFA_RTYPE", os.getenv("RANKINGS_TYPE", "1")))
 TOP_N = int(os.getenv("SOFA_TOPN", os.getenv("ALLOW_TOP_N", "50")))
 SOFA_TIMEOUT = float(os.getenv("SOFA_TIMEOUT", "12.0"))
+SOFA_RANKINGS_CACHE = os.getenv("SOFA_RANKINGS_CACHE", "cache/rankings_top.json")
+SOFA_RANKINGS_TTL = float(os.getenv("SOFA_RANKINGS_TTL", str(60 * 60 * 24)) or 60 * 60 * 24)
+SOFA_RANKINGS_RETRY = float(os.getenv("SOFA_RANKINGS_RETRY", "300") or 300)
 
 # ---- Normalisation helpers --------------------------------------------------
 
+@lru_cache(maxsize=8192)
 def _norm(txt: str) -> str:
     if not txt:
         return ""
@@ -98,22 +107,72 @@ NAME_SYNONYMS: Dict[str, str] = {
 _ALWAYS_INCLUDE_BY_NAME: Set[str] = {_norm(nm) for nm in Config.LEAGUE_PRIORITIES.keys()}
 
 # ---- Rankings cache (ID + normalised names) --------------------------------
+# Readers only look at the two sets; a refresh swaps both references at once.
 _cached_top_ids: Set[int] = set()
 _cached_top_names_norm: Set[str] = set()
 _cached_at: float = 0.0
-_CACHE_TTL = 60 * 60 * 24  # 24h
+_CACHE_TTL = SOFA_RANKINGS_TTL
+_rankings_version = 0  # bumped on every swap; invalidates memoised tracking decisions
+
+_refresh_lock = threading.Lock()
+_refresh_thread: Optional[threading.Thread] = None
+_disk_loaded = False
+_next_attempt: float = 0.0
+_retry_delay: float = SOFA_RANKINGS_RETRY
+
 
+def _cache_key() -> Dict[str, int]:
+    return {"season": SOFA_SEASON, "rtype": SOFA_RTYPE, "top_n": TOP_N}
 
-def _fetch_top_rankings() -> None:
+
+def _load_disk_cache() -> None:
+    """Seed the cache from SOFA_RANKINGS_CACHE (once). A file written for another
+    season / type / TOP_N is still served, but counts as expired."""
+    global _cached_top_ids, _cached_top_names_norm, _cached_at, _disk_loaded, _rankings_version
+    _disk_loaded = True
+    if not SOFA_RANKINGS_CACHE:
+        return
+    try:
+        data = json.loads(Path(SOFA_RANKINGS_CACHE).read_text(encoding="utf-8"))
+        ids = {int(x) for x in data.get("ids") or []}
+        names = {str(x) for x in data.get("names") or []}
+    except Exception:
+        return  # missing / corrupt -> background fetch
+    if not ids and not names:
+        return
+    _cached_top_ids, _cached_top_names_norm = ids, names
+    _rankings_version += 1
+    same = all(data.get(k) == v for k, v in _cache_key().items())
+    _cached_at = float(data.get("fetched_at") or 0.0) if same else 0.0
+
+
+def _save_disk_cache(ids: Set[int], names: Set[str], fetched_at: float) -> None:
+    if not SOFA_RANKINGS_CACHE:
+        return
+    try:
+        path = Path(SOFA_RANKINGS_CACHE)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        payload = dict(_cache_key(), fetched_at=fetched_at, ids=sorted(ids), names=sorted(names))
+        tmp.write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, path)
+    except Exception:
+        pass  # cache file is an optimisation only
+
+
+def _fetch_top_rankings() -> bool:
     """Populate cache with TOP_N rankings uniqueTournament ids + names.
 
-    Silent failure (best-effort) – keeps previous cache if request fails.
+    Best-effort – keeps previous cache if the request fails (returns False).
+    Blocking: called from the background refresher, not from the per-event path.
     """
-    global _cached_top_ids, _cached_top_names_norm, _cached_at
+    global _cached_top_ids, _cached_top_names_norm, _cached_at, _rankings_version
     url = SOFA_RANKINGS_URL.format(season=SOFA_SEASON, rtype=SOFA_RTYPE)
     try:
-        if requests is None:
-            return
+        try:  # Optional – imported on first fetch, not at module import
+            import requests  # type: ignore
+        except Exception:  # pragma: no cover
+            return False
         r = requests.get(url, timeout=SOFA_TIMEOUT, headers={
             "User-Agent": "Mozilla/5.0 (compatible; FavsBot/1.0)"
         })  # type: ignore
@@ -130,17 +189,63 @@ def _fetch_top_rankings() -> None:
                 top_ids.add(ut_id)
             if ut_name:
                 top_names.add(_norm(ut_name))
+        if not top_ids and not top_names:
+            return False  # empty payload – keep what we have
         _cached_top_ids = top_ids
         _cached_top_names_norm = top_names
         _cached_at = time.time()
+        _rankings_version += 1
+        _save_disk_cache(top_ids, top_names, _cached_at)
+        return True
     except Exception:
         # best-effort; keep stale cache
-        pass
+        return False
+
+
+def _refresh_worker() -> None:
+    global _refresh_thread, _next_attempt, _retry_delay
+    ok = False
+    try:
+        ok = _fetch_top_rankings()
+    finally:
+        with _refresh_lock:
+            if ok:
+                _retry_delay = SOFA_RANKINGS_RETRY
+            else:
+                _next_attempt = time.time() + _retry_delay
+                _retry_delay = min(_retry_delay * 2, max(_CACHE_TTL, SOFA_RANKINGS_RETRY))
+            _refresh_thread = None
 
 
 def _ensure_cache_fresh() -> None:
-    if time.time() - _cached_at > _CACHE_TTL or not _cached_top_ids:
-        _fetch_top_rankings()
+    """Non-blocking: serve whatever is cached, start a background refresh if expired."""
+    global _refresh_thread
+    if not _disk_loaded:
+        with _refresh_lock:
+            if not _disk_loaded:
+                _load_disk_cache()
+    now = time.time()
+    if now - _cached_at <= _CACHE_TTL or now < _next_attempt or _refresh_thread is not None:
+        return
+    with _refresh_lock:
+        if _refresh_thread is not None or now < _next_attempt:
+            return
+        _refresh_thread = threading.Thread(target=_refresh_worker, name="rankings-refresh", daemon=True)
+        _refresh_thread.start()
+
+
+def warm_rankings_cache(wait: float = 0.0) -> bool:
+    """Startup hook: load the disk cache and kick off a refresh if it is stale.
+
+    wait > 0 blocks up to that many seconds for the refresh (e.g. a one-off backfill
+    that would rather start with rankings than with names only). Returns True when
+    rankings are available.
+    """
+    _ensure_cache_fresh()
+    t = _refresh_thread
+    if wait > 0 and t is not None:
+        t.join(wait)
+    return bool(_cached_top_ids or _cached_top_names_norm)
 
 
 def canonical_name(name: str) -> str:
@@ -148,6 +253,20 @@ def canonical_name(name: str) -> str:
     return NAME_SYNONYMS.get(n, name)
 
 
+@lru_cache(maxsize=8192)
+def _priority_name_hit(tname: str, tslug: str) -> bool:
+    """Rule 3 of should_track_competition: name / slug canonicalised to a priority league.
+
+    Static (synonyms + Config.LEAGUE_PRIORITIES), so memoised per (name, slug); a day has
+    thousands of events but only a few hundred distinct tournaments.
+    """
+    cname = _norm(canonical_name(tname))
+    if cname in _ALWAYS_INCLUDE_BY_NAME:
+        return True
+    cslug = _norm(canonical_name(tslug.replace('-', ' ')))
+    return cslug in _ALWAYS_INCLUDE_BY_NAME
+
+
 def should_track_competition(tournament: Dict[str, Any]) -> bool:
     """Return True if competition should be processed.
 
@@ -169,14 +288,10 @@ def should_track_competition(tournament: Dict[str, Any]) -> bool:
     if _norm(tname) in _cached_top_names_norm:
         return True
     # 3) priority names (canonicalised)
-    cname = _norm(canonical_name(tname))
-    cslug = _norm(canonical_name(tslug.replace('-', ' ')))
-    if cname in _ALWAYS_INCLUDE_BY_NAME or cslug in _ALWAYS_INCLUDE_BY_NAME:
-        return True
-    return False
+    return _priority_name_hit(tname, tslug)
 
 
-def should_track_match(match: Dict[str, Any]) -> bool:
+def _track_match_uncached(match: Dict[str, Any]) -> bool:
     """High-level match filter tolerant of SofaScore nesting variants.
 
     SofaScore event JSON često ima strukturu:
@@ -188,8 +303,6 @@ def should_track_match(match: Dict[str, Any]) -> bool:
     uniqueTournament unutra, vraćali smo False (ne prati se) i ti eventi su
     otpali. Ova verzija prvo pokušava uniqueTournament, zatim bazni tournament.
     """
-    if not isinstance(match, dict):  # defensive
-        return False
     tour = (match.get("tournament") or {}) if isinstance(match.get("tournament"), dict) else {}
     # Ako postoji ugniježđeni uniqueTournament, preuzmi njega kao primarni objekt
     if isinstance(tour.get("uniqueTournament"), dict) and tour.get("uniqueTournament", {}).get("id"):
@@ -203,14 +316,103 @@ def should_track_match(match: Dict[str, Any]) -> bool:
     return should_track_competition(t)
 
 
+# ---- Memoised per-tournament decisions --------------------------------------
+# One table per allow-list (keyed by identity + size), all dropped when the rankings
+# change. Key: uniqueTournament.id, else ("t", id, name, slug) of the flat tournament.
+_decision_tables: Dict[Any, Dict[Hashable, bool]] = {}
+_decision_version = -1
+_MAX_DECISION_TABLES = 8
+# fast path: table of the allow-list used by the previous call
+_last_allow: Any = None
+_last_allow_len = 0
+_last_table: Optional[Dict[Hashable, bool]] = None
+
+
+def _allow_hit(utid: Any, allow_ids: Optional[Set[int]]) -> bool:
+    if not allow_ids or utid is None:
+        return False
+    if utid in allow_ids:
+        return True
+    try:
+        return int(utid) in allow_ids
+    except (TypeError, ValueError):
+        return False
+
+
+def invalidate_tracking_cache() -> None:
+    """Drop memoised decisions (e.g. after editing an allow-list set in place)."""
+    global _decision_tables, _last_table
+    _decision_tables = {}
+    _last_table = None
+
+
+def _decision_table(allow_ids: Optional[Set[int]]) -> Dict[Hashable, bool]:
+    global _decision_tables, _decision_version, _last_allow, _last_allow_len, _last_table
+    if _decision_version != _rankings_version:
+        _decision_tables = {}
+        _decision_version = _rankings_version
+    tkey = (id(allow_ids), len(allow_ids)) if allow_ids else None
+    table = _decision_tables.get(tkey)
+    if table is None:
+        if len(_decision_tables) >= _MAX_DECISION_TABLES:
+            _decision_tables = {}
+        table = _decision_tables[tkey] = {}
+    _last_allow, _last_allow_len, _last_table = allow_ids, len(allow_ids or ()), table
+    return table
+
+
+def should_track_event(match: Dict[str, Any], allow_ids: Optional[Set[int]] = None) -> bool:
+    """uniqueTournament id in allow_ids OR should_track_match(match), memoised per tournament.
+
+    A day has thousands of events but a few hundred tournaments: after the first event
+    of a tournament the decision is one dict lookup. Tables are per allow-list (identity +
+    size) and dropped when the rankings change.
+    """
+    if not isinstance(match, dict):
+        return False
+    _ensure_cache_fresh()
+    table = _last_table
+    if (table is None or allow_ids is not _last_allow or _decision_version != _rankings_version
+            or (allow_ids is not None and len(allow_ids) != _last_allow_len)):
+        table = _decision_table(allow_ids)
+
+    tour = match.get("tournament")
+    ut = tour.get("uniqueTournament") if isinstance(tour, dict) else None
+    utid = ut.get("id") if isinstance(ut, dict) else None
+    if utid:
+        key: Any = utid
+    else:
+        t = tour or match.get("league") or match.get("competition")
+        key = ("t", t.get("id"), t.get("name"), t.get("slug")) if isinstance(t, dict) else None
+    try:
+        hit = table.get(key) if key is not None else None
+    except TypeError:  # unhashable id / name
+        key = hit = None
+    if hit is not None:
+        return hit
+
+    decision = _allow_hit(utid, allow_ids) or _track_match_uncached(match)
+    if key is not None:
+        table[key] = decision
+    return decision
+
+
+def should_track_match(match: Dict[str, Any]) -> bool:
+    """Name / rankings based match filter (see _track_match_uncached), memoised per tournament."""
+    return should_track_event(match)
+
+
 def get_tracked_top_ids_snapshot() -> Set[int]:
     _ensure_cache_fresh()
     return set(_cached_top_ids)
 
 
 __all__ = [
+    "warm_rankings_cache",
     "should_track_competition",
     "should_track_match",
+    "should_track_event",
+    "invalidate_tracking_cache",
     "get_tracked_top_ids_snapshot",
     "canonical_name",
 ]
@@ -1,8 +1,15 @@
 # scraper/utils/logger.py - ISPRAVLJENA VERZIJA
+import atexit
+import json
 import logging
+import os
+import queue
 import sys
+import threading
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
 
 # 🔧 ISPRAVKA: Dodaj fallback za config import
 try:
@@ -10,19 +17,204 @@ try:
     LOG_LEVEL = config.LOG_LEVEL
     LOG_FORMAT = config.LOG_FORMAT
     LOG_DATE_FORMAT = config.LOG_DATE_FORMAT
+    LOG_ASYNC = config.LOG_ASYNC
+    LOG_QUEUE_SIZE = config.LOG_QUEUE_SIZE
+    LOG_JSON = config.LOG_JSON
+    LOG_RATE_WINDOW = config.LOG_RATE_WINDOW
+    LOG_RATE_BURST = config.LOG_RATE_BURST
 except ImportError:
     # Fallback ako config nije dostupan
     LOG_LEVEL = "INFO"
     LOG_FORMAT = "[%(asctime)s] %(levelname)s [%(name)s] %(message)s"
     LOG_DATE_FORMAT = "%H:%M:%S"
+    LOG_ASYNC = os.getenv("LOG_ASYNC", "1").lower() in {"1", "true", "yes"}
+    LOG_QUEUE_SIZE = 10000
+    LOG_JSON = os.getenv("LOG_JSON", "0").lower() in {"1", "true", "yes"}
+    LOG_RATE_WINDOW = 10.0
+    LOG_RATE_BURST = 5
 
-# Setup osnovnog formatiranja
-logging.basicConfig(
-    level=getattr(logging, LOG_LEVEL.upper()),
-    format=LOG_FORMAT,
-    datefmt=LOG_DATE_FORMAT,
-    stream=sys.stdout
-)
+
+# ------------------------------ hot-path helpers ------------------------------
+
+class Lazy:
+    """Deferred log argument: fn() runs only if the record is actually formatted.
+
+    logger.info("sample=%s", Lazy(lambda: rows[:2])) costs nothing when INFO is off,
+    suppressed by the rate limiter, or (async mode) until the writer thread formats it.
+    Pass data that is not mutated afterwards - formatting may happen later.
+    """
+
+    __slots__ = ("fn",)
+
+    def __init__(self, fn: Callable[[], Any]):
+        self.fn = fn
+
+    def __str__(self) -> str:
+        return str(self.fn())
+
+    __repr__ = __str__
+
+
+def log_extra(key: Optional[str] = None, *, sample: Optional[int] = None, **fields: Any) -> Dict[str, Any]:
+    """extra= for hot-path log calls.
+
+    key: rate-limit key (LOG_RATE_BURST per LOG_RATE_WINDOW); sample=N keeps 1 in N instead.
+    fields: structured values emitted as JSON keys when LOG_JSON=1.
+    """
+    return {"log_key": key, "log_sample": sample, "fields": fields}
+
+
+class RateLimitFilter(logging.Filter):
+    """Per-key rate limit / sampling for records carrying log_key (see log_extra).
+
+    Dropped records are counted and reported on the next record emitted for that key.
+    """
+
+    def __init__(self, window: float = LOG_RATE_WINDOW, burst: int = LOG_RATE_BURST):
+        super().__init__()
+        self.window = window
+        self.burst = max(1, burst)
+        self._state: Dict[str, List[float]] = {}  # key -> [window_start, emitted, suppressed, seen]
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        key = getattr(record, "log_key", None)
+        if key is None:
+            return True
+        sample = getattr(record, "log_sample", None)
+        with self._lock:
+            st = self._state.get(key)
+            if st is None:
+                st = self._state[key] = [record.created, 0, 0, 0]
+            st[3] += 1
+            if sample:
+                allow = (st[3] - 1) % sample == 0
+            else:
+                if record.created - st[0] >= self.window:
+                    st[0], st[1] = record.created, 0
+                allow = st[1] < self.burst
+            if not allow:
+                st[2] += 1
+                return False
+            st[1] += 1
+            if st[2]:
+                record.suppressed = int(st[2])
+                st[2] = 0
+        return True
+
+
+class TextFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        s = super().format(record)
+        n = getattr(record, "suppressed", 0)
+        return f"{s} [+{n} suppressed]" if n else s
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: ts, level, logger, msg + log_extra fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        out: Dict[str, Any] = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        fields = getattr(record, "fields", None)
+        if fields:
+            out.update(fields)
+        if getattr(record, "log_key", None):
+            out["key"] = record.log_key
+        if getattr(record, "suppressed", 0):
+            out["suppressed"] = record.suppressed
+        if record.exc_info:
+            out["exc"] = self.formatException(record.exc_info)
+        return json.dumps(out, ensure_ascii=False, default=str)
+
+
+class DeferredQueueHandler(QueueHandler):
+    """Enqueue records unformatted (in-process queue); the listener thread formats them.
+
+    Never blocks: when the queue is full the record is dropped and counted.
+    """
+
+    def __init__(self, q: "queue.Queue"):
+        super().__init__(q)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def _make_formatter() -> logging.Formatter:
+    return JsonFormatter() if LOG_JSON else TextFormatter(LOG_FORMAT, datefmt=LOG_DATE_FORMAT)
+
+
+_listener: Optional[QueueListener] = None
+_queue_handler: Optional[DeferredQueueHandler] = None
+_rate_filter = RateLimitFilter()
+
+
+def _configure() -> None:
+    """Root logging setup (replaces basicConfig): stdout, optional queue + writer thread."""
+    global _listener, _queue_handler
+    root = logging.getLogger()
+    if root.handlers:
+        return  # već konfigurirano (npr. basicConfig u entry skripti)
+    root.setLevel(getattr(logging, LOG_LEVEL.upper()))
+    stream = logging.StreamHandler(sys.stdout)
+    stream.setFormatter(_make_formatter())
+    if LOG_ASYNC:
+        _queue_handler = DeferredQueueHandler(queue.Queue(maxsize=max(100, LOG_QUEUE_SIZE)))
+        _queue_handler.addFilter(_rate_filter)
+        _listener = QueueListener(_queue_handler.queue, stream, respect_handler_level=True)
+        _listener.start()
+        root.addHandler(_queue_handler)
+        atexit.register(shutdown_logging)
+    else:
+        stream.addFilter(_rate_filter)
+        root.addHandler(stream)
+
+
+def add_handler(handler: logging.Handler) -> None:
+    """Attach an output handler (file etc.) behind the queue when async logging is on."""
+    if _listener is not None:
+        _listener.handlers = tuple(_listener.handlers) + (handler,)
+    else:
+        handler.addFilter(_rate_filter)
+        logging.getLogger().addHandler(handler)
+
+
+def shutdown_logging() -> None:
+    """Drain the queue and stop the writer thread (registered with atexit)."""
+    global _listener
+    if _listener is not None:
+        try:
+            _listener.stop()
+        except Exception:
+            pass
+        # late records (other atexit hooks) go straight to the output handlers
+        root = logging.getLogger()
+        root.removeHandler(_queue_handler)
+        for h in _listener.handlers:
+            h.addFilter(_rate_filter)
+            root.addHandler(h)
+        _listener = None
+        if _queue_handler is not None and _queue_handler.dropped:
+            sys.stderr.write(f"logger: {_queue_handler.dropped} records dropped (queue full)\n")
+
+
+def dropped_records() -> int:
+    return _queue_handler.dropped if _queue_handler is not None else 0
+
+
+_configure()
 
 # Quiet noisy third-party loggers by default
 for noisy in ("httpx", "urllib3", "selenium", "asyncio", "websockets"):
@@ -37,25 +229,24 @@ def get_logger(name: str) -> logging.Logger:
 
 class ScraperLogger:
     """Centralizirani logger za scraper s file output"""
-    
+
     def __init__(self, log_dir: str = "logs"):
         self.log_dir = Path(log_dir)
         self.log_dir.mkdir(exist_ok=True)
-        
+
         # Setup file handler
         log_file = self.log_dir / f"scraper_{datetime.now().strftime('%Y%m%d')}.log"
-        
+
         file_handler = logging.FileHandler(log_file, encoding='utf-8')
         file_handler.setLevel(logging.INFO)
-        file_formatter = logging.Formatter(
+        file_formatter = JsonFormatter() if LOG_JSON else TextFormatter(
             '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
         )
         file_handler.setFormatter(file_formatter)
-        
-        # Add file handler to root logger
-        root_logger = logging.getLogger()
-        root_logger.addHandler(file_handler)
-    
+
+        # Add file handler behind the log queue (root handler when LOG_ASYNC=0)
+        add_handler(file_handler)
+
     def log_scraper_start(self):
         """Log početak scraper sessiona"""
         logger = get_logger("scraper.main")
@@ -63,20 +254,20 @@ class ScraperLogger:
         logger.info("🚀 SCRAPER SESSION STARTED")
         logger.info(f"Time: {datetime.now().isoformat()}")
         logger.info("=" * 50)
-    
+
     def log_scraper_end(self, success: bool, duration: float, stats: dict = None):
         """Log završetak scraper sessiona"""
         logger = get_logger("scraper.main")
         logger.info("=" * 50)
-        
+
         if success:
             logger.info("✅ SCRAPER SESSION COMPLETED")
         else:
             logger.info("❌ SCRAPER SESSION FAILED")
-        
+
         logger.info(f"Duration: {duration:.2f}s")
-        
+
         if stats:
             logger.info(f"Stats: {stats}")
-        
-        logger.info("=" * 50)
\ No newline at end of file
+
+        logger.info("=" * 50)
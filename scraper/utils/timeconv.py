@@ -0,0 +1,144 @@
+# scraper/utils/timeconv.py
+"""
+Shared epoch / ISO conversions for processors, enrichment and the DB cleaner.
+
+All helpers are tolerant (bad input -> None, never raise) and memoised on the
+normalised value: a backfill day repeats the same kickoff timestamps, period starts
+and birth dates thousands of times, so the datetime work runs once per distinct value.
+
+Rules (same everywhere):
+  * numbers and digit strings are epoch seconds; |value| > 1e10 is milliseconds
+  * naive ISO strings are UTC (provider timestamps are canonical UTC)
+  * epochs go through EPOCH + timedelta, so pre-1970 dates work on every platform
+"""
+from __future__ import annotations
+
+import re
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Any, Iterable, List, Optional, Union
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MS_THRESHOLD = 10**10
+_INT_RE = re.compile(r"-?[0-9]+")  # ASCII only: str.isdigit() also accepts '²', '--5' after lstrip
+
+Number = Union[int, float]
+
+
+def epoch_seconds(v: Any) -> Optional[Number]:
+    """int/float/digit string -> epoch seconds (ms scaled down); anything else -> None."""
+    if v is None or v.__class__ is bool:
+        return None
+    if isinstance(v, (int, float)):
+        ts = v
+    elif isinstance(v, str):
+        s = v.strip()
+        if not _INT_RE.fullmatch(s):
+            return None
+        ts = int(s)
+    else:
+        return None
+    if abs(ts) > _MS_THRESHOLD:
+        ts = ts // 1000 if isinstance(ts, int) and ts % 1000 == 0 else ts / 1000.0
+    return ts
+
+
+@lru_cache(maxsize=65536)
+def _epoch_dt(ts: Number) -> Optional[datetime]:
+    try:
+        return EPOCH + timedelta(seconds=ts)
+    except (OverflowError, ValueError):
+        return None
+
+
+@lru_cache(maxsize=65536)
+def _parse_iso(s: str) -> Optional[datetime]:
+    try:
+        dt = datetime.fromisoformat(s.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if dt.tzinfo is None:
+        return dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc)
+
+
+def to_datetime(v: Any) -> Optional[datetime]:
+    """Epoch (s/ms, numeric string), ISO string or datetime -> aware UTC datetime."""
+    if not v:
+        return None
+    if isinstance(v, datetime):
+        return v.replace(tzinfo=timezone.utc) if v.tzinfo is None else v.astimezone(timezone.utc)
+    ts = epoch_seconds(v)
+    if ts is not None:
+        return _epoch_dt(ts)
+    if isinstance(v, str):
+        return _parse_iso(v.strip())
+    return None
+
+
+@lru_cache(maxsize=65536)
+def _iso(dt: datetime) -> str:
+    return dt.isoformat()
+
+
+def to_iso(v: Any) -> Optional[str]:
+    """-> 'YYYY-MM-DDTHH:MM:SS[.ffffff]+00:00' or None."""
+    dt = to_datetime(v)
+    return _iso(dt) if dt is not None else None
+
+
+def to_iso_seconds(v: Any) -> Optional[str]:
+    """Strict 'YYYY-MM-DDTHH:MM:SS+00:00' (sub-second part dropped) or None."""
+    dt = to_datetime(v)
+    return _iso(dt.replace(microsecond=0)) if dt is not None else None
+
+
+def to_epoch(v: Any) -> Optional[int]:
+    """-> integer epoch seconds or None."""
+    dt = to_datetime(v)
+    return int(dt.timestamp()) if dt is not None else None
+
+
+def to_date(v: Any) -> Optional[str]:
+    """Epoch (s/ms) or ISO date/datetime -> 'YYYY-MM-DD' or None (e.g. date_of_birth)."""
+    if isinstance(v, str):
+        s = v.strip()
+        if len(s) >= 10 and s[4] == "-" and s[7] == "-":
+            return s[:10]
+    dt = to_datetime(v)
+    return dt.date().isoformat() if dt is not None else None
+
+
+def epoch_year(v: Any) -> Optional[int]:
+    """Epoch (s/ms) -> calendar year (e.g. foundationDateTimestamp)."""
+    ts = epoch_seconds(v)
+    dt = _epoch_dt(ts) if ts is not None else None
+    return dt.year if dt is not None else None
+
+
+def _many(fn, values: Iterable[Any]) -> List[Any]:
+    # distinct values converted once; unhashable inputs fall through to fn directly
+    memo: dict = {}
+    out: List[Any] = []
+    for v in values:
+        try:
+            key = (v.__class__, v)
+            r = memo.get(key, memo)
+            if r is memo:
+                r = memo[key] = fn(v)
+        except TypeError:
+            r = fn(v)
+        out.append(r)
+    return out
+
+
+def to_iso_many(values: Iterable[Any]) -> List[Optional[str]]:
+    return _many(to_iso, values)
+
+
+def to_date_many(values: Iterable[Any]) -> List[Optional[str]]:
+    return _many(to_date, values)
+
+
+def to_epoch_many(values: Iterable[Any]) -> List[Optional[int]]:
+    return _many(to_epoch, values)
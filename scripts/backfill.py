@@ -1,11 +1,16 @@
 from datetime import date, timedelta
 from core.browser import BrowserManager
 from core.database import db
+from core.pg_bulk import bulk_client_from_env
 from scrapers.scheduled_scraper import ScheduledScraper
 from processors.match_processor import process_events_basic, prepare_for_database, build_details_payload
 from processors.stats_processor import parse_event_statistics
+from utils import enable_file_logging
 import time
 
+# PG_BULK_DSN set -> COPY + set-based merge preko direktne Postgres konekcije umjesto PostgREST-a
+db = bulk_client_from_env() or db
+
 def ingest_day(br: BrowserManager, d: date):
     day = d.strftime("%Y-%m-%d")
     sched = ScheduledScraper(br, day).scrape()
@@ -117,6 +122,7 @@ def ingest_day(br: BrowserManager, d: date):
     if match_stats_rows:  db.upsert_match_stats(match_stats_rows)
 
 if __name__ == "__main__":
+    enable_file_logging()
     br = BrowserManager()
     try:
         start = date.today() - timedelta(days=730)   # zadnje 2 godine
@@ -124,6 +130,8 @@ if __name__ == "__main__":
         d = start
         while d <= end:
             ingest_day(br, d)
+            if hasattr(db, "log_throughput"):
+                db.log_throughput()
             d += timedelta(days=1)
     finally:
         br.close()
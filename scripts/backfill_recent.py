@@ -17,6 +17,7 @@ sys.path.insert(0, ROOT)
 
 from scraper.fetch_loop import FetchLoop  # noqa
 from core.database import db  # noqa
+from utils import enable_file_logging  # noqa
 
 async def run(days: int):
     days = max(1, min(days, 7))  # safety cap 1..7
@@ -36,6 +37,7 @@ async def run(days: int):
     print("[backfill] Done.")
 
 if __name__ == "__main__":
+    enable_file_logging()
     d = 2
     if len(sys.argv) > 1:
         try:
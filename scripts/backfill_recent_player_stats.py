@@ -28,6 +28,7 @@ from core.database import db
 from fetch_loop import FetchLoop  # reuse parsing helpers
 from processors import MatchProcessor, stats_processor
 from processors.stats_processor import build_player_stats_fallback
+from utils import enable_file_logging
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -58,6 +59,8 @@ def main():
         end = datetime.now(timezone.utc)
         start = (end - timedelta(days=args.days-1)).replace(hour=0, minute=0, second=0, microsecond=0)
         end = end.replace(hour=0, minute=0, second=0, microsecond=0)
+    if not args.dry_run:
+        enable_file_logging()
     logger.info(f'[backfill] range {start.date()} -> {end.date()} dry_run={args.dry_run}')
 
     browser = Browser()
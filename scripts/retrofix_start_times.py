@@ -37,7 +37,7 @@ Outputs a CSV audit file retrofix_audit.csv (append) with: id,source_event_id,ol
 from __future__ import annotations
 import os, sys, math, time, argparse, datetime as dt, csv
 import requests
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable, Iterator
 
 # ------------------------------------------------------------------
 # Environment bootstrap: load .env.local then import Config fallback
@@ -87,31 +87,19 @@ def parse_iso_to_epoch(iso_str: str) -> int | None:
         return None
 
 
-def fetch_all() -> List[Dict[str, Any]]:
-    headers = {"apikey": SERVICE_KEY, "Authorization": f"Bearer {SERVICE_KEY}"}
-    rows: List[Dict[str, Any]] = []
-    offset = 0
+def fetch_all() -> Iterator[Dict[str, Any]]:
+    """Stream rows via the shared keyset scan (id order): flat memory and per-page latency."""
+    scraper_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'scraper'))
+    if scraper_dir not in sys.path:
+        sys.path.insert(0, scraper_dir)
+    from core.config import Config  # type: ignore
+    # the shared client reads Config; hand it the credentials resolved above (incl. ANON fallback)
+    Config.SUPABASE_URL = SUPABASE_URL
+    Config.SUPABASE_SERVICE_KEY = SERVICE_KEY
+    from core.database import db  # type: ignore
     select = "id,start_time,source,source_event_id"
-    while True:
-        r = requests.get(
-            f"{SUPABASE_URL}/rest/v1/{TABLE}",
-            params={"select": select, "limit": PAGE_SIZE, "offset": offset},
-            headers=headers,
-            timeout=30,
-        )
-        if r.status_code != 200:
-            print("Fetch error", r.status_code, r.text)
-            break
-        batch = r.json()
-        if not batch:
-            break
-        rows.extend(batch)
-        if len(batch) < PAGE_SIZE:
-            break
-        offset += PAGE_SIZE
-        time.sleep(0.15)
     print(f"Using legacy select columns: {select}")
-    return rows
+    yield from db.scan(TABLE, select, order_by=("id",), page_size=PAGE_SIZE)
 
 
 def fetch_canonical_start(event_id: int) -> int | None:
@@ -131,11 +119,11 @@ def fetch_canonical_start(event_id: int) -> int | None:
         return None
     return None
 
-def detect_candidates(rows: List[Dict[str, Any]], min_diff: int, pattern_fallback: bool) -> List[Dict[str, Any]]:
+def detect_candidates(rows: Iterable[Dict[str, Any]], min_diff: int, pattern_fallback: bool) -> List[Dict[str, Any]]:
     now_plus = int(time.time()) + 400*24*3600
     year2005 = int(dt.datetime(2005,1,1, tzinfo=dt.timezone.utc).timestamp())
     cands = []
-    total = len(rows)
+    idx = 0
     for idx, r in enumerate(rows, 1):
         st_iso = r.get("start_time")
         if not st_iso:
@@ -171,7 +159,8 @@ def detect_candidates(rows: List[Dict[str, Any]], min_diff: int, pattern_fallbac
                 "mode": mode,
             })
         if idx % 250 == 0:
-            print(f"Scanned {idx}/{total}... candidates so far: {len(cands)}")
+            print(f"Scanned {idx}... candidates so far: {len(cands)}")
+    print(f"Scanned {idx} rows")
     return cands
 
 
@@ -237,13 +226,8 @@ def main():
         print("Missing SUPABASE_URL or SUPABASE_SERVICE_KEY/ANON_KEY in env.")
         sys.exit(1)
 
-    print("Fetching rows...")
-    rows = fetch_all()
-    print(f"Fetched {len(rows)} rows")
-    if not rows:
-        return
-
-    cands = detect_candidates(rows, args.min_diff, args.pattern_fallback)
+    print("Streaming rows...")
+    cands = detect_candidates(fetch_all(), args.min_diff, args.pattern_fallback)
     print(f"Detected {len(cands)} anomalous candidates (min_diff={args.min_diff})")
 
     updates = []